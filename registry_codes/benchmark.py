@@ -0,0 +1,500 @@
+"""
+Times each stage of loading a table into sqlite: reading the csv files
+(load_data_to_df), cleaning (clean_data), coercing values for sqla
+(coerce_dataframe, the column-wise coerce_sqla_types) and inserting
+(insert_data_to_table, which coerces again as it goes).
+
+Tables are benchmarked as they are under tables/ (scale 1) and as synthetic
+tables scaled up from them. A synthetic table at scale n is the real rows
+written out n times, with the key columns of every copy after the first
+suffixed so that the copies don't collapse into each other when cleaned.
+Column types, missing values and duplicates are the same as the real data.
+
+Each stage reports wall time, rows per second and peak memory allocated
+(traced with tracemalloc, which slows the stages down a little, so only
+compare runs made with the same setting). Results are written as JSON and
+can be compared with a previous run to flag regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, TypedDict, TypeVar
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import create_engine
+
+from registry_codes.catalog import default_catalog
+from registry_codes.instrumentation import configure_logging
+from registry_codes.schema import LARGE_TABLES, TABLE_MODEL_MAP
+from registry_codes.utils import (
+    clean_data,
+    coerce_dataframe,
+    create_table,
+    drop_table,
+    fill_creation_dates,
+    insert_data_to_table,
+    load_data,
+    load_data_to_df,
+    stream_data_to_table,
+)
+
+SCALES = [1, 10, 100, 1000]
+OUTPUT_FILE = "benchmark.json"
+
+# Slowdowns below this are put down to noise rather than flagged
+THRESHOLD = 0.2
+MIN_SECONDS = 0.01
+
+T = TypeVar("T")
+
+
+class StageResult(TypedDict):
+    table: str
+    scale: int
+    stage: str
+    rows: int
+    seconds: float
+    rows_per_second: float
+    # None when memory wasn't traced
+    peak_memory_bytes: int | None
+
+
+class BenchmarkReport(TypedDict):
+    created: str
+    environment: dict[str, str]
+    insert_mode: str
+    chunksize: int
+    track_memory: bool
+    results: list[StageResult]
+
+
+class Regression(TypedDict):
+    table: str
+    scale: int
+    stage: str
+    baseline_seconds: float
+    seconds: float
+    ratio: float
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": str(os.cpu_count()),
+        "pandas": pd.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+    }
+
+
+@contextmanager
+def _working_directory(path: Path) -> Iterator[None]:
+    # load_data_to_df reads from tables/ under the working directory
+    previous = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _key_columns(table_name: str) -> list[str]:
+    """Columns suffixed in synthetic copies, the declared unique columns
+    along with the primary key so the copies can all be inserted.
+    """
+    table_info = TABLE_MODEL_MAP[table_name]
+    mapper = table_info["sqla_model"].__mapper__
+    primary_key = [key for key, column in mapper.columns.items() if column.primary_key]
+    return list(dict.fromkeys([*table_info["unique_columns"], *primary_key]))
+
+
+def write_synthetic_table(
+    table_name: str, scale: int, tables_dir: Path, source_dir: Path = Path("tables")
+) -> int:
+    """Write the real rows of a table scale times into a single csv file under
+    tables_dir, returning the number of rows written.
+    """
+    filepaths = sorted((source_dir / table_name).glob("*.csv"))
+    if not filepaths:
+        return 0
+
+    # Read as the exact text in the files so it's written back unchanged
+    real = pd.concat(
+        [
+            pd.read_csv(
+                filepath,
+                dtype=str,
+                keep_default_na=False,
+                encoding="utf-8",
+                index_col=False,
+            )
+            for filepath in filepaths
+        ],
+        ignore_index=True,
+    )
+    key_columns = [column for column in _key_columns(table_name) if column in real]
+
+    output = tables_dir / table_name / f"{table_name}.csv"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        real.to_csv(f, index=False, lineterminator="\n")
+        for copy in range(1, scale):
+            rows = real.copy()
+            for column in key_columns:
+                # Missing keys stay missing so clean_data drops the same rows
+                rows[column] = rows[column].where(
+                    rows[column] == "", rows[column] + f"~{copy}"
+                )
+            rows.to_csv(f, header=False, index=False, lineterminator="\n")
+
+    return len(real) * scale
+
+
+def _measure(
+    function: Callable[[], T], track_memory: bool
+) -> tuple[T, float, int | None]:
+    """Run function, returning what it returned, the wall time and the peak
+    memory allocated while it ran.
+    """
+    if track_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_table(
+    table_name: str,
+    scale: int,
+    engine,
+    bulk: bool = True,
+    chunksize: int = 1000,
+    track_memory: bool = True,
+    streaming: bool = False,
+) -> list[StageResult]:
+    """Run each stage once for a table in the working directory's tables/.
+    With streaming set whole loads through load_data are compared with
+    streamed loads (stages load and stream), mostly for their peak memory.
+    """
+    sqla_model = TABLE_MODEL_MAP[table_name]["sqla_model"]
+    results: list[StageResult] = []
+
+    def record(stage: str, rows: int, seconds: float, peak: int | None) -> None:
+        results.append(
+            {
+                "table": table_name,
+                "scale": scale,
+                "stage": stage,
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+                "peak_memory_bytes": peak,
+            }
+        )
+
+    df, seconds, peak = _measure(
+        lambda: load_data_to_df(table_name, typed=True), track_memory
+    )
+    record("read", len(df), seconds, peak)
+
+    rows = len(df)
+    df, seconds, peak = _measure(lambda: clean_data(table_name, df), track_memory)
+    record("clean", rows, seconds, peak)
+
+    # As load_data does, outside of any stage
+    if engine.dialect.name == "sqlite":
+        df = fill_creation_dates(table_name, df)
+
+    _, seconds, peak = _measure(lambda: coerce_dataframe(df, sqla_model), track_memory)
+    record("coerce", len(df), seconds, peak)
+
+    drop_table(table_name, engine)
+    create_table(table_name, engine)
+    inserted, seconds, peak = _measure(
+        lambda: insert_data_to_table(
+            table_name, df, engine, bulk=bulk, chunksize=chunksize
+        ),
+        track_memory,
+    )
+    record("insert", inserted, seconds, peak)
+
+    if streaming:
+        del df
+        # Otherwise the catalog hands back the table parsed above
+        default_catalog().clear()
+        inserted, seconds, peak = _measure(
+            lambda: load_data(table_name, engine, bulk=bulk, chunksize=chunksize),
+            track_memory,
+        )
+        record("load", inserted, seconds, peak)
+        default_catalog().clear()
+
+        inserted, seconds, peak = _measure(
+            lambda: stream_data_to_table(
+                table_name, engine, bulk=bulk, chunksize=chunksize
+            ),
+            track_memory,
+        )
+        record("stream", inserted, seconds, peak)
+
+    return results
+
+
+def _best(runs: list[list[StageResult]]) -> list[StageResult]:
+    """Fastest time and highest peak memory for each stage over repeated runs"""
+    best: list[StageResult] = []
+    for results in zip(*runs):
+        fastest = min(results, key=lambda result: result["seconds"]).copy()
+        peaks = [result["peak_memory_bytes"] for result in results]
+        if all(peak is not None for peak in peaks):
+            fastest["peak_memory_bytes"] = max(peak or 0 for peak in peaks)
+        best.append(fastest)
+    return best
+
+
+def run_benchmarks(
+    tables: list[str],
+    scales: list[int] = SCALES,
+    workdir: str | Path | None = None,
+    bulk: bool = True,
+    chunksize: int = 1000,
+    repeat: int = 1,
+    track_memory: bool = True,
+    streaming: bool = False,
+) -> BenchmarkReport:
+    """Benchmark every table at every scale. Synthetic tables and the sqlite
+    databases go in workdir, a temporary directory by default.
+    """
+    for table_name in tables:
+        if table_name not in TABLE_MODEL_MAP:
+            raise ValueError(f"Unknown table: {table_name}")
+
+    source_dir = Path("tables").resolve()
+    results: list[StageResult] = []
+
+    with tempfile.TemporaryDirectory(dir=workdir) as temp:
+        for scale in scales:
+            scale_dir = Path(temp) / f"x{scale}"
+            scale_dir.mkdir()
+            # Scale 1 reads the real files as they're laid out in tables/
+            tables_dir = source_dir.parent if scale == 1 else scale_dir
+            engine = create_engine(f"sqlite:///{scale_dir / 'benchmark.sqlite'}")
+
+            for table_name in tables:
+                if scale == 1:
+                    found = any((source_dir / table_name).glob("*.csv"))
+                else:
+                    found = (
+                        write_synthetic_table(
+                            table_name, scale, scale_dir / "tables", source_dir
+                        )
+                        > 0
+                    )
+                if not found:
+                    print(f"Skipping {table_name}, no csv files")
+                    continue
+
+                runs = []
+                for _ in range(repeat):
+                    with _working_directory(tables_dir):
+                        runs.append(
+                            benchmark_table(
+                                table_name,
+                                scale,
+                                engine,
+                                bulk=bulk,
+                                chunksize=chunksize,
+                                track_memory=track_memory,
+                                streaming=streaming,
+                            )
+                        )
+
+                for result in _best(runs):
+                    print(format_result(result))
+                    results.append(result)
+
+            engine.dispose()
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "insert_mode": "bulk" if bulk else "orm",
+        "chunksize": chunksize,
+        "track_memory": track_memory,
+        "results": results,
+    }
+
+
+def format_result(result: StageResult) -> str:
+    peak = result["peak_memory_bytes"]
+    memory = f"{peak / 2**20:8.1f} MiB" if peak is not None else ""
+    return (
+        f"{result['table']:<20} x{result['scale']:<5} {result['stage']:<7}"
+        f"{result['rows']:>10} rows {result['seconds']:9.3f}s "
+        f"{result['rows_per_second']:>12.0f} rows/s {memory}"
+    )
+
+
+def compare(
+    baseline: BenchmarkReport,
+    report: BenchmarkReport,
+    threshold: float = THRESHOLD,
+    min_seconds: float = MIN_SECONDS,
+) -> list[Regression]:
+    """Stages which took more than threshold longer than in the baseline.
+    Stages missing from either run are ignored.
+    """
+    previous = {
+        (result["table"], result["scale"], result["stage"]): result
+        for result in baseline["results"]
+    }
+
+    regressions: list[Regression] = []
+    for result in report["results"]:
+        before = previous.get((result["table"], result["scale"], result["stage"]))
+        if before is None or result["seconds"] < min_seconds:
+            continue
+        ratio = result["seconds"] / max(before["seconds"], min_seconds)
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "table": result["table"],
+                    "scale": result["scale"],
+                    "stage": result["stage"],
+                    "baseline_seconds": before["seconds"],
+                    "seconds": result["seconds"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time each stage of loading the tables into sqlite"
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        dest="tables",
+        help="Table to benchmark, can be repeated, every table by default",
+    )
+    parser.add_argument(
+        "--large-tables", action="store_true", help="Include large tables"
+    )
+    parser.add_argument(
+        "--scales",
+        type=lambda value: [int(scale) for scale in value.split(",")],
+        default=SCALES,
+        help="Comma separated scales, 1 being the real tables (default 1,10,100,1000)",
+    )
+    parser.add_argument(
+        "--orm",
+        action="store_true",
+        help="Insert with ORM objects rather than batched Core statements",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=1000, help="Rows inserted per batch"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per table, the fastest is kept"
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Don't trace memory, timings are then a little lower",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Also compare the memory of whole and streamed loads (load and stream stages)",
+    )
+    parser.add_argument(
+        "--workdir",
+        help="Where synthetic tables are written, a temporary directory by default",
+    )
+    parser.add_argument(
+        "--output",
+        default=OUTPUT_FILE,
+        help=f"JSON results file (default {OUTPUT_FILE})",
+    )
+    parser.add_argument(
+        "--compare", help="Previous results file to flag regressions against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="Fraction slower than the baseline counted as a regression",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=MIN_SECONDS,
+        help="Stages quicker than this are never counted as regressions",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Log the progress of each stage"
+    )
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        configure_logging()
+
+    tables = args.tables or [
+        table
+        for table in TABLE_MODEL_MAP
+        if args.large_tables or table not in LARGE_TABLES
+    ]
+
+    report = run_benchmarks(
+        tables,
+        scales=args.scales,
+        workdir=args.workdir,
+        bulk=not args.orm,
+        chunksize=args.chunksize,
+        repeat=args.repeat,
+        track_memory=not args.no_memory,
+        streaming=args.streaming,
+    )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline: BenchmarkReport = json.load(f)
+    regressions = compare(
+        baseline, report, threshold=args.threshold, min_seconds=args.min_seconds
+    )
+    for regression in regressions:
+        print(
+            f"REGRESSION: {regression['table']} x{regression['scale']} "
+            f"{regression['stage']} {regression['baseline_seconds']:.3f}s -> "
+            f"{regression['seconds']:.3f}s ({regression['ratio']:.2f}x)"
+        )
+    print(f"{len(regressions)} regressions against {args.compare}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Parsed tables shared between everything that reads the csv files. A table is
+parsed the first time it's asked for and handed out again until its files
+change. With a cache directory set (REGISTRY_CODES_CACHE_DIR, or cache_dir)
+parsed tables are also written to disk, so that the sqlite and postgres
+builds in the same run, or repeated test runs, only parse unchanged files
+once between them.
+
+Files are considered changed when their modification time or size differs,
+or with invalidation="hash" when their contents differ.
+"""
+
+import hashlib
+import logging
+import os
+import pickle  # nosec B403 - only reads files this module wrote
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+
+from registry_codes.manifest import schema_fingerprint
+from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.utils import CsvEngine, clean_data, load_data_to_df
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "REGISTRY_CODES_CACHE_DIR"
+# Bump to ignore everything previously written to disk
+CACHE_VERSION = "1"
+
+Invalidation = Literal["mtime", "hash"]
+CacheFormat = Literal["pickle", "parquet"]
+
+
+def files_fingerprint(table_dir: Path, invalidation: Invalidation = "mtime") -> str:
+    """Hash of the names and modification times, or contents, of the csv
+    files for a table.
+    """
+    digest = hashlib.sha256()
+    for filepath in sorted(table_dir.glob("*.csv")):
+        digest.update(filepath.name.encode("utf-8"))
+        if invalidation == "hash":
+            digest.update(hashlib.sha256(filepath.read_bytes()).digest())
+        else:
+            stat = filepath.stat()
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TableCatalog:
+    """Parsed, and optionally cleaned, tables by name. Every call returns a
+    copy so callers are free to modify what they get back. Threads asking for
+    a table being parsed wait for it rather than parsing it again.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        invalidation: Invalidation = "mtime",
+        cache_format: CacheFormat = "pickle",
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.invalidation: Invalidation = invalidation
+        self.cache_format: CacheFormat = cache_format
+        self._tables: dict[tuple, tuple[str, pd.DataFrame]] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def get(
+        self,
+        table_name: str,
+        typed: bool = False,
+        clean: bool = False,
+        csv_engine: CsvEngine = "c",
+    ) -> pd.DataFrame:
+        """The table as load_data_to_df (and clean_data with clean set) would
+        return it. csv_engine is only used if the files need parsing.
+        """
+        if table_name not in TABLE_MODEL_MAP:
+            raise ValueError(f"Unknown table: {table_name}")
+
+        table_dir = (Path("tables") / table_name).resolve()
+        key = (str(table_dir), typed, clean)
+
+        with self._table_lock(key):
+            fingerprint = files_fingerprint(table_dir, self.invalidation)
+
+            cached = self._tables.get(key)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1].copy()
+
+            df = self._read_disk(table_name, typed, clean, fingerprint)
+            if df is None:
+                df = load_data_to_df(table_name, typed=typed, csv_engine=csv_engine)
+                if clean and len(df) > 0:
+                    df = clean_data(table_name, df)
+                self._write_disk(table_name, typed, clean, fingerprint, df)
+
+            self._tables[key] = (fingerprint, df)
+            return df.copy()
+
+    def _table_lock(self, key: tuple) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def clear(self) -> None:
+        """Forget the tables held in memory, the disk cache is left alone"""
+        self._tables.clear()
+
+    def _disk_path(
+        self, table_name: str, typed: bool, clean: bool, fingerprint: str
+    ) -> Path:
+        assert self.cache_dir is not None  # nosec B101
+        table_dir = str((Path("tables") / table_name).resolve())
+        # Typed tables take their dtypes from the model so depend on it too
+        digest = hashlib.sha256(
+            "\0".join(
+                [
+                    CACHE_VERSION,
+                    fingerprint,
+                    schema_fingerprint(table_name) if typed else "",
+                    pd.__version__,
+                ]
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+        variant = f"{'typed' if typed else 'raw'}{'-clean' if clean else ''}"
+        location = hashlib.sha256(table_dir.encode("utf-8")).hexdigest()[:8]
+        suffix = "parquet" if self.cache_format == "parquet" else "pkl"
+        return self.cache_dir / f"{table_name}.{variant}.{location}.{digest}.{suffix}"
+
+    def _read_disk(
+        self, table_name: str, typed: bool, clean: bool, fingerprint: str
+    ) -> pd.DataFrame | None:
+        if self.cache_dir is None:
+            return None
+
+        path = self._disk_path(table_name, typed, clean, fingerprint)
+        if not path.exists():
+            return None
+
+        try:
+            if self.cache_format == "parquet":
+                df = pd.read_parquet(path)
+            else:
+                with open(path, "rb") as f:
+                    df = pickle.load(f)  # nosec B301
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache file {path}: {e}")
+            return None
+
+        logger.info(f"Read {table_name} from cache {path}")
+        return df
+
+    def _write_disk(
+        self,
+        table_name: str,
+        typed: bool,
+        clean: bool,
+        fingerprint: str,
+        df: pd.DataFrame,
+    ) -> None:
+        if self.cache_dir is None:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(table_name, typed, clean, fingerprint)
+
+        # Written under a temporary name and renamed so another process never
+        # reads half a file
+        partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+        if self.cache_format == "parquet":
+            df.to_parquet(partial)
+        else:
+            with open(partial, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+
+        # Entries from older versions of the files are no use any more
+        prefix = path.name.rsplit(".", 2)[0]
+        for old in self.cache_dir.glob(f"{prefix}.*"):
+            if old != path and not old.name.endswith(".partial"):
+                old.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=1)
+def default_catalog() -> TableCatalog:
+    """The catalog shared by the process, cached on disk if
+    REGISTRY_CODES_CACHE_DIR is set.
+    """
+    return TableCatalog(cache_dir=os.environ.get(CACHE_DIR_ENV) or None)
+
+
+def load_table(
+    table_name: str,
+    typed: bool = False,
+    clean: bool = False,
+    csv_engine: CsvEngine = "c",
+) -> pd.DataFrame:
+    """Read a table through the shared catalog"""
+    return default_catalog().get(table_name, typed, clean, csv_engine)
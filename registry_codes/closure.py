@@ -0,0 +1,271 @@
+"""
+Follows chains of code_map entries (eg. PV_RAW -> PV -> LOINC) through to
+every code they eventually reach. The result is stored as an extra table so
+that translating a code to any standard it can reach is a single indexed
+lookup rather than a join per hop.
+"""
+
+import logging
+from collections import defaultdict, deque
+from typing import TypedDict
+
+import pandas as pd
+from sqlalchemy import Boolean, Column, Index, Integer, MetaData, String, Table
+from sqlalchemy import inspect, insert, select
+from sqlalchemy.schema import CreateTable
+
+from registry_codes.metadata import target_table
+
+logger = logging.getLogger(__name__)
+
+CLOSURE_TABLE = "code_map_closure"
+CLOSURE_COLUMNS = [
+    "source_coding_standard",
+    "source_code",
+    "destination_coding_standard",
+    "destination_code",
+    "path_length",
+    "via",
+    "one_to_many",
+    "many_to_one",
+]
+
+Node = tuple[str, str]
+
+
+class Closure(TypedDict):
+    pairs: pd.DataFrame
+    cycles: list[list[Node]]
+
+
+def closure_table(schema=None) -> Table:
+    """Kept in its own metadata like the build manifest. The primary key
+    starts with the source code and destination standard so it doubles as the
+    index for lookups, the second index covers going the other way.
+    """
+    return Table(
+        CLOSURE_TABLE,
+        MetaData(),
+        Column("source_coding_standard", String(256), primary_key=True),
+        Column("source_code", String(256), primary_key=True),
+        Column("destination_coding_standard", String(256), primary_key=True),
+        Column("destination_code", String(256), primary_key=True),
+        Column("path_length", Integer, nullable=False),
+        Column("via", String(1024)),
+        Column("one_to_many", Boolean, nullable=False),
+        Column("many_to_one", Boolean, nullable=False),
+        Index(
+            f"ix_{CLOSURE_TABLE}_destination",
+            "destination_coding_standard",
+            "destination_code",
+        ),
+        schema=schema,
+    )
+
+
+def code_map_graph(code_map: pd.DataFrame) -> dict[Node, list[Node]]:
+    """Map each (coding_standard, code) to the codes it maps to directly.
+    Edges are sorted so the paths picked out are the same on every build.
+    """
+    graph: dict[Node, list[Node]] = defaultdict(list)
+    edges = code_map[
+        [
+            "source_coding_standard",
+            "source_code",
+            "destination_coding_standard",
+            "destination_code",
+        ]
+    ].dropna()
+
+    for source_std, source, destination_std, destination in sorted(
+        edges.itertuples(index=False, name=None)
+    ):
+        graph[(source_std, source)].append((destination_std, destination))
+
+    return dict(graph)
+
+
+def find_cycles(graph: dict[Node, list[Node]]) -> list[list[Node]]:
+    """Groups of codes which map back round to each other, found with
+    Tarjan's strongly connected components algorithm. Written without
+    recursion as chains can be long.
+    """
+    index: dict[Node, int] = {}
+    lowlink: dict[Node, int] = {}
+    stack: list[Node] = []
+    on_stack: set[Node] = set()
+    cycles: list[list[Node]] = []
+
+    for root in graph:
+        if root in index:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, edge = work.pop()
+            if edge == 0:
+                index[node] = lowlink[node] = len(index)
+                stack.append(node)
+                on_stack.add(node)
+
+            successors = graph.get(node, [])
+            if edge < len(successors):
+                work.append((node, edge + 1))
+                successor = successors[edge]
+                if successor not in index:
+                    work.append((successor, 0))
+                elif successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+                continue
+
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in successors:
+                    cycles.append(sorted(component))
+
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return sorted(cycles)
+
+
+def _reachable(graph: dict[Node, list[Node]], source: Node) -> list[tuple]:
+    """Breadth first walk from one code, giving the shortest path to each code
+    it reaches. Paths never pass through the same coding standard twice, a
+    round trip such as EDTA -> EDTA2 -> EDTA isn't a translation, which also
+    stops the walk going round cycles.
+
+    As the standards a path has passed through limit where it can go next, a
+    code reached again through different standards is walked on from again.
+    Only paths through a superset of the standards of an earlier path to the
+    same code are dropped, they can't reach anything new.
+    """
+    # Standards on the paths each code has been walked on from
+    walked: dict[Node, list[frozenset[str]]] = {source: [frozenset([source[0]])]}
+    # Each code with the standards passed through between the source and it
+    queue: deque[tuple[Node, tuple[str, ...]]] = deque([(source, ())])
+    rows = []
+
+    while queue:
+        node, via = queue.popleft()
+        node_via = via if node == source else (*via, node[0])
+        for successor in graph.get(node, []):
+            if successor[0] in (source[0], *node_via):
+                continue
+            standards = frozenset((source[0], *node_via, successor[0]))
+            if any(earlier <= standards for earlier in walked.get(successor, [])):
+                continue
+            if successor not in walked:
+                # The first path to a code is the shortest
+                rows.append(
+                    (
+                        *source,
+                        *successor,
+                        len(node_via) + 1,
+                        " > ".join(node_via) or None,
+                    )
+                )
+            walked.setdefault(successor, []).append(standards)
+            queue.append((successor, node_via))
+
+    return rows
+
+
+def code_map_closure(code_map: pd.DataFrame) -> Closure:
+    """Every (source, destination) pair connected by one or more code_map
+    entries, found by a breadth first walk from each source code (see
+    _reachable). The walk's states are a code plus the standards on the path
+    to it, and a state is dropped when an earlier path reached the same code
+    through a subset of its standards. A code can be walked on from once per
+    such combination of standards, so in the worst case the work grows with
+    the number of those combinations rather than the size of the closure. Real
+    chains only pass through a few standards, which keeps that small.
+
+    Two kinds of conflict are flagged on each pair: one_to_many when the
+    source reaches more than one code in the destination standard, and
+    many_to_one when more than one code in the source standard reaches the
+    destination.
+    """
+    graph = code_map_graph(code_map)
+
+    rows = []
+    for source in graph:
+        rows.extend(_reachable(graph, source))
+
+    pairs = pd.DataFrame(rows, columns=CLOSURE_COLUMNS[:-2])
+    destinations = pairs.groupby(
+        ["source_coding_standard", "source_code", "destination_coding_standard"]
+    )["destination_code"].transform("size")
+    pairs["one_to_many"] = destinations > 1
+    sources = pairs.groupby(
+        ["source_coding_standard", "destination_coding_standard", "destination_code"]
+    )["source_code"].transform("nunique")
+    pairs["many_to_one"] = sources > 1
+    pairs["path_length"] = pairs["path_length"].astype(int)
+
+    return {"pairs": pairs, "cycles": find_cycles(graph)}
+
+
+def closure_is_stale(engine, rebuilt_tables, schema=None) -> bool:
+    """The closure only needs recomputing when code_map has been reloaded, or
+    the table is missing or was built with other columns
+    """
+    if "code_map" in rebuilt_tables:
+        return True
+    inspector = inspect(engine)
+    if not inspector.has_table(CLOSURE_TABLE, schema=schema):
+        return True
+    columns = inspector.get_columns(CLOSURE_TABLE, schema=schema)
+    return [column["name"] for column in columns] != CLOSURE_COLUMNS
+
+
+def build_code_map_closure(engine, schema=None) -> int:
+    """Compute the closure from the code_map table as loaded and replace the
+    closure table with it.
+    """
+    code_map = target_table("code_map", engine, schema)
+    with engine.connect() as conn:
+        df = pd.read_sql_query(select(code_map), conn)
+
+    closure = code_map_closure(df)
+    pairs = closure["pairs"]
+
+    one_to_many = int(pairs["one_to_many"].sum())
+    if one_to_many > 0:
+        logger.warning(
+            f"{one_to_many} closure rows where a code reaches more "
+            f"than one code in the same standard"
+        )
+    many_to_one = int(pairs["many_to_one"].sum())
+    if many_to_one > 0:
+        logger.warning(
+            f"{many_to_one} closure rows where a code is reached by "
+            f"more than one code in the same standard"
+        )
+
+    table = closure_table(schema)
+    table.drop(engine, checkfirst=True)
+
+    # Index is built once the rows are in rather than maintained row by row
+    records = pairs.astype(object).where(pairs.notna(), None).to_dict("records")
+    with engine.begin() as conn:
+        conn.execute(CreateTable(table))
+        if records:
+            conn.execute(insert(table), records)
+        for index in table.indexes:
+            index.create(conn)
+
+    # Most cycles are maps kept in both directions (eg. EDTA and EDTA2) so
+    # they are only counted, find_cycles lists them
+    logger.info(
+        f"Built {CLOSURE_TABLE}: {len(pairs)} pairs, "
+        f"{len(closure['cycles'])} cycles in code_map"
+    )
+    return len(pairs)
@@ -0,0 +1,200 @@
+"""
+Whitespace normalisation for the csv tables. Outside of quoted fields
+non-breaking spaces become plain spaces, and spaces or tabs at the start of
+a line or after a comma are removed. Quoted fields are left exactly as they
+are, including across line breaks.
+
+Files are streamed line by line on a pool of worker processes. A file is
+only rewritten when something in it changes, and then through a temporary
+file renamed over the original. With --check nothing is written, each line
+that would change is reported and the exit code is 1.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, TypedDict
+
+TABLES_DIR = Path("tables")
+NBSP = "\u00a0"
+
+_AFTER_COMMA = re.compile(r",[ \t]+")
+
+
+class LineIssue(TypedDict):
+    file: str
+    line: int
+    problems: list[str]
+
+
+class FileResult(TypedDict):
+    file: str
+    changed: bool
+    issues: list[LineIssue]
+
+
+def _normalise_unquoted(text: str, line_start: bool, problems: set[str]) -> str:
+    """Normalise a stretch of a line which is outside quotes"""
+    if NBSP in text:
+        problems.add("non-breaking space")
+        text = text.replace(NBSP, " ")
+
+    if line_start:
+        stripped = text.lstrip(" \t")
+        if stripped != text:
+            problems.add("leading whitespace")
+            text = stripped
+
+    stripped = _AFTER_COMMA.sub(",", text)
+    if stripped != text:
+        problems.add("whitespace after comma")
+    return stripped
+
+
+def normalise_line(line: str, in_quotes: bool = False) -> tuple[str, bool, list[str]]:
+    """Normalise a line given whether it starts inside a quoted field. Returns
+    the line, whether it ends inside a quoted field and what was changed.
+    """
+    problems: set[str] = set()
+
+    # Most lines have no quotes at all
+    if '"' not in line:
+        if not in_quotes:
+            line = _normalise_unquoted(line, True, problems)
+        return line, in_quotes, sorted(problems)
+
+    # Splitting on quotes alternates between outside and inside a quoted
+    # field, an escaped quote ("") is an empty stretch outside so is harmless
+    parts = line.split('"')
+    for i, part in enumerate(parts):
+        outside = (i % 2 == 0) != in_quotes
+        if outside:
+            parts[i] = _normalise_unquoted(part, i == 0, problems)
+
+    in_quotes = in_quotes != (len(parts) % 2 == 0)
+    return '"'.join(parts), in_quotes, sorted(problems)
+
+
+def normalise_lines(lines: Iterable[str]) -> Iterator[tuple[str, list[str]]]:
+    """Normalised lines along with what was changed in each"""
+    in_quotes = False
+    for line in lines:
+        line, in_quotes, problems = normalise_line(line, in_quotes)
+        yield line, problems
+
+
+def _open(filepath: Path):
+    # newline="" keeps line endings exactly as they are in the file
+    return open(filepath, "r", encoding="utf-8", newline="")
+
+
+def format_file(filepath: str | Path, check: bool = False) -> FileResult:
+    """Check a file and, unless check is set, rewrite it if anything changed"""
+    filepath = Path(filepath)
+
+    issues: list[LineIssue] = []
+    with _open(filepath) as f:
+        for line_number, (_, problems) in enumerate(normalise_lines(f), 1):
+            if problems:
+                issues.append(
+                    {"file": str(filepath), "line": line_number, "problems": problems}
+                )
+
+    if issues and not check:
+        # Streamed a second time into a file alongside, so the rename is atomic
+        fd, temp_path = tempfile.mkstemp(
+            dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+        )
+        try:
+            with (
+                _open(filepath) as source,
+                os.fdopen(fd, "w", encoding="utf-8", newline="") as target,
+            ):
+                for line, _ in normalise_lines(source):
+                    target.write(line)
+            os.chmod(temp_path, filepath.stat().st_mode)
+            os.replace(temp_path, filepath)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    return {"file": str(filepath), "changed": bool(issues), "issues": issues}
+
+
+def find_csv_files(paths: Iterable[str | Path]) -> list[Path]:
+    """csv files given directly or found under directories, in sorted order"""
+    files: set[Path] = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.update(path.rglob("*.csv"))
+        elif path.suffix.lower() == ".csv":
+            files.add(path)
+    return sorted(files)
+
+
+def _format_file_check(filepath: Path) -> FileResult:
+    return format_file(filepath, check=True)
+
+
+def format_files(
+    paths: Iterable[str | Path], check: bool = False, workers: int | None = None
+) -> list[FileResult]:
+    """Format every csv file under paths, in parallel unless workers is 1"""
+    files = find_csv_files(paths)
+    worker = _format_file_check if check else format_file
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) < 2:
+        return [worker(filepath) for filepath in files]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        return list(pool.map(worker, files, chunksize=8))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Remove stray whitespace from the csv tables"
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[str(TABLES_DIR)],
+        help="csv files or directories to search, everything under tables/ by default",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report lines which need changing and exit with 1 rather than fixing them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes, one per cpu by default",
+    )
+    args = parser.parse_args(argv)
+
+    results = format_files(args.paths, check=args.check, workers=args.workers)
+    changed = [result for result in results if result["changed"]]
+
+    for result in changed:
+        if args.check:
+            for issue in result["issues"]:
+                print(
+                    f"{issue['file']}:{issue['line']}: {', '.join(issue['problems'])}"
+                )
+        else:
+            print(f"Reformatted {result['file']}")
+
+    verb = "would be reformatted" if args.check else "reformatted"
+    print(f"{len(results)} files checked, {len(changed)} {verb}")
+
+    return 1 if args.check and changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
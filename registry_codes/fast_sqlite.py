@@ -0,0 +1,143 @@
+"""
+Fast builds of the sqlite artifact. The database is written to a temporary
+file next to the output with journaling and syncing switched off and the
+whole build held in one transaction, then tidied up and renamed into place.
+If the build fails the output is left as it was.
+
+Memory builds skip the disk altogether until the end. The database is built
+in an in-memory sqlite database and written out in one pass with the sqlite
+online backup API, which copies it page for page.
+"""
+
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.pool import StaticPool
+
+from registry_codes.instrumentation import record_span
+
+logger = logging.getLogger(__name__)
+
+FAST_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+class _SingleTransactionConnection(sqlite3.Connection):
+    """Ignores the commits and rollbacks sqlalchemy issues as each table is
+    loaded (including the rollback when a pooled connection is returned) so
+    that everything goes into one transaction, committed by finish_build.
+    """
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def finish_build(self) -> None:
+        super().commit()
+
+
+@contextmanager
+def fast_sqlite_build(output_db: str | Path) -> Iterator[Engine]:
+    """Yield an engine to build the database with. An existing output is
+    copied first so that unchanged tables can still be skipped.
+    """
+    output_db = Path(output_db)
+    building = output_db.with_name(f"{output_db.name}.building")
+    building.unlink(missing_ok=True)
+    if output_db.exists():
+        shutil.copyfile(output_db, building)
+
+    connection = sqlite3.connect(building, factory=_SingleTransactionConnection)
+    for pragma in FAST_PRAGMAS:
+        connection.execute(pragma)
+
+    # One connection, so one transaction
+    engine = _static_engine(connection)
+
+    try:
+        yield engine
+    except BaseException:
+        engine.dispose()
+        connection.close()
+        building.unlink(missing_ok=True)
+        raise
+
+    start = time.perf_counter()
+    connection.finish_build()
+    connection.execute("ANALYZE")
+    connection.finish_build()
+    connection.execute("VACUUM")
+    engine.dispose()
+    connection.close()
+
+    # Same directory so this is a rename, readers see the old file or the new
+    os.replace(building, output_db)
+    logger.info(
+        f"Analyzed, vacuumed and moved {output_db} in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def _static_engine(connection: sqlite3.Connection) -> Engine:
+    # Every checkout gets the same connection, and so the same database
+    return create_engine(
+        "sqlite://",
+        creator=lambda: connection,
+        poolclass=StaticPool,
+        pool_reset_on_return=None,
+    )
+
+
+@contextmanager
+def memory_sqlite_build(output_db: str | Path) -> Iterator[Engine]:
+    """Yield an engine for an in-memory database, backed up to output_db once
+    the build finishes. An existing output is read in first so that unchanged
+    tables can still be skipped. Nothing is written if the build fails.
+    """
+    output_db = Path(output_db)
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+
+    if output_db.exists():
+        start = time.perf_counter()
+        existing = sqlite3.connect(output_db)
+        existing.backup(connection)
+        existing.close()
+        record_span(output_db.name, "restore", time.perf_counter() - start, 0)
+
+    engine = _static_engine(connection)
+    try:
+        yield engine
+    except BaseException:
+        engine.dispose()
+        connection.close()
+        raise
+
+    start = time.perf_counter()
+    building = output_db.with_name(f"{output_db.name}.building")
+    building.unlink(missing_ok=True)
+    target = sqlite3.connect(building)
+    try:
+        # Every page in one step, rather than a few at a time
+        connection.backup(target, pages=-1)
+    except BaseException:
+        building.unlink(missing_ok=True)
+        raise
+    finally:
+        target.close()
+        # Closes the connection too
+        engine.dispose()
+
+    # Same directory so this is a rename, readers see the old file or the new
+    os.replace(building, output_db)
+    record_span(output_db.name, "backup", time.perf_counter() - start, 0)
@@ -0,0 +1,325 @@
+"""
+Timed spans for each stage of loading a table (read, clean, coerce, delete,
+insert, commit), so it's possible to tell where build time goes. Each span
+records the rows handled, throughput and the peak resident memory of the
+process when it finished.
+
+The size of each file a build writes can be recorded alongside.
+
+Finished spans are logged through the registry_codes.instrumentation logger
+and kept by the process wide Instrumentation, which the build scripts write
+out as a JSON report next to their output and optionally as a Prometheus
+textfile (for node_exporter's textfile collector).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, TypedDict
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["read", "clean", "coerce", "delete", "insert", "commit", "sync"]
+METRIC_PREFIX = "registry_codes_build"
+
+
+class SpanRecord(TypedDict):
+    table: str
+    stage: str
+    started: str
+    seconds: float
+    rows: int
+    rows_per_second: float
+    # Process high water mark, None where the platform can't say
+    peak_rss_bytes: int | None
+
+
+class StageTotal(TypedDict):
+    stage: str
+    seconds: float
+    rows: int
+
+
+class OutputRecord(TypedDict):
+    path: str
+    bytes: int
+
+
+class BuildReport(TypedDict):
+    created: str
+    seconds: float
+    peak_rss_bytes: int | None
+    stages: list[StageTotal]
+    spans: list[SpanRecord]
+    outputs: list[OutputRecord]
+
+
+def peak_rss_bytes() -> int | None:
+    """Most memory the process has held so far"""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Span:
+    """An open span, rows can be filled in once they're known"""
+
+    def __init__(self, table: str, stage: str, rows: int = 0):
+        self.table = table
+        self.stage = stage
+        self.rows = rows
+
+
+class Instrumentation:
+    """Collects the spans recorded by every thread in the process"""
+
+    def __init__(self):
+        self.spans: list[SpanRecord] = []
+        self.outputs: list[OutputRecord] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def record(self, table: str, stage: str, seconds: float, rows: int) -> SpanRecord:
+        """Record a span timed elsewhere, eg. summed over the chunks of a load"""
+        span: SpanRecord = {
+            "table": table,
+            "stage": stage,
+            "started": datetime.fromtimestamp(time.time() - seconds).isoformat(
+                timespec="milliseconds"
+            ),
+            "seconds": seconds,
+            "rows": rows,
+            "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        with self._lock:
+            self.spans.append(span)
+
+        logger.info(format_span(span))
+        return span
+
+    @contextmanager
+    def span(self, table: str, stage: str, rows: int = 0) -> Iterator[Span]:
+        """Time the block as a span. Nothing is recorded if it raises."""
+        handle = Span(table, stage, rows)
+        start = time.perf_counter()
+        yield handle
+        self.record(table, stage, time.perf_counter() - start, handle.rows)
+
+    def record_output(self, path: str | Path) -> OutputRecord:
+        """Record the size of a file the build wrote"""
+        output: OutputRecord = {"path": str(path), "bytes": Path(path).stat().st_size}
+        with self._lock:
+            self.outputs.append(output)
+
+        logger.info(f"Wrote {path}: {output['bytes'] / 2**20:.1f} MiB")
+        return output
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.outputs.clear()
+            self._started = time.perf_counter()
+
+    def report(self) -> BuildReport:
+        with self._lock:
+            spans = list(self.spans)
+            outputs = list(self.outputs)
+
+        totals: dict[str, StageTotal] = {}
+        for span in spans:
+            total = totals.setdefault(
+                span["stage"], {"stage": span["stage"], "seconds": 0.0, "rows": 0}
+            )
+            total["seconds"] += span["seconds"]
+            total["rows"] += span["rows"]
+
+        return {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "seconds": time.perf_counter() - self._started,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": sorted(totals.values(), key=_stage_order),
+            "spans": spans,
+            "outputs": outputs,
+        }
+
+    def write_json(self, path: str | Path) -> BuildReport:
+        report = self.report()
+        _write_atomic(Path(path), json.dumps(report, indent=2) + "\n")
+        logger.info(f"Wrote build report to {path}")
+        return report
+
+    def write_prometheus(self, path: str | Path) -> None:
+        _write_atomic(Path(path), prometheus_text(self.report()))
+        logger.info(f"Wrote Prometheus metrics to {path}")
+
+
+def _stage_order(total: StageTotal) -> int:
+    stage = total["stage"]
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # The textfile collector may read at any time, so never leave half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.{os.getpid()}.partial")
+    partial.write_text(text, encoding="utf-8")
+    os.replace(partial, path)
+
+
+def format_span(span: SpanRecord) -> str:
+    text = (
+        f"{span['table']} {span['stage']}: {span['rows']} rows in "
+        f"{span['seconds']:.2f}s ({span['rows_per_second']:.0f} rows/s"
+    )
+    if span["peak_rss_bytes"] is not None:
+        text += f", peak RSS {span['peak_rss_bytes'] / 2**20:.0f} MiB"
+    return text + ")"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels.items()]
+    return "{" + ",".join(pairs) + "}"
+
+
+def prometheus_text(report: BuildReport) -> str:
+    """The report in the Prometheus text exposition format. Spans for the same
+    table and stage are summed, as each series may only appear once.
+    """
+    series: dict[tuple[str, str], list[float]] = {}
+    for span in report["spans"]:
+        totals = series.setdefault((span["table"], span["stage"]), [0.0, 0])
+        totals[0] += span["seconds"]
+        totals[1] += span["rows"]
+
+    lines = [
+        f"# HELP {METRIC_PREFIX}_stage_seconds Time spent in each stage of a table's load",
+        f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+    ]
+    lines += [
+        f"{METRIC_PREFIX}_stage_seconds{_labels(table=table, stage=stage)} {seconds:.6f}"
+        for (table, stage), (seconds, _) in series.items()
+    ]
+    lines += [
+        f"# HELP {METRIC_PREFIX}_stage_rows Rows handled in each stage of a table's load",
+        f"# TYPE {METRIC_PREFIX}_stage_rows gauge",
+    ]
+    lines += [
+        f"{METRIC_PREFIX}_stage_rows{_labels(table=table, stage=stage)} {rows:.0f}"
+        for (table, stage), (_, rows) in series.items()
+    ]
+    lines += [
+        f"# HELP {METRIC_PREFIX}_seconds Time since the build started",
+        f"# TYPE {METRIC_PREFIX}_seconds gauge",
+        f"{METRIC_PREFIX}_seconds {report['seconds']:.6f}",
+        f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds When the report was written",
+        f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+        f"{METRIC_PREFIX}_last_run_timestamp_seconds {time.time():.0f}",
+    ]
+    if report["outputs"]:
+        lines += [
+            f"# HELP {METRIC_PREFIX}_output_bytes Size of each file the build wrote",
+            f"# TYPE {METRIC_PREFIX}_output_bytes gauge",
+        ]
+        lines += [
+            f"{METRIC_PREFIX}_output_bytes{_labels(path=output['path'])} {output['bytes']}"
+            for output in report["outputs"]
+        ]
+    if report["peak_rss_bytes"] is not None:
+        lines += [
+            f"# HELP {METRIC_PREFIX}_peak_rss_bytes Most memory held by the build",
+            f"# TYPE {METRIC_PREFIX}_peak_rss_bytes gauge",
+            f"{METRIC_PREFIX}_peak_rss_bytes {report['peak_rss_bytes']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+# Shared by everything in the process, the build scripts write it out
+INSTRUMENTATION = Instrumentation()
+
+
+class StageTimer:
+    """Time spent in each stage summed over a loop, eg. coercing and inserting
+    alternately a chunk at a time. record adds one span per stage.
+    """
+
+    def __init__(self, table: str, instrumentation: Instrumentation | None = None):
+        self.table = table
+        self.instrumentation = instrumentation or INSTRUMENTATION
+        self.seconds: dict[str, float] = {}
+        self.rows: dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, rows: int = 0) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.rows[stage] = self.rows.get(stage, 0) + rows
+
+    @contextmanager
+    def time(self, stage: str, rows: int = 0) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        self.add(stage, time.perf_counter() - start, rows)
+
+    def record(self) -> None:
+        for stage, seconds in self.seconds.items():
+            self.instrumentation.record(self.table, stage, seconds, self.rows[stage])
+
+
+def span(table: str, stage: str, rows: int = 0):
+    """Time a block as a span of the shared instrumentation"""
+    return INSTRUMENTATION.span(table, stage, rows)
+
+
+def record_span(table: str, stage: str, seconds: float, rows: int) -> SpanRecord:
+    """Record a span timed elsewhere with the shared instrumentation"""
+    return INSTRUMENTATION.record(table, stage, seconds, rows)
+
+
+def record_output(path: str | Path) -> OutputRecord:
+    """Record the size of a file written with the shared instrumentation"""
+    return INSTRUMENTATION.record_output(path)
+
+
+def add_report_arguments(parser) -> None:
+    """Options shared by the build scripts for their logging and reports"""
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="DEBUG includes progress for every chunk inserted",
+    )
+    parser.add_argument(
+        "--report",
+        help="JSON report of the time spent on each table, written next to the output by default",
+    )
+    parser.add_argument(
+        "--prometheus",
+        help="Also write the timings to this file for the node_exporter textfile collector",
+    )
+
+
+def write_reports(args, default_report: str | Path) -> None:
+    """Write the shared instrumentation out where the build's options say"""
+    INSTRUMENTATION.write_json(args.report or default_report)
+    if args.prometheus:
+        INSTRUMENTATION.write_prometheus(args.prometheus)
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """Log progress to stdout as plain messages, as the builds always have"""
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stdout)
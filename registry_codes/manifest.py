@@ -0,0 +1,148 @@
+"""
+Each build records a hash of the csv files and model definition behind every
+table it loads. Later builds compare against this so that tables whose inputs
+haven't changed can be skipped.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import TypedDict
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, insert
+from sqlalchemy import inspect, select
+
+from registry_codes.schema import TABLE_MODEL_MAP, index_specs
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_TABLE = "build_manifest"
+
+
+class ManifestEntry(TypedDict):
+    input_hash: str
+    schema_hash: str
+
+
+def manifest_table(schema=None) -> Table:
+    """Manifest lives alongside the tables it describes, it is kept in its own
+    metadata so it never mixes with the ukrdc-sqla models.
+    """
+    return Table(
+        MANIFEST_TABLE,
+        MetaData(),
+        Column("table_name", String(256), primary_key=True),
+        Column("input_hash", String(64), nullable=False),
+        Column("schema_hash", String(64), nullable=False),
+        Column("built_at", DateTime, nullable=False),
+        schema=schema,
+    )
+
+
+def hash_table_inputs(table_name: str, table_dir: Path | None = None) -> str:
+    """Hash the names and contents of the csv files for a table. Files are
+    visited in sorted order so the hash doesn't depend on the filesystem.
+    Tables which depend on others include their hashes, so reloading a table
+    also reloads anything that refers to it.
+
+    table_dir defaults to the table's directory under tables/.
+    """
+    digest = hashlib.sha256()
+
+    table_dir = table_dir or Path("tables") / table_name
+    for filepath in sorted(table_dir.glob("*.csv")):
+        digest.update(filepath.name.encode("utf-8"))
+        digest.update(hashlib.sha256(filepath.read_bytes()).digest())
+
+    for dependency in TABLE_MODEL_MAP[table_name]["dependencies"]:
+        digest.update(hash_table_inputs(dependency).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def schema_fingerprint(table_name: str) -> str:
+    """Hash the model definition and TABLE_MODEL_MAP settings for a table"""
+    table_info = TABLE_MODEL_MAP[table_name]
+    table = table_info["sqla_model"].__table__  # type: ignore[attr-defined]
+
+    definition = {
+        "columns": [
+            [column.name, repr(column.type), column.primary_key, column.nullable]
+            for column in table.columns
+        ],
+        "excluded_columns": table_info["excluded_columns"],
+        "unique_columns": table_info["unique_columns"],
+        "indexes": index_specs(table_name),
+        "dependencies": {
+            dependency: schema_fingerprint(dependency)
+            for dependency in table_info["dependencies"]
+        },
+    }
+
+    return hashlib.sha256(json.dumps(definition).encode("utf-8")).hexdigest()
+
+
+def manifest_entry(table_name: str) -> ManifestEntry:
+    return {
+        "input_hash": hash_table_inputs(table_name),
+        "schema_hash": schema_fingerprint(table_name),
+    }
+
+
+def read_manifest(engine, schema=None) -> dict[str, ManifestEntry]:
+    """Return the manifest recorded by the last build, empty if there wasn't
+    one.
+    """
+    if not inspect(engine).has_table(MANIFEST_TABLE, schema=schema):
+        return {}
+
+    table = manifest_table(schema)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(table.c.table_name, table.c.input_hash, table.c.schema_hash)
+        ).all()
+
+    return {
+        row.table_name: {"input_hash": row.input_hash, "schema_hash": row.schema_hash}
+        for row in rows
+    }
+
+
+def create_manifest_table(engine, schema=None) -> Table:
+    table = manifest_table(schema)
+    table.create(engine, checkfirst=True)
+    return table
+
+
+def record_manifest(engine, table_name: str, entry: ManifestEntry, schema=None):
+    """Store the entry for a table once it has been loaded"""
+    table = create_manifest_table(engine, schema)
+
+    with engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.table_name == table_name))
+        conn.execute(
+            insert(table).values(
+                table_name=table_name, built_at=datetime.now(), **entry
+            )
+        )
+
+
+def tables_to_build(
+    tables: list[str], engine, force: bool = False, schema=None
+) -> dict[str, ManifestEntry]:
+    """Work out which tables need loading. Returns the manifest entry each of
+    them should be recorded with once done, in the order given.
+    """
+    manifest = read_manifest(engine, schema)
+
+    stale = {}
+    for table_name in tables:
+        entry = manifest_entry(table_name)
+        if force or manifest.get(table_name) != entry:
+            stale[table_name] = entry
+        else:
+            logger.info(f"Skipping {table_name}, inputs and schema unchanged")
+
+    return stale
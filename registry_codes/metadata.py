@@ -0,0 +1,115 @@
+"""
+Table metadata for each database the tables are built into. The ukrdc-sqla
+models are shared by everything in the process, so rather than adjusting
+them for a target (swapping column types sqlite can't create, pointing them
+at a postgres schema) every dialect gets its own MetaData holding copies of
+the model tables, one set for each schema they're built in. The models are
+never changed, so sqlite and postgres can be built in the same process.
+
+Loads through the ORM use a class mapped to the copy, with the same
+attribute names as the model.
+"""
+
+import threading
+
+from sqlalchemy import Enum, Index, Integer, MetaData, Table
+from sqlalchemy.dialects.postgresql import ARRAY, BIT
+from sqlalchemy.orm import registry
+from sqlalchemy.sql.elements import quoted_name
+
+from registry_codes.schema import TABLE_MODEL_MAP, index_specs
+
+# Keyed by dialect name
+_METADATA: dict[str, MetaData] = {}
+# Keyed by dialect name and schema
+_REGISTRIES: dict[tuple[str, str | None], registry] = {}
+_MODELS: dict[tuple[str, str | None, str], type] = {}
+_LOCK = threading.Lock()
+
+
+def target_table(table_name: str, engine, schema: str | None = None) -> Table:
+    """The table for table_name as built on engine (or a connection) in schema"""
+    if table_name not in TABLE_MODEL_MAP:
+        raise ValueError(f"Unknown table: {table_name}")
+
+    name = TABLE_MODEL_MAP[table_name]["sqla_model"].__tablename__
+    key = f"{schema}.{name}" if schema else name
+    dialect = engine.dialect.name
+
+    with _LOCK:
+        metadata = _METADATA.setdefault(dialect, MetaData())
+        if key not in metadata.tables:
+            # All of them at once so foreign keys have their tables to refer to
+            for model_table in TABLE_MODEL_MAP:
+                _copy_table(model_table, metadata, dialect, schema)
+        return metadata.tables[key]
+
+
+def _copy_table(
+    table_name: str, metadata: MetaData, dialect: str, schema: str | None
+) -> Table:
+    model_table: Table = TABLE_MODEL_MAP[table_name]["sqla_model"].__table__  # type: ignore[assignment]
+    # Foreign keys between the models follow the table into schema, None being
+    # the metadata's default of no schema
+    table = model_table.to_metadata(metadata, schema=schema)  # type: ignore[arg-type]
+
+    for column in table.columns:
+        # SQLite: replace BIT and ARRAY columns with Integer equivalents
+        if dialect == "sqlite" and isinstance(column.type, (BIT, ARRAY)):
+            column.type = Integer()
+        # Types such as postgres enums would otherwise be created wherever the
+        # search path points, rather than alongside the table. Always quoted,
+        # as extract.gp_type in a column definition reads as EXTRACT
+        elif isinstance(column.type, Enum):
+            column.type.schema = quoted_name(schema, quote=True) if schema else None
+
+    # Constraints are copied from a set, but CREATE TABLE lists them in the
+    # order they were made, so take that from the model to keep the output
+    # the same from one build to the next
+    original_order = {
+        _constraint_key(constraint): constraint._creation_order  # type: ignore[attr-defined]
+        for constraint in model_table.constraints
+    }
+    for constraint in table.constraints:
+        constraint._creation_order = original_order[_constraint_key(constraint)]  # type: ignore[attr-defined]
+
+    existing = {index.name for index in table.indexes}
+    columns = {column.name: column for column in table.columns}
+    for spec in index_specs(table_name):
+        if spec["name"] in existing:
+            continue
+        # Building an Index from table columns adds it to the table
+        Index(
+            spec["name"],
+            *[columns[name] for name in spec["columns"]],
+            unique=spec["unique"],
+        )
+    return table
+
+
+def _constraint_key(constraint) -> tuple:
+    return (
+        type(constraint).__name__,
+        constraint.name,
+        tuple(constraint.columns.keys()),
+    )
+
+
+def target_model(table_name: str, engine, schema: str | None = None) -> type:
+    """A class mapped to target_table, taking the same attribute names as the
+    model, to build rows with through the ORM
+    """
+    table = target_table(table_name, engine, schema)
+    key = (engine.dialect.name, schema, table_name)
+
+    with _LOCK:
+        if key not in _MODELS:
+            model = TABLE_MODEL_MAP[table_name]["sqla_model"]
+            mapper_registry = _REGISTRIES.setdefault(key[:2], registry())
+            properties = {
+                attribute: table.c[column.key]
+                for attribute, column in model.__mapper__.columns.items()
+            }
+            _MODELS[key] = type(model.__name__, (), {})
+            mapper_registry.map_imperatively(_MODELS[key], table, properties=properties)
+        return _MODELS[key]
@@ -0,0 +1,342 @@
+"""
+Turns the NHS ODS GP and practice extracts (egpcur.csv and epraccur.csv,
+downloaded by scripts/download_gp_ods.sh) into the csv file loaded into
+ukrdc_ods_gp_codes. The extracts have no header and 27 columns of which
+only five are kept, so they are read a chunk at a time with just those
+columns and each chunk is appended to the output as it's processed. Memory
+use depends on the chunk size rather than the size of the extracts.
+
+Only a few hundred practices change from week to week, so the previous
+output is kept as a snapshot and the practices added, changed and closed
+since are written to a delta. Where a database still holds exactly that
+snapshot the builds apply the delta rather than reloading the whole table.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TypedDict
+
+import pandas as pd
+from sqlalchemy import delete, inspect
+
+from registry_codes.manifest import (
+    ManifestEntry,
+    hash_table_inputs,
+    read_manifest,
+    record_manifest,
+)
+from registry_codes.metadata import target_model, target_table
+from registry_codes.schema import NA_VALUES, TABLE_MODEL_MAP
+from registry_codes.utils import (
+    _upsert_statement,
+    coerce_dataframe,
+    fill_creation_dates,
+)
+
+logger = logging.getLogger(__name__)
+
+ODS_TABLE = "ukrdc_ods_gp_codes"
+ODS_DIR = Path("tables") / ODS_TABLE
+OUTPUT_FILE = "gp_and_prac_ods.csv"
+
+# Extract file for each value of the type column, in output order
+EXTRACTS = {"GP": "egpcur.csv", "PRACTICE": "epraccur.csv"}
+
+# Positions of the columns kept from the extracts
+# Future Note: columns 4-8 (the address lines) should probably be concatenated
+EXTRACT_COLUMNS = {0: "code", 1: "name", 4: "address1", 9: "postcode", 17: "phone"}
+OUTPUT_COLUMNS = [*EXTRACT_COLUMNS.values(), "type"]
+
+CHUNKSIZE = 50_000
+
+# Kept in a subdirectory so they aren't loaded along with the output
+SNAPSHOT_DIR = "snapshot"
+DELTA_FILE = "delta.csv"
+DELTA_INFO_FILE = "delta.json"
+
+
+class DeltaSummary(TypedDict):
+    added: int
+    changed: int
+    closed: int
+
+
+class DeltaInfo(DeltaSummary):
+    # Input hashes (see registry_codes.manifest) of the table before and
+    # after the delta
+    base_hash: str
+    target_hash: str
+
+
+def column_lengths(table_name: str = ODS_TABLE) -> dict[str, int]:
+    """Lengths of the model's string columns. Keys are left out, cutting them
+    short could merge two codes, better the load fails on them instead.
+    """
+    table_info = TABLE_MODEL_MAP[table_name]
+    table = table_info["sqla_model"].__table__  # type: ignore[attr-defined]
+    lengths = {
+        column.name: getattr(column.type, "length", None) for column in table.columns
+    }
+    return {
+        name: length
+        for name, length in lengths.items()
+        if length and name not in table_info["unique_columns"]
+    }
+
+
+def read_extract(filepath: Path, chunksize: int = CHUNKSIZE):
+    """Chunks of an extract with only the columns kept, all as strings"""
+    return pd.read_csv(
+        filepath,
+        header=None,
+        usecols=list(EXTRACT_COLUMNS),
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize,
+        encoding="utf-8",
+    )
+
+
+def process_chunk(
+    chunk: pd.DataFrame, code_type: str, lengths: dict[str, int]
+) -> pd.DataFrame:
+    chunk = chunk.rename(columns=EXTRACT_COLUMNS)
+    chunk["type"] = code_type
+    for column, length in lengths.items():
+        chunk[column] = chunk[column].str.slice(0, length)
+    return chunk[OUTPUT_COLUMNS]
+
+
+def process_ods(
+    ods_dir: str | Path = ODS_DIR,
+    chunksize: int = CHUNKSIZE,
+    remove_extracts: bool = True,
+) -> int:
+    """Write the output file from the extracts in ods_dir, returning the
+    number of rows written. The output only replaces any previous one once
+    it is complete.
+    """
+    ods_dir = Path(ods_dir)
+    output = ods_dir / OUTPUT_FILE
+    partial = output.with_name(f"{output.name}.partial")
+    snapshot = ods_dir / SNAPSHOT_DIR / OUTPUT_FILE
+    lengths = column_lengths()
+
+    start = time.perf_counter()
+    rows = 0
+    try:
+        with open(partial, "w", encoding="utf-8", newline="") as f:
+            f.write(",".join(OUTPUT_COLUMNS) + "\n")
+            for code_type, filename in EXTRACTS.items():
+                for chunk in read_extract(ods_dir / filename, chunksize):
+                    chunk = process_chunk(chunk, code_type, lengths)
+                    chunk.to_csv(f, header=False, index=False, lineterminator="\n")
+                    rows += len(chunk)
+
+        # Any delta is for the output about to be replaced
+        _remove_delta(ods_dir)
+        if output.exists():
+            snapshot.parent.mkdir(exist_ok=True)
+            shutil.copyfile(output, partial.with_suffix(".snapshot"))
+            os.replace(partial.with_suffix(".snapshot"), snapshot)
+        else:
+            snapshot.unlink(missing_ok=True)
+
+        os.replace(partial, output)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Wrote {rows} rows to {output} in {time.perf_counter() - start:.2f}s")
+
+    if remove_extracts:
+        for filename in EXTRACTS.values():
+            (ods_dir / filename).unlink()
+
+    if snapshot.exists():
+        write_delta(ods_dir)
+
+    return rows
+
+
+def _read_output(filepath: Path) -> pd.DataFrame:
+    """An output file as it was written, keeping the row a load would keep
+    for each code.
+    """
+    df = pd.read_csv(filepath, dtype=str, keep_default_na=False, encoding="utf-8")
+    df = df[df["code"] != ""]
+    return df.drop_duplicates(subset="code", keep="first")
+
+
+def ods_delta(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """Rows added, changed or closed (no longer in the extract) between two
+    outputs, matched on code. The change column says which.
+    """
+    merged = current.merge(
+        previous, on="code", how="outer", suffixes=("", "_previous"), indicator=True
+    )
+    value_columns = [column for column in OUTPUT_COLUMNS if column != "code"]
+
+    differs = pd.Series(False, index=merged.index)
+    for column in value_columns:
+        differs |= merged[column] != merged[f"{column}_previous"]
+
+    added = merged["_merge"] == "left_only"
+    changed = (merged["_merge"] == "both") & differs
+    closed = merged["_merge"] == "right_only"
+
+    # Closed practices are recorded as they were last seen
+    for column in value_columns:
+        merged.loc[closed, column] = merged.loc[closed, f"{column}_previous"]
+
+    merged["change"] = None
+    merged.loc[added, "change"] = "added"
+    merged.loc[changed, "change"] = "changed"
+    merged.loc[closed, "change"] = "closed"
+
+    delta = merged[added | changed | closed]
+    return delta[[*OUTPUT_COLUMNS, "change"]].reset_index(drop=True)
+
+
+def _remove_delta(ods_dir: Path) -> None:
+    for filename in (DELTA_INFO_FILE, DELTA_FILE):
+        (ods_dir / SNAPSHOT_DIR / filename).unlink(missing_ok=True)
+
+
+def write_delta(ods_dir: str | Path = ODS_DIR) -> DeltaInfo:
+    """Write the delta between the snapshot and the current output"""
+    ods_dir = Path(ods_dir)
+    snapshot_dir = ods_dir / SNAPSHOT_DIR
+
+    delta = ods_delta(
+        _read_output(snapshot_dir / OUTPUT_FILE), _read_output(ods_dir / OUTPUT_FILE)
+    )
+    changes = delta["change"].value_counts()
+    info: DeltaInfo = {
+        "added": int(changes.get("added", 0)),
+        "changed": int(changes.get("changed", 0)),
+        "closed": int(changes.get("closed", 0)),
+        "base_hash": hash_table_inputs(ODS_TABLE, snapshot_dir),
+        "target_hash": hash_table_inputs(ODS_TABLE, ods_dir),
+    }
+
+    # The info is written last, without it the delta is never applied
+    _remove_delta(ods_dir)
+    delta.to_csv(snapshot_dir / DELTA_FILE, index=False)
+    with open(snapshot_dir / DELTA_INFO_FILE, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+
+    logger.info(
+        f"ODS delta: {info['added']} added, {info['changed']} changed, "
+        f"{info['closed']} closed"
+    )
+    return info
+
+
+def read_delta(ods_dir: str | Path = ODS_DIR) -> tuple[DeltaInfo, pd.DataFrame] | None:
+    """The last delta written, parsed with the same missing values as a full
+    load, or None if there isn't one.
+    """
+    snapshot_dir = Path(ods_dir) / SNAPSHOT_DIR
+    if not (snapshot_dir / DELTA_INFO_FILE).exists():
+        return None
+
+    with open(snapshot_dir / DELTA_INFO_FILE, encoding="utf-8") as f:
+        info: DeltaInfo = json.load(f)
+
+    delta = pd.read_csv(
+        snapshot_dir / DELTA_FILE,
+        dtype=pd.StringDtype(),
+        na_values=NA_VALUES,
+        encoding="utf-8",
+        index_col=False,
+    )
+    return info, delta
+
+
+def apply_ods_delta(
+    engine, delta: pd.DataFrame, chunksize: int = 1000, schema=None
+) -> DeltaSummary:
+    """Apply a delta to the table in one transaction. Added rows are stamped
+    as a load would stamp them, changed rows get a new update_date.
+    """
+    sqla_model = target_model(ODS_TABLE, engine, schema)
+    table = target_table(ODS_TABLE, engine, schema)
+    value_columns = [column for column in OUTPUT_COLUMNS if column != "code"]
+
+    added = delta[delta["change"] == "added"].drop(columns="change")
+    changed = delta[delta["change"] == "changed"].drop(columns="change")
+    closed = delta.loc[delta["change"] == "closed", "code"].tolist()
+
+    # sqlite has no default for creation_date, so rows are always stamped as
+    # they are by load_data, the upsert leaves it alone on existing rows
+    if engine.dialect.name == "sqlite":
+        added = fill_creation_dates(ODS_TABLE, added)
+        changed = fill_creation_dates(ODS_TABLE, changed)
+    changed = changed.assign(update_date=datetime.now())
+
+    with engine.begin() as conn:
+        for i in range(0, len(closed), chunksize):
+            conn.execute(
+                delete(table).where(table.c.code.in_(closed[i : i + chunksize]))
+            )
+
+        for rows, update_columns in (
+            (added, value_columns),
+            (changed, [*value_columns, "update_date"]),
+        ):
+            if len(rows) == 0:
+                continue
+            statement = _upsert_statement(table, engine, update_columns)
+            records = coerce_dataframe(rows, sqla_model).to_dict("records")
+            for i in range(0, len(records), chunksize):
+                conn.execute(statement, records[i : i + chunksize])
+
+    summary: DeltaSummary = {
+        "added": len(added),
+        "changed": len(changed),
+        "closed": len(closed),
+    }
+    logger.info(
+        f"Applied ODS delta to {ODS_TABLE}: {summary['added']} added, "
+        f"{summary['changed']} changed, {summary['closed']} closed"
+    )
+    return summary
+
+
+def refresh_from_delta(
+    engine,
+    entry: ManifestEntry,
+    ods_dir: str | Path = ODS_DIR,
+    schema=None,
+    chunksize: int = 1000,
+) -> bool:
+    """Bring the table up to date with the delta if the database holds the
+    snapshot it was taken against and the current files are what it leads
+    to, recording the new manifest entry. Returns False, leaving the table
+    alone, if the table needs a full reload instead.
+    """
+    found = read_delta(ods_dir)
+    if found is None:
+        return False
+    info, delta = found
+
+    previous = read_manifest(engine, schema).get(ODS_TABLE)
+    table_name = TABLE_MODEL_MAP[ODS_TABLE]["sqla_model"].__tablename__
+    if (
+        previous is None
+        or previous["schema_hash"] != entry["schema_hash"]
+        or previous["input_hash"] != info["base_hash"]
+        or entry["input_hash"] != info["target_hash"]
+        or not inspect(engine).has_table(table_name, schema=schema)
+    ):
+        return False
+
+    apply_ods_delta(engine, delta, chunksize=chunksize, schema=schema)
+    record_manifest(engine, ODS_TABLE, entry, schema=schema)
+    return True
@@ -0,0 +1,228 @@
+"""
+Parquet copies of the tables for jobs that only read them. Each table is
+written to its own zstd compressed file with column types taken from the
+model, under the same column names as in the databases, so single columns
+can be read without loading the whole table:
+
+    pyarrow.parquet.read_table(path, columns=["code"], memory_map=True)
+
+Tables come from the table catalog, so a build writing the databases as well
+hands over the tables it has already parsed and cleaned. Large tables are
+streamed a chunk at a time. Needs pyarrow, install the arrow extra.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import ARRAY, Boolean, DateTime, Integer, Numeric
+from sqlalchemy.dialects.postgresql import BIT
+
+from registry_codes.catalog import load_table
+from registry_codes.instrumentation import record_output, span
+from registry_codes.schema import LARGE_TABLES, TABLE_MODEL_MAP
+from registry_codes.utils import (
+    AUTO_COLUMNS,
+    STREAM_CHUNKSIZE,
+    CsvEngine,
+    KeyHashSet,
+    read_table_chunks,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION = "zstd"
+
+_TRUE = {"1", "true", "t", "yes", "y"}
+_FALSE = {"0", "false", "f", "no", "n"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa  # type: ignore[import-untyped]
+        import pyarrow.parquet as pq  # type: ignore[import-untyped]
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is needed to write parquet files, install the arrow extra"
+        ) from e
+    return pa, pq
+
+
+def _arrow_type(pa, column_type):
+    match column_type:
+        case Boolean():
+            return pa.bool_()
+        # Single bits are used as flags
+        case BIT() if column_type.length == 1:
+            return pa.bool_()
+        case ARRAY():
+            return pa.list_(pa.string())
+        case DateTime():
+            return pa.timestamp("us")
+        case Integer():
+            return pa.int64()
+        case Numeric():
+            return pa.float64()
+        case _:
+            return pa.string()
+
+
+def arrow_schema(table_name: str, columns: list[str] | None = None):
+    """The table's columns as arrow fields, named as in the databases. Only
+    columns (model attribute names) if given.
+    """
+    pa, _ = _pyarrow()
+    mapper = TABLE_MODEL_MAP[table_name]["sqla_model"].__mapper__
+    keys = columns if columns is not None else list(mapper.columns.keys())
+    return pa.schema(
+        [
+            pa.field(
+                mapper.columns[key].name, _arrow_type(pa, mapper.columns[key].type)
+            )
+            for key in keys
+        ]
+    )
+
+
+def _parse_flag(value):
+    if pd.isna(value):
+        return None
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"Not a boolean: {value!r}")
+
+
+def _parse_list(value):
+    if pd.isna(value) or value == "":
+        return None
+    return json.loads(value)
+
+
+def arrow_table(table_name: str, df: pd.DataFrame):
+    """The typed frame from the catalog as an arrow table"""
+    pa, _ = _pyarrow()
+    schema = arrow_schema(table_name, list(df.columns))
+
+    arrays = []
+    for key, field in zip(df.columns, schema):
+        values = df[key]
+        if field.type == pa.bool_():
+            values = values.map(_parse_flag, na_action="ignore").astype("boolean")
+        elif pa.types.is_list(field.type):
+            values = values.map(_parse_list, na_action="ignore")
+        elif pa.types.is_timestamp(field.type):
+            if not pd.api.types.is_datetime64_dtype(values):
+                # Left as strings by the typed read when they weren't ISO 8601
+                values = pd.to_datetime(values, format="mixed")
+            values = values.dt.as_unit("us")
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_atomic(path: Path, write) -> None:
+    # Readers only ever see a whole file
+    partial = path.with_name(f".{path.name}.{os.getpid()}.partial")
+    try:
+        write(partial)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, path)
+
+
+def export_table(
+    table_name: str,
+    output_dir: str | Path,
+    csv_engine: CsvEngine = "c",
+    read_chunksize: int = STREAM_CHUNKSIZE,
+) -> Path:
+    """Write the table to output_dir/table_name.parquet, returning the path"""
+    _, pq = _pyarrow()
+    path = Path(output_dir) / f"{table_name}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with span(table_name, "parquet") as written:
+        if table_name in LARGE_TABLES:
+            written.rows = _write_streamed(table_name, path, read_chunksize)
+        else:
+            table = arrow_table(
+                table_name,
+                load_table(table_name, typed=True, clean=True, csv_engine=csv_engine),
+            )
+            _write_atomic(
+                path,
+                lambda partial: pq.write_table(table, partial, compression=COMPRESSION),
+            )
+            written.rows = table.num_rows
+
+    record_output(path)
+    return path
+
+
+def _write_streamed(table_name: str, path: Path, read_chunksize: int) -> int:
+    """Clean and write a chunk at a time, as stream_data_to_table loads them"""
+    _, pq = _pyarrow()
+    unique_columns = TABLE_MODEL_MAP[table_name]["unique_columns"]
+    rows = 0
+
+    def write(partial: Path) -> None:
+        nonlocal rows
+        seen = KeyHashSet()
+        writer = None
+        try:
+            for chunk in read_table_chunks(table_name, read_chunksize):
+                if unique_columns:
+                    chunk = chunk.dropna(subset=unique_columns)
+                    chunk = chunk[seen.add_new(chunk[unique_columns])]
+                table = arrow_table(table_name, chunk)
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        partial, table.schema, compression=COMPRESSION
+                    )
+                writer.write_table(table)
+                rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            # No csv files, still leave an empty table behind
+            columns = [
+                key
+                for key in TABLE_MODEL_MAP[table_name][
+                    "sqla_model"
+                ].__mapper__.columns.keys()
+                if key not in AUTO_COLUMNS
+            ]
+            pq.write_table(
+                arrow_schema(table_name, columns).empty_table(),
+                partial,
+                compression=COMPRESSION,
+            )
+
+    _write_atomic(path, write)
+    return rows
+
+
+def export_parquet(
+    output_dir: str | Path,
+    tables: list[str] | None = None,
+    csv_engine: CsvEngine = "c",
+    workers: int = 4,
+) -> list[Path]:
+    """Write every table (or those given) to output_dir, several at a time"""
+    tables = tables if tables is not None else list(TABLE_MODEL_MAP)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        paths = list(
+            pool.map(lambda table: export_table(table, output_dir, csv_engine), tables)
+        )
+
+    logger.info(f"Wrote {len(paths)} parquet files to {output_dir}")
+    return paths
@@ -0,0 +1,163 @@
+"""
+In-memory lookups against code_list, code_exclusion and coding_standards.
+The tables are loaded once, either from the csv files or from a built
+database, then single codes are looked up through dicts and arrays of codes
+through pandas indexes so neither needs a round trip to the database.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from registry_codes.catalog import load_table
+from registry_codes.schema import TABLE_MODEL_MAP
+
+CODE_LIST_COLUMNS = ["coding_standard", "code", "description"]
+CODE_EXCLUSION_COLUMNS = ["system", "coding_standard", "code"]
+CODING_STANDARDS_COLUMNS = ["coding_standard", "description"]
+
+
+def _unique_rows(table_name: str, df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Keep the columns needed for lookups and drop rows the database would
+    have rejected, as clean_data does when loading.
+    """
+    unique_columns = TABLE_MODEL_MAP[table_name]["unique_columns"]
+    df = df.dropna(subset=unique_columns)
+    df = df.drop_duplicates(subset=unique_columns, keep="first")
+    return df[columns].astype(object).where(df[columns].notna(), None)
+
+
+def _as_array(values, length: int) -> np.ndarray:
+    """Broadcast a single value so it can be paired with an array of codes"""
+    if isinstance(values, str) or values is None:
+        return np.full(length, values, dtype=object)
+    return np.asarray(values, dtype=object)
+
+
+class CodeRegistry:
+    """Lookups for codes and coding standards.
+
+    describe, exists and is_excluded take a single code and are constant
+    time. The *_many versions take arrays of codes (the coding standard and
+    system can be a single value shared by all of them) and return numpy
+    arrays in the same order.
+    """
+
+    def __init__(
+        self,
+        code_list: pd.DataFrame,
+        code_exclusion: pd.DataFrame,
+        coding_standards: pd.DataFrame,
+    ):
+        code_list = _unique_rows("code_list", code_list, CODE_LIST_COLUMNS)
+        code_exclusion = code_exclusion[CODE_EXCLUSION_COLUMNS].drop_duplicates()
+        coding_standards = _unique_rows(
+            "coding_standards", coding_standards, CODING_STANDARDS_COLUMNS
+        )
+
+        self._code_index = pd.MultiIndex.from_frame(
+            code_list[["coding_standard", "code"]]
+        )
+        # Trailing None is picked up by the -1 get_indexer gives for misses
+        self._descriptions = np.append(
+            code_list["description"].to_numpy(dtype=object), [None]
+        )
+        self._exclusion_index = pd.MultiIndex.from_frame(code_exclusion)
+
+        self._code_positions = {
+            key: position for position, key in enumerate(self._code_index)
+        }
+        self._exclusions = set(self._exclusion_index)
+        self._standards = dict(
+            zip(coding_standards["coding_standard"], coding_standards["description"])
+        )
+        self._codes_by_standard = {
+            standard: tuple(sorted(codes))
+            for standard, codes in code_list.groupby("coding_standard", sort=True)[
+                "code"
+            ]
+        }
+
+    @classmethod
+    def from_csv(cls) -> "CodeRegistry":
+        """Load from the csv files under tables/"""
+        return cls(
+            load_table("code_list", typed=True),
+            load_table("code_exclusion", typed=True),
+            load_table("coding_standards", typed=True),
+        )
+
+    @classmethod
+    def from_database(cls, engine, schema: str | None = None) -> "CodeRegistry":
+        """Load from a database built by the scripts, sqlite or postgres"""
+        prefix = f'"{schema}".' if schema else ""
+
+        def read(table_name, columns):
+            table = TABLE_MODEL_MAP[table_name]["sqla_model"].__tablename__
+            query = f"SELECT {', '.join(columns)} FROM {prefix}{table}"  # nosec B608
+            with engine.connect() as conn:
+                return pd.read_sql_query(query, conn)
+
+        return cls(
+            read("code_list", CODE_LIST_COLUMNS),
+            read("code_exclusion", CODE_EXCLUSION_COLUMNS),
+            read("coding_standards", CODING_STANDARDS_COLUMNS),
+        )
+
+    @classmethod
+    def from_sqlite(cls, path: str | Path) -> "CodeRegistry":
+        """Load from a registry_codes.sqlite release artifact"""
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            return cls.from_database(engine)
+        finally:
+            engine.dispose()
+
+    def describe(self, coding_standard: str, code: str) -> str | None:
+        """Description of a code, None if it isn't in the code list"""
+        position = self._code_positions.get((coding_standard, code))
+        if position is None:
+            return None
+        return self._descriptions[position]
+
+    def exists(self, coding_standard: str, code: str) -> bool:
+        return (coding_standard, code) in self._code_positions
+
+    def is_excluded(self, system: str, coding_standard: str, code: str) -> bool:
+        """Whether a system has opted out of receiving a code"""
+        return (system, coding_standard, code) in self._exclusions
+
+    def coding_standards(self) -> dict[str, str | None]:
+        """Every coding standard mapped to its description"""
+        return dict(self._standards)
+
+    def codes(self, coding_standard: str) -> tuple[str, ...]:
+        """Codes in a coding standard, sorted"""
+        return self._codes_by_standard.get(coding_standard, ())
+
+    def _code_positions_many(self, coding_standards, codes) -> np.ndarray:
+        codes = np.asarray(codes, dtype=object)
+        lookup = pd.MultiIndex.from_arrays(
+            [_as_array(coding_standards, len(codes)), codes]
+        )
+        return self._code_index.get_indexer(lookup)
+
+    def describe_many(self, coding_standards, codes) -> np.ndarray:
+        """Descriptions for an array of codes, None where a code is unknown"""
+        return self._descriptions[self._code_positions_many(coding_standards, codes)]
+
+    def exists_many(self, coding_standards, codes) -> np.ndarray:
+        return self._code_positions_many(coding_standards, codes) != -1
+
+    def is_excluded_many(self, systems, coding_standards, codes) -> np.ndarray:
+        codes = np.asarray(codes, dtype=object)
+        lookup = pd.MultiIndex.from_arrays(
+            [
+                _as_array(systems, len(codes)),
+                _as_array(coding_standards, len(codes)),
+                codes,
+            ]
+        )
+        return self._exclusion_index.get_indexer(lookup) != -1
@@ -0,0 +1,95 @@
+"""
+Runs per-table work in parallel while respecting the dependencies declared in
+TABLE_MODEL_MAP. A table is started as soon as everything it depends on has
+finished, independent tables run side by side.
+"""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Mapping
+
+from registry_codes.schema import TABLE_MODEL_MAP, TableInfo
+
+logger = logging.getLogger(__name__)
+
+
+def dependency_graph(
+    tables: list[str], tables_dict: Mapping[str, TableInfo] = TABLE_MODEL_MAP
+) -> dict[str, set[str]]:
+    """Map each table to the tables it has to wait for. Dependencies which
+    aren't in the list (eg. skipped because they're unchanged) are already in
+    place so are left out.
+    """
+    return {
+        table: {dep for dep in tables_dict[table]["dependencies"] if dep in tables}
+        for table in tables
+    }
+
+
+def check_for_cycles(graph: dict[str, set[str]]) -> None:
+    """Raise a ValueError naming the tables involved if the dependencies loop
+    back on themselves.
+    """
+    visited: set[str] = set()
+    path: list[str] = []
+
+    def visit(table):
+        if table in path:
+            cycle = path[path.index(table) :] + [table]
+            raise ValueError(
+                f"Circular dependency between tables: {' -> '.join(cycle)}"
+            )
+        if table in visited:
+            return
+
+        path.append(table)
+        for dependency in sorted(graph.get(table, ())):
+            visit(dependency)
+        path.pop()
+        visited.add(table)
+
+    for table in graph:
+        visit(table)
+
+
+def run_in_dependency_order(
+    tables: list[str],
+    load_table: Callable[[str], object],
+    workers: int = 1,
+    tables_dict: Mapping[str, TableInfo] = TABLE_MODEL_MAP,
+) -> None:
+    """Call load_table for every table using a pool of worker threads. If a
+    table fails nothing that depends on it is started, tables already running
+    are allowed to finish and then the first error is raised.
+    """
+    graph = dependency_graph(tables, tables_dict)
+    check_for_cycles(graph)
+
+    waiting = dict(graph)
+    finished: set[str] = set()
+    running: dict[Future, str] = {}
+    error: BaseException | None = None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while waiting or running:
+            if error is None:
+                for table in [t for t in tables if t in waiting]:
+                    if waiting[table] <= finished:
+                        del waiting[table]
+                        running[executor.submit(load_table, table)] = table
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                exception = future.exception()
+                if exception is None:
+                    finished.add(table)
+                else:
+                    logger.error(f"Error loading {table}: {exception}")
+                    error = error or exception
+
+    if error is not None:
+        raise error
@@ -10,8 +10,8 @@ from ukrdc_sqla.ukrdc import (
     Base,
     CodingStandards,
 )
-from typing import TypedDict
-from sqlalchemy import String, Integer, Boolean, DateTime, Numeric
+from typing import Any, TypedDict
+from sqlalchemy import String, Integer, Boolean, DateTime, Numeric, Table
 from sqlalchemy.dialects.postgresql import ARRAY, BIT
 import pandas as pd
 
@@ -48,13 +48,13 @@ TABLE_MODEL_MAP: dict[str, TableInfo] = {
         "sqla_model": CodeExclusion,
         "excluded_columns": [],
         "unique_columns": ["code", "coding_standard"],
-        "dependencies": [],
+        "dependencies": ["coding_standards"],
     },
     "code_list": {
         "sqla_model": Code,
         "excluded_columns": ["creation_date", "update_date"],
         "unique_columns": ["code", "coding_standard"],
-        "dependencies": [],
+        "dependencies": ["coding_standards"],
     },
     "code_map": {
         "sqla_model": CodeMap,
@@ -65,7 +65,7 @@ TABLE_MODEL_MAP: dict[str, TableInfo] = {
             "destination_coding_standard",
             "destination_code",
         ],
-        "dependencies": [],
+        "dependencies": ["coding_standards"],
     },
     # "facility": {
     # },
@@ -73,7 +73,7 @@ TABLE_MODEL_MAP: dict[str, TableInfo] = {
         "sqla_model": Facility,
         "excluded_columns": ["creation_date", "update_date"],
         "unique_columns": ["facilitycode", "facilitycodestd"],
-        "dependencies": ["code_list"],
+        "dependencies": ["coding_standards", "code_list"],
     },
     "modality_codes": {
         "sqla_model": ModalityCodes,
@@ -102,3 +102,89 @@ TABLE_MODEL_MAP: dict[str, TableInfo] = {
 }
 
 LARGE_TABLES = ["ukrdc_ods_gp_codes"]
+
+# Indexes for the ways the built databases are commonly queried, on top of
+# the primary keys and unique_columns. Lookups from a source code in code_map
+# are already served by its primary key, which starts with those columns.
+ACCESS_PATH_INDEXES: dict[str, list[list[str]]] = {
+    "code_map": [["destination_coding_standard", "destination_code"]],
+}
+
+
+class IndexSpec(TypedDict):
+    name: str
+    columns: list[str]
+    unique: bool
+
+
+def index_specs(table_name: str) -> list[IndexSpec]:
+    """Secondary indexes for a table: a unique index on its unique_columns and
+    any ACCESS_PATH_INDEXES. Indexes the primary key already covers are left
+    out, as is anything repeated.
+    """
+    table_info = TABLE_MODEL_MAP[table_name]
+    mapper = table_info["sqla_model"].__mapper__
+    table: Table = mapper.local_table  # type: ignore[assignment]
+    primary_key = [column.name for column in table.primary_key.columns]
+
+    # unique_columns are attribute names, indexes need column names
+    unique = [mapper.columns[key].name for key in table_info["unique_columns"]]
+    candidates = [(unique, True)] + [
+        (columns, False) for columns in ACCESS_PATH_INDEXES.get(table_name, [])
+    ]
+
+    specs: list[IndexSpec] = []
+    for columns, is_unique in candidates:
+        if not columns or set(columns) == set(primary_key):
+            continue
+        if columns == primary_key[: len(columns)]:
+            continue
+        if any(spec["columns"] == columns for spec in specs):
+            continue
+
+        prefix = "uq" if is_unique else "ix"
+        specs.append(
+            {
+                "name": f"{prefix}_{table.name}_{'_'.join(columns)}",
+                "columns": columns,
+                "unique": is_unique,
+            }
+        )
+
+    return specs
+
+
+# Values in the csv dumps which mean missing, on top of the pandas defaults
+NA_VALUES = ["NULL"]
+
+
+class ReadOptions(TypedDict):
+    dtype: dict[str, Any]
+    parse_dates: list[str]
+
+
+def csv_read_options(sqla_model: type[Base]) -> ReadOptions:
+    """Derive the pandas dtype for each model column, keyed on attribute name
+    as that's what the csv headers use, and which columns hold dates.
+    """
+    dtype: dict[str, Any] = {}
+    parse_dates: list[str] = []
+
+    for key, column in sqla_model.__mapper__.columns.items():
+        dtype[key] = pd.StringDtype()
+        for sqla_type, pandas_dtype in SQLA_TO_PANDAS_DTYPE.items():
+            if isinstance(column.type, sqla_type):
+                dtype[key] = pandas_dtype
+                break
+
+        if isinstance(column.type, DateTime):
+            parse_dates.append(key)
+
+    return {"dtype": dtype, "parse_dates": parse_dates}
+
+
+# Worked out on import, before create_table has a chance to swap column types
+TABLE_READ_OPTIONS: dict[str, ReadOptions] = {
+    table_name: csv_read_options(table_info["sqla_model"])
+    for table_name, table_info in TABLE_MODEL_MAP.items()
+}
@@ -0,0 +1,126 @@
+"""
+Zero-downtime postgres rebuilds. Every table is loaded into a staging
+schema while readers carry on using extract, the row counts are checked
+against the csv files, then the schemas are swapped with two renames in one
+short transaction. The schema replaced is kept as extract_previous so the
+swap can be rolled back just as quickly.
+"""
+
+import logging
+from typing import TypedDict
+
+from sqlalchemy import inspect, text
+
+from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.utils import KeyHashSet, STREAM_CHUNKSIZE, read_table_chunks
+
+logger = logging.getLogger(__name__)
+
+LIVE_SCHEMA = "extract"
+STAGING_SCHEMA = "extract_staging"
+PREVIOUS_SCHEMA = "extract_previous"
+
+# Readers hold locks on the schema for as long as their queries run, rather
+# than queue everything behind the swap it gives up and can be retried
+LOCK_TIMEOUT = "5s"
+
+
+class RowCountCheck(TypedDict):
+    table: str
+    expected: int
+    loaded: int
+
+
+def create_schema(engine, schema: str) -> None:
+    """Create an empty schema, replacing anything left from a failed build"""
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{schema}" AUTHORIZATION postgres'))
+        conn.execute(text(f'GRANT ALL ON SCHEMA "{schema}" TO postgres'))
+    logger.info(f"Created schema {schema}")
+
+
+def expected_row_count(table_name: str, read_chunksize: int = STREAM_CHUNKSIZE) -> int:
+    """Rows a load of the table should leave behind, counted straight from the
+    csv files a chunk at a time with the same cleaning as the load.
+    """
+    unique_columns = TABLE_MODEL_MAP[table_name]["unique_columns"]
+    seen = KeyHashSet()
+    rows = 0
+    for chunk in read_table_chunks(table_name, read_chunksize):
+        if unique_columns:
+            chunk = chunk.dropna(subset=unique_columns)
+            rows += int(seen.add_new(chunk[unique_columns]).sum())
+        else:
+            rows += len(chunk)
+    return rows
+
+
+def check_row_counts(engine, tables: list[str], schema: str) -> list[RowCountCheck]:
+    """Compare the rows loaded into each table in schema with the csv files"""
+    checks: list[RowCountCheck] = []
+    with engine.connect() as conn:
+        for table_name in tables:
+            name = TABLE_MODEL_MAP[table_name]["sqla_model"].__tablename__
+            loaded = conn.execute(
+                text(f'SELECT COUNT(*) FROM "{schema}"."{name}"')
+            ).scalar_one()
+            checks.append(
+                {
+                    "table": table_name,
+                    "expected": expected_row_count(table_name),
+                    "loaded": loaded,
+                }
+            )
+    return checks
+
+
+def _schemas(conn) -> set[str]:
+    return set(inspect(conn).get_schema_names())
+
+
+def swap_schemas(engine, keep_previous: bool = True) -> None:
+    """Swap the staging schema in for extract, keeping what was there as
+    extract_previous. Everything slow happens before the swap, which is only
+    two renames.
+    """
+    with engine.begin() as conn:
+        if STAGING_SCHEMA not in _schemas(conn):
+            raise RuntimeError(f"No {STAGING_SCHEMA} schema to swap in")
+        # Dropping the last previous schema can take a while, so it's done
+        # before taking any locks readers would notice
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{PREVIOUS_SCHEMA}" CASCADE'))
+
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        if LIVE_SCHEMA in _schemas(conn):
+            conn.execute(
+                text(f'ALTER SCHEMA "{LIVE_SCHEMA}" RENAME TO "{PREVIOUS_SCHEMA}"')
+            )
+        conn.execute(text(f'ALTER SCHEMA "{STAGING_SCHEMA}" RENAME TO "{LIVE_SCHEMA}"'))
+    logger.info(f"Swapped {STAGING_SCHEMA} in for {LIVE_SCHEMA}")
+
+    if not keep_previous:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{PREVIOUS_SCHEMA}" CASCADE'))
+
+
+def rollback(engine) -> None:
+    """Put extract_previous back as extract. The schema rolled back from is
+    kept as extract_staging until the next build.
+    """
+    with engine.begin() as conn:
+        if PREVIOUS_SCHEMA not in _schemas(conn):
+            raise RuntimeError(f"No {PREVIOUS_SCHEMA} schema to roll back to")
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{STAGING_SCHEMA}" CASCADE'))
+
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        if LIVE_SCHEMA in _schemas(conn):
+            conn.execute(
+                text(f'ALTER SCHEMA "{LIVE_SCHEMA}" RENAME TO "{STAGING_SCHEMA}"')
+            )
+        conn.execute(
+            text(f'ALTER SCHEMA "{PREVIOUS_SCHEMA}" RENAME TO "{LIVE_SCHEMA}"')
+        )
+    logger.info(f"Rolled {LIVE_SCHEMA} back to the previous build")
@@ -0,0 +1,228 @@
+"""
+Translates whole columns of codes from one coding standard to another using
+code_map. Maps are turned into a pandas index per pair of standards the first
+time they're needed, after that a column is translated with a handful of
+array operations whatever its length.
+"""
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal, TypedDict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+
+from registry_codes.catalog import load_table
+from registry_codes.closure import code_map_closure
+from registry_codes.schema import TABLE_MODEL_MAP
+
+logger = logging.getLogger(__name__)
+
+# What to do when a code maps to more than one code in the destination
+# standard: raise, take the first (shortest path then lowest code) or return
+# every match, repeating the row
+MultiplePolicy = Literal["raise", "first", "all"]
+
+
+class Lookup(TypedDict):
+    sources: pd.Index
+    starts: np.ndarray
+    counts: np.ndarray
+    destinations: np.ndarray
+
+
+class Translation(TypedDict):
+    values: pd.Series | pd.DataFrame
+    # Number of times each code which couldn't be translated appeared
+    unmapped: pd.Series
+
+
+class CodeMapTranslator:
+    """Translations between coding standards, built from code_map. By default
+    only direct maps are used, max_path_length allows following chains such as
+    PV_RAW -> PV -> LOINC (see registry_codes.closure).
+    """
+
+    def __init__(self, code_map: pd.DataFrame):
+        self._pairs = code_map_closure(code_map)["pairs"]
+        self._lookups: dict[tuple, Lookup] = {}
+
+    @classmethod
+    def from_csv(cls) -> "CodeMapTranslator":
+        return cls(load_table("code_map", typed=True))
+
+    @classmethod
+    def from_database(cls, engine) -> "CodeMapTranslator":
+        code_map = TABLE_MODEL_MAP["code_map"]["sqla_model"].__table__  # type: ignore[attr-defined]
+        with engine.connect() as conn:
+            return cls(pd.read_sql_query(select(code_map), conn))
+
+    @classmethod
+    def from_sqlite(cls, path: str | Path) -> "CodeMapTranslator":
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            return cls.from_database(engine)
+        finally:
+            engine.dispose()
+
+    def lookup(
+        self, source_standard: str, destination_standard: str, max_path_length: int = 1
+    ) -> Lookup:
+        """Index of source codes with, for each one, where its destination codes
+        start in the destinations array and how many there are. Built once per
+        pair of standards.
+        """
+        key = (source_standard, destination_standard, max_path_length)
+        if key not in self._lookups:
+            pairs = self._pairs[
+                (self._pairs["source_coding_standard"] == source_standard)
+                & (self._pairs["destination_coding_standard"] == destination_standard)
+                & (self._pairs["path_length"] <= max_path_length)
+            ].sort_values(["source_code", "path_length", "destination_code"])
+
+            sources, starts, counts = np.unique(
+                pairs["source_code"].to_numpy(dtype=object),
+                return_index=True,
+                return_counts=True,
+            )
+            self._lookups[key] = {
+                "sources": pd.Index(sources, dtype=object),
+                "starts": starts,
+                "counts": counts,
+                "destinations": pairs["destination_code"].to_numpy(dtype=object),
+            }
+
+        return self._lookups[key]
+
+    def _translate_series(
+        self,
+        values: pd.Series,
+        source_standard: str,
+        destination_standard: str,
+        multiple: MultiplePolicy,
+        max_path_length: int,
+    ) -> tuple[pd.Series, pd.Series]:
+        lookup = self.lookup(source_standard, destination_standard, max_path_length)
+
+        # Codes repeat a lot in real columns, so only distinct values are
+        # looked up and the positions broadcast back over the rows
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        unique_positions = lookup["sources"].get_indexer(uniques)
+        positions = np.where(codes == -1, -1, unique_positions[codes])
+
+        occurrences = np.bincount(codes[codes != -1], minlength=len(uniques))
+        missing = unique_positions == -1
+        unmapped = pd.Series(
+            occurrences[missing], index=pd.Index(uniques[missing], name="code")
+        )
+
+        matched = positions != -1
+        matches = np.zeros(len(values), dtype=int)
+        matches[matched] = lookup["counts"][positions[matched]]
+
+        if multiple == "raise" and (matches > 1).any():
+            ambiguous = pd.unique(values[matches > 1])
+            raise ValueError(
+                f"{len(ambiguous)} {source_standard} codes map to more than one "
+                f"{destination_standard} code, eg. {list(ambiguous[:5])}. Use "
+                f"multiple='first' or multiple='all'"
+            )
+
+        if multiple == "all":
+            # Each row is repeated once per match (once if it has none), then
+            # stepped through its run of destinations
+            repeats = np.maximum(matches, 1)
+            rows = np.repeat(np.arange(len(values)), repeats)
+            offsets = np.arange(len(rows)) - np.repeat(
+                np.cumsum(repeats) - repeats, repeats
+            )
+        else:
+            rows = np.arange(len(values))
+            offsets = np.zeros(len(values), dtype=int)
+
+        row_positions = positions[rows]
+        # Padded so the -1 positions can be indexed, np.where then drops them
+        starts = np.append(lookup["starts"], 0)
+        destination_index = np.where(
+            row_positions == -1, -1, starts[row_positions] + offsets
+        )
+        # Trailing None is picked up by the -1 for codes with no map
+        result = np.append(lookup["destinations"], [None])[destination_index]
+
+        translated = pd.Series(result, index=values.index[rows], name=values.name)
+        return translated, unmapped
+
+    def translate(
+        self,
+        values: pd.Series | pd.DataFrame,
+        source_standard: str,
+        destination_standard: str,
+        multiple: MultiplePolicy = "raise",
+        max_path_length: int = 1,
+    ) -> Translation:
+        """Translate a series, or every column of a dataframe, of source codes.
+        Missing values stay missing, codes with no map become None and are
+        counted in unmapped (per column for a dataframe).
+        """
+        if isinstance(values, pd.Series):
+            translated, unmapped = self._translate_series(
+                values, source_standard, destination_standard, multiple, max_path_length
+            )
+            report_unmapped(unmapped, source_standard, destination_standard)
+            return {"values": translated, "unmapped": unmapped}
+
+        if multiple == "all":
+            raise ValueError("multiple='all' can only be used with a series")
+
+        columns = {}
+        unmapped_columns = {}
+        for column in values.columns:
+            columns[column], unmapped_columns[column] = self._translate_series(
+                values[column],
+                source_standard,
+                destination_standard,
+                multiple,
+                max_path_length,
+            )
+
+        unmapped_by_column = pd.concat(unmapped_columns, names=["column", "code"])
+        report_unmapped(unmapped_by_column, source_standard, destination_standard)
+        return {
+            "values": pd.DataFrame(columns, index=values.index),
+            "unmapped": unmapped_by_column,
+        }
+
+
+def report_unmapped(
+    unmapped: pd.Series, source_standard: str, destination_standard: str
+) -> None:
+    if len(unmapped) > 0:
+        codes = unmapped.index.get_level_values("code").unique()
+        examples = [str(code) for code in codes[:5]]
+        logger.warning(
+            f"{int(unmapped.sum())} values ({len(codes)} distinct) could not be "
+            f"mapped from {source_standard} to {destination_standard}, eg. {examples}"
+        )
+
+
+@lru_cache(maxsize=1)
+def default_translator() -> CodeMapTranslator:
+    """Translator over the csv files, loaded on first use"""
+    return CodeMapTranslator.from_csv()
+
+
+def translate(
+    values: pd.Series | pd.DataFrame,
+    source_standard: str,
+    destination_standard: str,
+    multiple: MultiplePolicy = "raise",
+    max_path_length: int = 1,
+) -> Translation:
+    """Translate codes using the maps under tables/code_map. See
+    CodeMapTranslator.translate.
+    """
+    return default_translator().translate(
+        values, source_standard, destination_standard, multiple, max_path_length
+    )
@@ -1,17 +1,37 @@
 import os
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterator, Literal, TypedDict
 
 from sqlalchemy.exc import SQLAlchemyError
+import numpy as np
 import pandas as pd
-from sqlalchemy import inspect
+import psycopg
+from psycopg import sql
+from sqlalchemy import Table, and_, bindparam, delete, inspect, insert, select
 from pathlib import Path
-from sqlalchemy import Integer, Boolean, DateTime, Numeric
+from sqlalchemy import Boolean, DateTime, Numeric
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import BIT, ARRAY
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import SchemaType
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import ARRAY
 from ukrdc_sqla.ukrdc import Base
 
-from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.instrumentation import StageTimer, span
+from registry_codes.metadata import target_model, target_table
+from registry_codes.schema import (
+    NA_VALUES,
+    TABLE_MODEL_MAP,
+    TABLE_READ_OPTIONS,
+    ReadOptions,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def coerce_sqla_types(data_row: dict, sqla_model: type[Base]) -> dict:
@@ -52,46 +72,168 @@ def coerce_sqla_types(data_row: dict, sqla_model: type[Base]) -> dict:
     return coerced_data
 
 
-def create_table(table_name: str, engine, schema=None) -> None:
-    """Build tables from sqla models"""
-    if table_name not in TABLE_MODEL_MAP:
-        raise ValueError(f"Unknown table: {table_name}")
+def _coerce_boolean(value):
+    return bool(value)
 
-    model = TABLE_MODEL_MAP[table_name]["sqla_model"]
-    inspector = inspect(engine)
 
-    # SQLite: replace BIT columns with Integer equivalents
-    if engine.dialect.name == "sqlite":
-        for column in model.__table__.columns:
-            if isinstance(column.type, BIT) or isinstance(column.type, ARRAY):
-                # Replace column type in-place for SQLite
-                column.type = Integer()
+def _coerce_array(value):
+    return json.loads(value) if value else None
+
+
+def _coerce_datetime(value):
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, str):
+        return pd.to_datetime(value).to_pydatetime()
+    return value
+
+
+def _coerce_numeric(value):
+    # Typed reads hand over floats already, where 0.0 mustn't be taken as empty
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value and value != "NULL":
+        return float(value)
+    return None
+
+
+def build_coercion_plan(sqla_model: type[Base]) -> dict[str, Callable | None]:
+    """Work out once per model how each column needs converting. Columns which
+    are passed through unchanged (apart from null handling) map to None.
+    """
+    plan: dict[str, Callable | None] = {}
+
+    for key, column in sqla_model.__mapper__.columns.items():
+        match column.type:
+            case Boolean():
+                plan[key] = _coerce_boolean
+            case ARRAY():
+                plan[key] = _coerce_array
+            case DateTime():
+                plan[key] = _coerce_datetime
+            case Numeric():
+                plan[key] = _coerce_numeric
+            case _:
+                plan[key] = None
+
+    return plan
 
-        TABLE_MODEL_MAP[table_name]["sqla_model"] = model
 
-    # Schema should already be set by caller, but set it if not
-    if schema and not model.__table__.schema:
-        model.__table__.schema = schema
+def _coerce_column(values: pd.Series, converter: Callable | None):
+    """Convert a whole column in one go. The column is factorized so that each
+    distinct value is only converted once, then the results are broadcast back
+    over the rows. Missing values and empty strings become None before the
+    converter sees them, mirroring coerce_sqla_types.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+
+    # tolist gives python scalars rather than numpy ones for typed columns
+    converted = []
+    for value in uniques.tolist():
+        if isinstance(value, str) and value == "":
+            value = None
+        converted.append(converter(value) if converter else value)
+
+    # Trailing slot catches the -1 sentinel factorize uses for missing values
+    converted.append(converter(None) if converter else None)
+
+    lookup = pd.Series(converted, dtype=object).to_numpy()
+    return lookup[codes]
+
+
+def coerce_dataframe(
+    df: pd.DataFrame, sqla_model: type[Base], plan: dict | None = None
+) -> pd.DataFrame:
+    """Column-wise equivalent of coerce_sqla_types. Returns an object dtype
+    dataframe holding python values ready to be handed to sqla.
+    """
+    if plan is None:
+        plan = build_coercion_plan(sqla_model)
+
+    coerced = {}
+    for key in df.columns:
+        if key not in plan:
+            # Same failure as looking the column up on the mapper
+            raise KeyError(key)
+        coerced[key] = _coerce_column(df[key], plan[key])
 
-    if not inspector.has_table(table_name, schema=schema):
-        model.__table__.create(engine)  # type: ignore[attr-defined]
-        print(
+    return pd.DataFrame(coerced, index=df.index, columns=df.columns, dtype=object)
+
+
+def create_table(table_name: str, engine, schema=None, indexes: bool = True) -> None:
+    """Build tables from sqla models. Secondary indexes can be left out, to be
+    added by create_indexes once the data is loaded.
+    """
+    table = target_table(table_name, engine, schema)
+    inspector = inspect(engine)
+
+    if not inspector.has_table(table.name, schema=schema):
+        if indexes:
+            table.create(engine)
+        else:
+            # CreateTable on its own doesn't make types such as postgres enums
+            with engine.begin() as conn:
+                for column in table.columns:
+                    if isinstance(column.type, SchemaType):
+                        column.type.create(conn, checkfirst=True)
+                conn.execute(CreateTable(table))
+        logger.info(
             f"Created table: {schema}.{table_name}"
             if schema
             else f"Created table: {table_name}"
         )
     else:
-        print(
+        logger.info(
             f"Table already exists: {schema}.{table_name}"
             if schema
             else f"Table already exists: {table_name}"
         )
 
 
-def load_data_to_df(table_name: str) -> pd.DataFrame:
+def create_indexes(table_name: str, engine, schema=None) -> None:
+    """Create the secondary indexes for a table made with indexes=False"""
+    for index in target_table(table_name, engine, schema).indexes:
+        index.create(engine, checkfirst=True)
+        logger.info(f"Created index: {index.name}")
+
+
+def drop_table(table_name: str, engine, schema=None) -> None:
+    """Drop a table if it exists so it can be rebuilt from scratch"""
+    target_table(table_name, engine, schema).drop(engine, checkfirst=True)
+    logger.info(f"Dropped table: {table_name}")
+
+
+CsvEngine = Literal["c", "python", "pyarrow"]
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """Parse a whole column of dates in one go. Anything which isn't ISO 8601
+    is left as strings for coerce_dataframe to deal with value by value.
+    """
+    try:
+        return pd.to_datetime(values, format="ISO8601")
+    except (ValueError, TypeError):
+        return values
+
+
+def load_data_to_df(
+    table_name: str,
+    typed: bool = False,
+    csv_engine: CsvEngine = "c",
+    workers: int = 4,
+) -> pd.DataFrame:
     """Data is defined using csv folders named after the table names on the
     database. This function loads all of the csv files for a given table into a
     dataframe for further processing.
+
+    By default every column is read as a string. With typed set the dtypes,
+    missing values and date columns are taken from the table's model instead,
+    so the parser hands back nullable typed columns. csv_engine can be set to
+    "pyarrow" where pyarrow is installed.
+
+    Files are read on a pool of worker threads and always concatenated in
+    filename order, so clean_data keeps the same row out of any duplicates
+    whatever order the filesystem lists them in.
     """
     if table_name not in TABLE_MODEL_MAP:
         raise ValueError(f"Unknown table: {table_name}")
@@ -101,63 +243,611 @@ def load_data_to_df(table_name: str) -> pd.DataFrame:
     if not os.path.exists(table_dir):
         raise FileNotFoundError(f"Table directory not found: {table_dir}")
 
-    all_dfs = []
-
-    for filename in os.listdir(table_dir):
-        if filename.endswith(".csv"):
-            filepath = table_dir / filename
-            df = pd.read_csv(filepath, dtype=str, encoding="utf-8", index_col=False)
-            all_dfs.append(df)
+    read_options = TABLE_READ_OPTIONS[table_name]
+    filepaths = sorted(table_dir.glob("*.csv"))
 
-    if not all_dfs:
-        print(f"WARNING: No CSV files found in directory {table_dir}")
+    if not filepaths:
+        logger.warning(f"No CSV files found in directory {table_dir}")
         return pd.DataFrame()
 
-    return pd.concat(all_dfs, ignore_index=True)
+    def read_file(filepath: Path) -> pd.DataFrame:
+        if typed:
+            return _read_typed_csv(filepath, read_options, csv_engine)
+        return pd.read_csv(filepath, dtype=str, encoding="utf-8", index_col=False)
 
+    with span(table_name, "read") as read:
+        # map hands the results back in the order the files were submitted
+        workers = max(1, min(workers, len(filepaths)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            all_dfs = list(pool.map(read_file, filepaths))
 
-def insert_data_to_table(table_name: str, df: pd.DataFrame, engine) -> int:
-    """Insert DataFrame into table using SQLAlchemy ORM. Previous versions used
-    pandas.to_sql functionality but this proved opaque and tricky to debug.
-    """
+        df = pd.concat(all_dfs, ignore_index=True)
 
-    sqla_model = TABLE_MODEL_MAP[table_name]["sqla_model"]
+        if typed:
+            for column in read_options["parse_dates"]:
+                if column in df.columns:
+                    df[column] = _parse_dates(df[column])
 
-    # Delete existing data
-    print(f"Deleting existing data from {table_name}")
-    with Session(engine) as session:
-        session.query(sqla_model).delete()
-        session.commit()
+        read.rows = len(df)
+        logger.debug(f"Read {len(filepaths)} files for {table_name}")
 
-    # Insert new data
-    print(f"Inserting {len(df)} rows into {table_name}")
+    return df
+
+
+def _file_dtypes(filepath: Path, read_options: ReadOptions) -> dict:
+    # Spell out every column in the file, anything the model doesn't know
+    # about is kept as a string
+    header = pd.read_csv(filepath, nrows=0, encoding="utf-8").columns
+    return {
+        column: read_options["dtype"].get(column, pd.StringDtype()) for column in header
+    }
+
+
+def _read_typed_csv(
+    filepath: Path, read_options: ReadOptions, csv_engine: CsvEngine
+) -> pd.DataFrame:
+    dtype = _file_dtypes(filepath, read_options)
+
+    if csv_engine == "pyarrow":
+        return _read_csv_pyarrow(filepath, dtype)
+
+    return pd.read_csv(
+        filepath,
+        dtype=dtype,
+        na_values=NA_VALUES,
+        encoding="utf-8",
+        index_col=False,
+        engine=csv_engine,
+    )
+
+
+def _read_csv_pyarrow(filepath: Path, dtype: dict) -> pd.DataFrame:
+    """Read with pyarrow's multithreaded csv reader. pandas' own pyarrow engine
+    infers column types before applying dtypes, which turns codes like "1" into
+    "1.0", so every column is read as a string here and cast afterwards.
+    """
+    try:
+        import pyarrow as pa  # type: ignore[import-untyped]
+        from pyarrow import csv as pa_csv  # type: ignore[import-untyped]
+
+        # Same missing values as the c engine, pyarrow's defaults are shorter
+        from pandas._libs.parsers import STR_NA_VALUES  # type: ignore[import-not-found]
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is needed for csv_engine='pyarrow', install the arrow extra"
+        ) from e
+
+    convert_options = pa_csv.ConvertOptions(
+        column_types={column: pa.string() for column in dtype},
+        null_values=sorted(STR_NA_VALUES | set(NA_VALUES)),
+        strings_can_be_null=True,
+    )
+    table = pa_csv.read_csv(filepath, convert_options=convert_options)
+
+    return table.to_pandas().astype(pd.StringDtype()).astype(dtype)
+
+
+def _insert_chunks_orm(
+    table_name: str, df: pd.DataFrame, engine, chunksize: int, schema=None
+) -> int:
+    """Build one ORM instance per row and add them to the session a chunk at a
+    time.
+    """
+    sqla_model = target_model(table_name, engine, schema)
+    plan = build_coercion_plan(sqla_model)
+    timer = StageTimer(table_name)
     total_rows = 0
-    chunksize = 1000
 
     with Session(engine) as session:
         for i in range(0, len(df), chunksize):
             chunk = df[i : i + chunksize]
 
-            # Convert each row to dict and create model instances
-            instances = []
-            for _, row in chunk.iterrows():
-                # Convert row to dict, handling NaN/NaT values
-                row_dict = row.to_dict()
-                instances.append(sqla_model(**coerce_sqla_types(row_dict, sqla_model)))
+            # Coerce the chunk column by column then create model instances
+            with timer.time("coerce", len(chunk)):
+                records = coerce_dataframe(chunk, sqla_model, plan).to_dict("records")
+                instances = [sqla_model(**record) for record in records]  # type: ignore[arg-type]
 
             try:
-                session.add_all(instances)
-                session.commit()
+                with timer.time("insert", len(instances)):
+                    session.add_all(instances)
+                    session.flush()
+                with timer.time("commit", len(instances)):
+                    session.commit()
                 total_rows += len(instances)
-                print(f"  Inserted {total_rows}/{len(df)} rows")
+                logger.debug(f"  Inserted {total_rows}/{len(df)} rows")
             except SQLAlchemyError as e:
                 session.rollback()
-                logging.error(f"Error inserting chunk into {table_name}: {e}")
+                logger.error(f"Error inserting chunk into {table_name}: {e}")
                 raise
 
+    timer.record()
     return total_rows
 
 
+def _insert_chunks_core(
+    table_name: str, df: pd.DataFrame, engine, chunksize: int, schema=None
+) -> int:
+    """Send each chunk as a single executemany through a Core insert. This
+    skips the unit of work entirely, which is fine for the reference tables as
+    none of them have relationships to populate.
+    """
+    sqla_model = target_model(table_name, engine, schema)
+    mapper = sqla_model.__mapper__  # type: ignore[attr-defined]
+    plan = build_coercion_plan(sqla_model)
+
+    # Core statements are keyed on table column keys, which don't always match
+    # the model attribute names used in the csv headers (eg. rr_data_definition)
+    column_keys = {key: mapper.columns[key].key for key in df.columns}
+    statement = insert(target_table(table_name, engine, schema))
+    timer = StageTimer(table_name)
+    total_rows = 0
+
+    with engine.connect() as conn:
+        for i in range(0, len(df), chunksize):
+            chunk = df[i : i + chunksize]
+            with timer.time("coerce", len(chunk)):
+                chunk = coerce_dataframe(chunk, sqla_model, plan)
+                records = chunk.rename(columns=column_keys).to_dict("records")
+
+            try:
+                with timer.time("insert", len(records)):
+                    conn.execute(statement, records)
+                with timer.time("commit", len(records)):
+                    conn.commit()
+                total_rows += len(records)
+                logger.debug(f"  Inserted {total_rows}/{len(df)} rows")
+            except SQLAlchemyError as e:
+                conn.rollback()
+                logger.error(f"Error inserting chunk into {table_name}: {e}")
+                raise
+
+    timer.record()
+    return total_rows
+
+
+def supports_copy(engine) -> bool:
+    """COPY is only available when talking to postgres through psycopg 3"""
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg"
+
+
+def _insert_chunks_copy(
+    table_name: str, df: pd.DataFrame, engine, chunksize: int, schema=None
+) -> int:
+    """Stream the rows into the table with a single COPY FROM STDIN. Chunks are
+    only used to bound the size of each coerced frame, the whole table goes in
+    one transaction.
+    """
+    sqla_model = target_model(table_name, engine, schema)
+    table = target_table(table_name, engine, schema)
+    mapper = sqla_model.__mapper__  # type: ignore[attr-defined]
+    plan = build_coercion_plan(sqla_model)
+
+    target = (
+        sql.Identifier(table.schema, table.name)
+        if table.schema
+        else sql.Identifier(table.name)
+    )
+    column_names = [sql.Identifier(mapper.columns[key].name) for key in df.columns]
+    statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        target, sql.SQL(", ").join(column_names)
+    )
+    timer = StageTimer(table_name)
+    total_rows = 0
+
+    # COPY is driven through psycopg directly so use a raw pooled connection
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                for i in range(0, len(df), chunksize):
+                    chunk = df[i : i + chunksize]
+                    with timer.time("coerce", len(chunk)):
+                        chunk = coerce_dataframe(chunk, sqla_model, plan)
+                    # Ending the copy sends whatever is still buffered
+                    with timer.time("insert", len(chunk)):
+                        for row in chunk.itertuples(index=False, name=None):
+                            copy.write_row(row)
+                    total_rows += len(chunk)
+                    logger.debug(f"  Copied {total_rows}/{len(df)} rows")
+        with timer.time("commit", total_rows):
+            conn.commit()
+    except psycopg.Error as e:
+        conn.rollback()
+        logger.error(f"Error copying data into {table_name}: {e}")
+        raise
+    finally:
+        conn.close()
+
+    timer.record()
+    return total_rows
+
+
+def _delete_rows(table_name: str, engine, schema=None) -> None:
+    table = target_table(table_name, engine, schema)
+    with span(table_name, "delete") as deleted, engine.begin() as conn:
+        deleted.rows = conn.execute(delete(table)).rowcount
+
+
+def _check_copy(engine, copy: bool) -> bool:
+    if copy and not supports_copy(engine):
+        logger.info(
+            f"COPY not supported by {engine.dialect.name}, falling back to inserts"
+        )
+        return False
+    return copy
+
+
+def _insert_chunks(
+    table_name: str,
+    df: pd.DataFrame,
+    engine,
+    bulk: bool,
+    chunksize: int,
+    copy: bool,
+    schema=None,
+) -> int:
+    if copy:
+        return _insert_chunks_copy(table_name, df, engine, chunksize, schema)
+    if bulk:
+        return _insert_chunks_core(table_name, df, engine, chunksize, schema)
+    return _insert_chunks_orm(table_name, df, engine, chunksize, schema)
+
+
+def insert_data_to_table(
+    table_name: str,
+    df: pd.DataFrame,
+    engine,
+    bulk: bool = False,
+    chunksize: int = 1000,
+    copy: bool = False,
+    schema=None,
+) -> int:
+    """Insert DataFrame into table using SQLAlchemy ORM. Previous versions used
+    pandas.to_sql functionality but this proved opaque and tricky to debug.
+
+    With bulk set the ORM is bypassed and chunks are sent as executemany
+    batches of a Core insert, which is considerably faster on large tables.
+    With copy set postgres tables are loaded with COPY FROM STDIN; other
+    dialects fall back to whichever of the paths above was asked for.
+    """
+
+    _delete_rows(table_name, engine, schema)
+
+    # Insert new data
+    logger.info(f"Inserting {len(df)} rows into {table_name}")
+    start = time.perf_counter()
+
+    copy = _check_copy(engine, copy)
+    total_rows = _insert_chunks(table_name, df, engine, bulk, chunksize, copy, schema)
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Inserted {total_rows} rows into {table_name} in {elapsed:.2f}s "
+        f"({rate:.0f} rows/s)"
+    )
+
+    return total_rows
+
+
+# Rows read from a file at a time when streaming a table in
+STREAM_CHUNKSIZE = 50_000
+
+
+class KeyHashSet:
+    """The 64 bit hashes of the keys seen so far, held in a sorted numpy array
+    (8 bytes a key) rather than keeping the keys themselves.
+
+    Two different keys with the same hash are taken as one, so the row with
+    the second is dropped as a duplicate. stream_data_to_table warns when
+    that happens, the staging row count and streamed parquet export use the
+    same set without checking.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add_new(self, keys: pd.DataFrame) -> np.ndarray:
+        """Add the rows' keys, returning a mask of the rows whose key hadn't
+        been seen before. Only the first of any repeats within keys counts.
+        """
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+        new = np.zeros(len(hashes), dtype=bool)
+        new[np.unique(hashes, return_index=True)[1]] = True
+
+        if len(self._hashes) > 0:
+            positions = np.searchsorted(self._hashes, hashes)
+            found = self._hashes[np.minimum(positions, len(self._hashes) - 1)]
+            new &= found != hashes
+
+        # Inserted in place of a full sort, one copy of what's held already
+        added = np.sort(hashes[new])
+        self._hashes = np.insert(
+            self._hashes, np.searchsorted(self._hashes, added), added
+        )
+        return new
+
+
+def read_table_chunks(table_name: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Typed chunks of a table's csv files in filename order"""
+    read_options = TABLE_READ_OPTIONS[table_name]
+    for filepath in sorted((Path("tables") / table_name).glob("*.csv")):
+        with pd.read_csv(
+            filepath,
+            dtype=_file_dtypes(filepath, read_options),
+            na_values=NA_VALUES,
+            encoding="utf-8",
+            index_col=False,
+            chunksize=chunksize,
+        ) as reader:
+            for chunk in reader:
+                for column in read_options["parse_dates"]:
+                    if column in chunk.columns:
+                        chunk[column] = _parse_dates(chunk[column])
+                yield chunk
+
+
+def stream_data_to_table(
+    table_name: str,
+    engine,
+    bulk: bool = True,
+    chunksize: int = 1000,
+    copy: bool = False,
+    read_chunksize: int = STREAM_CHUNKSIZE,
+    schema=None,
+) -> int:
+    """Load a table from its csv files read_chunksize rows at a time, cleaning
+    and inserting each chunk before reading the next, so memory depends on the
+    chunk size rather than the size of the table.
+
+    Cleaning matches clean_data: rows missing a key are dropped and only the
+    first row for each key is kept, remembered across chunks by a KeyHashSet.
+    The distinct keys are also kept (only the key columns) to warn if a hash
+    collision dropped a row.
+    """
+    if table_name not in TABLE_MODEL_MAP:
+        raise ValueError(f"Unknown table: {table_name}")
+
+    table_dir = Path("tables") / table_name
+    if not table_dir.exists():
+        raise FileNotFoundError(f"Table directory not found: {table_dir}")
+
+    unique_columns = TABLE_MODEL_MAP[table_name]["unique_columns"]
+    copy = _check_copy(engine, copy)
+    seen = KeyHashSet()
+    distinct_keys: pd.DataFrame | None = None
+    timer = StageTimer(table_name)
+    read_rows = 0
+    total_rows = 0
+
+    _delete_rows(table_name, engine, schema)
+    logger.info(f"Streaming {table_name} in chunks of {read_chunksize} rows")
+    start = time.perf_counter()
+
+    chunks = read_table_chunks(table_name, read_chunksize)
+    while True:
+        # Timed by hand as the rows are only known once the chunk is read
+        read_start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        timer.add("read", time.perf_counter() - read_start, len(chunk))
+        read_rows += len(chunk)
+
+        with timer.time("clean", len(chunk)):
+            if unique_columns:
+                chunk = chunk.dropna(subset=unique_columns)
+                keys = chunk[unique_columns]
+                distinct_keys = (
+                    keys if distinct_keys is None else pd.concat([distinct_keys, keys])
+                ).drop_duplicates()
+                chunk = chunk[seen.add_new(keys)]
+            if engine.dialect.name == "sqlite":
+                chunk = fill_creation_dates(table_name, chunk)
+
+        total_rows += _insert_chunks(
+            table_name, chunk, engine, bulk, chunksize, copy, schema
+        )
+
+    timer.record()
+
+    removed = read_rows - total_rows
+    if removed > 0:
+        logger.warning(
+            f"Removed {removed} duplicate rows or rows missing key values in {table_name}"
+        )
+    if distinct_keys is not None and len(distinct_keys) != len(seen):
+        logger.warning(
+            f"{len(distinct_keys) - len(seen)} rows with distinct keys in "
+            f"{table_name} were dropped as their key hashes collided"
+        )
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Streamed {total_rows} rows into {table_name} in {elapsed:.2f}s "
+        f"({rate:.0f} rows/s)"
+    )
+    return total_rows
+
+
+class SyncSummary(TypedDict):
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
+# Filled in by the build rather than coming from the csv files, so never used
+# to decide whether a row has changed
+AUTO_COLUMNS = ["creation_date", "update_date"]
+
+
+def _comparable(value):
+    """Reduce values read back from the database and values coerced from the
+    csv files to a common form. Drivers hand back Decimal for Numeric, ints
+    for BIT on sqlite etc. which would otherwise never compare equal.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (Decimal, float)):
+        return repr(float(value))
+    if isinstance(value, list):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _upsert_statement(table: Table, engine, update_columns: list[str]):
+    """INSERT ... ON CONFLICT on the primary key, updating the given columns"""
+    match engine.dialect.name:
+        case "postgresql":
+            statement = postgresql.insert(table)
+        case "sqlite":
+            statement = sqlite.insert(table)  # type: ignore[assignment]
+        case _:
+            raise ValueError(f"Sync not supported for {engine.dialect.name}")
+
+    index_elements = [column.name for column in table.primary_key.columns]
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=index_elements)
+
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={key: statement.excluded[key] for key in update_columns},
+    )
+
+
+def sync_data_to_table(
+    table_name: str, df: pd.DataFrame, engine, chunksize: int = 1000, schema=None
+) -> SyncSummary:
+    """Bring a table in line with the DataFrame by only touching rows which
+    differ, rather than deleting and reinserting everything. Rows are matched
+    on the unique_columns declared in TABLE_MODEL_MAP. Changes are applied in
+    a single transaction with INSERT ... ON CONFLICT.
+    """
+    sqla_model = target_model(table_name, engine, schema)
+    table = target_table(table_name, engine, schema)
+    mapper = sqla_model.__mapper__  # type: ignore[attr-defined]
+    key_columns = TABLE_MODEL_MAP[table_name]["unique_columns"]
+
+    # Attribute names (csv headers) to table column keys and back again
+    column_keys = {key: column.key for key, column in mapper.columns.items()}
+    attribute_keys = {column_key: key for key, column_key in column_keys.items()}
+    primary_key = [attribute_keys[column.key] for column in table.primary_key.columns]
+
+    compare_columns = [c for c in df.columns if c not in AUTO_COLUMNS]
+    missing = set(key_columns + primary_key) - set(compare_columns)
+    if missing:
+        raise ValueError(f"Cannot sync {table_name}, missing columns: {missing}")
+
+    with span(table_name, "coerce", rows=len(df)):
+        incoming = coerce_dataframe(df, sqla_model).reset_index(drop=True)
+
+    with span(table_name, "sync", rows=len(df)), engine.begin() as conn:
+        rows = conn.execute(
+            select(*[table.c[column_keys[c]].label(c) for c in compare_columns])
+        ).all()
+        existing = pd.DataFrame(rows, columns=compare_columns, dtype=object)
+
+        incoming_cmp = incoming[compare_columns].map(_comparable)
+        existing_cmp = existing.map(_comparable)
+
+        # Duplicate keys already in the table (possible where the key is
+        # narrower than the primary key) are cleared out
+        duplicated = existing_cmp.duplicated(subset=key_columns, keep="first")
+
+        merged = incoming_cmp.reset_index(names="_incoming").merge(
+            existing_cmp[~duplicated].reset_index(names="_existing"),
+            on=key_columns,
+            how="outer",
+            suffixes=("", "_existing"),
+            indicator=True,
+        )
+        both = merged["_merge"] == "both"
+
+        changed = pd.Series(False, index=merged.index)
+        pk_changed = pd.Series(False, index=merged.index)
+        for c in compare_columns:
+            if c in key_columns:
+                continue
+            new_value, old_value = merged[c], merged[f"{c}_existing"]
+            differs = both & ~(
+                (new_value == old_value) | (new_value.isna() & old_value.isna())
+            )
+            changed |= differs
+            if c in primary_key:
+                pk_changed |= differs
+
+        # Changes to the primary key can't be done with ON CONFLICT so the old
+        # row is deleted and the new one inserted
+        insert_rows = merged["_incoming"][
+            (merged["_merge"] == "left_only") | (both & pk_changed)
+        ]
+        update_rows = merged["_incoming"][both & changed & ~pk_changed]
+        delete_rows = pd.concat(
+            [
+                merged["_existing"][(merged["_merge"] == "right_only") | pk_changed],
+                pd.Series(existing.index[duplicated]),
+            ]
+        )
+
+        if len(delete_rows) > 0:
+            statement = delete(table).where(
+                and_(
+                    *[
+                        table.c[column_keys[c]] == bindparam(f"_{c}")
+                        for c in primary_key
+                    ]
+                )
+            )
+            delete_records = [
+                {f"_{c}": value for c, value in row.items()}
+                for row in existing.loc[delete_rows.astype(int), primary_key].to_dict(
+                    "records"
+                )
+            ]
+            for i in range(0, len(delete_records), chunksize):
+                conn.execute(statement, delete_records[i : i + chunksize])
+
+        update_columns = [
+            column_keys[c] for c in compare_columns if c not in primary_key
+        ]
+        for row_index, set_update_date in ((insert_rows, False), (update_rows, True)):
+            if len(row_index) == 0:
+                continue
+
+            chunk = incoming.loc[row_index.astype(int)]
+            columns = update_columns
+            if set_update_date and "update_date" in column_keys:
+                chunk = chunk.assign(update_date=datetime.now())
+                columns = update_columns + [column_keys["update_date"]]
+
+            statement = _upsert_statement(table, engine, columns)
+            records = chunk.rename(columns=column_keys).to_dict("records")
+            for i in range(0, len(records), chunksize):
+                conn.execute(statement, records[i : i + chunksize])
+
+    summary: SyncSummary = {
+        "inserted": int((merged["_merge"] == "left_only").sum()),
+        "updated": int((both & changed).sum()),
+        "deleted": int((merged["_merge"] == "right_only").sum() + duplicated.sum()),
+        "unchanged": int((both & ~changed).sum()),
+    }
+    logger.info(
+        f"Synced {table_name}: {summary['inserted']} inserted, "
+        f"{summary['updated']} updated, {summary['deleted']} deleted, "
+        f"{summary['unchanged']} unchanged"
+    )
+
+    return summary
+
+
 def clean_data(
     table_name: str, df: pd.DataFrame, fill_creation_date: bool = False
 ) -> pd.DataFrame:
@@ -168,53 +858,89 @@ def clean_data(
         return df
 
     unique_columns = TABLE_MODEL_MAP[table_name].get("unique_columns", [])
-    print(unique_columns)
     if not unique_columns:
         return df
 
-    # Remove rows with missing key values
-    cleaned_df = df.dropna(subset=unique_columns)
-    missing_count = len(df) - len(cleaned_df)
+    with span(table_name, "clean", rows=len(df)):
+        # Remove rows with missing key values
+        cleaned_df = df.dropna(subset=unique_columns)
+        missing_count = len(df) - len(cleaned_df)
 
-    # Remove duplicates (keep first occurrence)
-    cleaned_df = cleaned_df.drop_duplicates(subset=unique_columns, keep="first")
-    duplicate_count = len(df) - missing_count - len(cleaned_df)
+        # Remove duplicates (keep first occurrence)
+        cleaned_df = cleaned_df.drop_duplicates(subset=unique_columns, keep="first")
+        duplicate_count = len(df) - missing_count - len(cleaned_df)
 
     if duplicate_count > 0:
-        print(f"WARNING: Removed {duplicate_count} duplicate rows in {table_name}")
+        logger.warning(f"Removed {duplicate_count} duplicate rows in {table_name}")
 
     elif missing_count > 0:
-        print(
-            f"WARNING: Removed {missing_count} rows with missing key values in {table_name}"
+        logger.warning(
+            f"Removed {missing_count} rows with missing key values in {table_name}"
         )
     else:
-        print(f"No data cleaning applied to data loaded into {table_name}")
+        logger.info(f"No data cleaning applied to data loaded into {table_name}")
 
     if fill_creation_date:
-        if hasattr(TABLE_MODEL_MAP[table_name]["sqla_model"], "creation_date"):
-            cleaned_df["creation_date"] = pd.Timestamp.now()
-        if hasattr(TABLE_MODEL_MAP[table_name]["sqla_model"], "update_date"):
-            cleaned_df["update_date"] = pd.Timestamp.now()
+        cleaned_df = fill_creation_dates(table_name, cleaned_df)
 
     return cleaned_df
 
 
-def load_data(table_name: str, engine) -> int:
-    """Load all CSV files from the specified table directory and insert into database."""
-    # Load data into DataFrame to allow more flexibly with cleaning/validation etc.
-    df = load_data_to_df(table_name)
+def fill_creation_dates(table_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Stamp the creation and update dates for models which have them"""
+    if hasattr(TABLE_MODEL_MAP[table_name]["sqla_model"], "creation_date"):
+        df["creation_date"] = pd.Timestamp.now()
+    if hasattr(TABLE_MODEL_MAP[table_name]["sqla_model"], "update_date"):
+        df["update_date"] = pd.Timestamp.now()
+    return df
+
+
+def load_data(
+    table_name: str,
+    engine,
+    bulk: bool = False,
+    chunksize: int = 1000,
+    copy: bool = False,
+    sync: bool = False,
+    csv_engine: CsvEngine = "c",
+    stream: bool = False,
+    schema=None,
+) -> int:
+    """Load all CSV files from the specified table directory and insert into database.
+
+    With stream set the table is read, cleaned and inserted a chunk at a time
+    by stream_data_to_table instead, for tables too large to hold in memory.
+    """
+    if stream:
+        if sync:
+            raise ValueError("Streamed loads can't be synced")
+        return stream_data_to_table(
+            table_name, engine, bulk=bulk, chunksize=chunksize, copy=copy, schema=schema
+        )
+
+    # Imported here as the catalog is built on the functions in this module
+    from registry_codes.catalog import load_table
 
-    # Validate and clean data
-    if len(df) > 0:
-        if engine.dialect.name == "sqlite":
-            df = clean_data(table_name, df, fill_creation_date=True)
-        else:
-            df = clean_data(table_name, df)
-    else:
+    # Parsed and cleaned once per process (or across processes with a cache
+    # directory) however many builds and checks read the table
+    df = load_table(table_name, typed=True, clean=True, csv_engine=csv_engine)
+
+    if len(df) == 0:
         return 0
 
+    if engine.dialect.name == "sqlite":
+        df = fill_creation_dates(table_name, df)
+
+    if sync:
+        summary = sync_data_to_table(
+            table_name, df, engine, chunksize=chunksize, schema=schema
+        )
+        return summary["inserted"] + summary["updated"]
+
     # Insert data into table
-    total_rows = insert_data_to_table(table_name, df, engine)
+    total_rows = insert_data_to_table(
+        table_name, df, engine, bulk=bulk, chunksize=chunksize, copy=copy, schema=schema
+    )
 
-    print(f"Total rows inserted for {table_name}: {total_rows}")
+    logger.info(f"Total rows inserted for {table_name}: {total_rows}")
     return total_rows
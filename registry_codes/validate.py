@@ -0,0 +1,499 @@
+"""
+Checks on the csv tables before they are built. Each table is parsed once
+and every rule is a declarative description of a check which is run as a
+join or column operation over those frames, so adding a check is adding a
+rule rather than another loop over the files.
+
+Run as ``python -m registry_codes.validate``, the exit code is 1 if any
+rule with error severity fails.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Literal, TypedDict, cast
+
+import pandas as pd
+
+from registry_codes.catalog import load_table
+from registry_codes.schema import TABLE_MODEL_MAP
+
+TABLES_DIR = Path("tables")
+MAX_EXAMPLES = 10
+
+Severity = Literal["error", "warning"]
+Catalog = dict[str, pd.DataFrame]
+
+
+class ReferenceRule(TypedDict):
+    """Every row of table has its columns in reference_columns of references.
+    With known_only set only rows whose first column value appears in the
+    reference table are checked, eg. only code_map rows for coding standards
+    which have a code list.
+    """
+
+    kind: Literal["reference"]
+    name: str
+    severity: Severity
+    table: str
+    columns: list[str]
+    references: str
+    reference_columns: list[str]
+    known_only: bool
+
+
+class AllowedValuesRule(TypedDict):
+    """column only takes the listed values, on rows where when_set is set if
+    given.
+    """
+
+    kind: Literal["allowed_values"]
+    name: str
+    severity: Severity
+    table: str
+    column: str
+    values: list[str]
+    when_set: str | None
+
+
+class NotNullRule(TypedDict):
+    kind: Literal["not_null"]
+    name: str
+    severity: Severity
+    table: str
+    columns: list[str]
+
+
+class ReferencedRule(TypedDict):
+    """Every value of column is used by at least one of referenced_by"""
+
+    kind: Literal["referenced"]
+    name: str
+    severity: Severity
+    table: str
+    column: str
+    referenced_by: list[tuple[str, str]]
+
+
+class MappedRowsMatchRule(TypedDict):
+    """Rows of table mapped to each other through code_map entries from
+    mapping_standard have the same values in columns.
+    """
+
+    kind: Literal["mapped_rows_match"]
+    name: str
+    severity: Severity
+    table: str
+    key: str
+    mapping_standard: str
+    columns: list[str]
+
+
+class ColumnCountRule(TypedDict):
+    """Every line of the table's files has at least columns fields, not
+    counting empty ones unless allow_empty. This looks at the raw lines since
+    short rows are padded with missing values once parsed.
+    """
+
+    kind: Literal["column_count"]
+    name: str
+    severity: Severity
+    table: str
+    columns: int
+    allow_empty: bool
+
+
+class HeadersRule(TypedDict):
+    """Every file header names an attribute of the table's model"""
+
+    kind: Literal["headers"]
+    name: str
+    severity: Severity
+    table: str
+
+
+Rule = (
+    ReferenceRule
+    | AllowedValuesRule
+    | NotNullRule
+    | ReferencedRule
+    | MappedRowsMatchRule
+    | ColumnCountRule
+    | HeadersRule
+)
+
+
+class RuleResult(TypedDict):
+    rule: str
+    kind: str
+    table: str
+    severity: Severity
+    passed: bool
+    failures: int
+    examples: list[dict[str, Any]]
+
+
+# Tables whose coding standard columns must be in coding_standards
+STANDARD_TABLES = ["code_map", "code_list", "code_exclusion", "facility_new"]
+STANDARD_COLUMNS = [
+    (table_name, column.name)
+    for table_name in STANDARD_TABLES
+    for column in TABLE_MODEL_MAP[table_name]["sqla_model"].__table__.columns
+    if column.name.endswith(("standard", "std"))
+]
+
+COLUMN_COUNTS = {
+    "modality_codes": (13, True),
+    "code_map": (4, False),
+    "code_exclusion": (3, True),
+    "code_list": (7, True),
+    "rr_codes": (8, True),
+    "rr_data_definition": (21, True),
+}
+
+FACILITY_COMPARE_COLUMNS = ["firstdataquarter", "startdate", "enddate"]
+
+RULES: list[Rule] = [
+    {
+        "kind": "allowed_values",
+        "name": "facility_standard_is_rr1plus",
+        "severity": "error",
+        "table": "facility_new",
+        "column": "facilitycodestd",
+        "values": ["RR1+"],
+        "when_set": None,
+    },
+    {
+        "kind": "reference",
+        "name": "facility_in_code_list",
+        "severity": "error",
+        "table": "facility_new",
+        "columns": ["facilitycodestd", "facilitycode"],
+        "references": "code_list",
+        "reference_columns": ["coding_standard", "code"],
+        "known_only": False,
+    },
+    {
+        "kind": "allowed_values",
+        "name": "first_data_quarter_only_for_renal_centres",
+        "severity": "error",
+        "table": "facility_new",
+        "column": "facilitytype",
+        "values": ["Adult Renal Centre", "Paediatric Renal Centre"],
+        "when_set": "firstdataquarter",
+    },
+    {
+        "kind": "mapped_rows_match",
+        "name": "feedshare_match_main",
+        "severity": "error",
+        "table": "facility_new",
+        "key": "facilitycode",
+        "mapping_standard": "RR1+_FEEDSHARE_CHILD",
+        "columns": FACILITY_COMPARE_COLUMNS,
+    },
+    # TODO: make these errors once the data is fixed
+    {
+        "kind": "mapped_rows_match",
+        "name": "satellites_match_main",
+        "severity": "warning",
+        "table": "facility_new",
+        "key": "facilitycode",
+        "mapping_standard": "RR1+_SATELLITE",
+        "columns": FACILITY_COMPARE_COLUMNS,
+    },
+    {
+        "kind": "reference",
+        "name": "code_map_source_in_code_list",
+        "severity": "warning",
+        "table": "code_map",
+        "columns": ["source_coding_standard", "source_code"],
+        "references": "code_list",
+        "reference_columns": ["coding_standard", "code"],
+        "known_only": True,
+    },
+    {
+        "kind": "reference",
+        "name": "code_map_destination_in_code_list",
+        "severity": "warning",
+        "table": "code_map",
+        "columns": ["destination_coding_standard", "destination_code"],
+        "references": "code_list",
+        "reference_columns": ["coding_standard", "code"],
+        "known_only": True,
+    },
+    *(
+        cast(
+            ReferenceRule,
+            {
+                "kind": "reference",
+                "name": f"{table_name}_{column}_in_coding_standards",
+                "severity": "error",
+                "table": table_name,
+                "columns": [column],
+                "references": "coding_standards",
+                "reference_columns": ["coding_standard"],
+                "known_only": False,
+            },
+        )
+        for table_name, column in STANDARD_COLUMNS
+    ),
+    # TODO: describe the RR1+ standards and make this an error
+    {
+        "kind": "not_null",
+        "name": "coding_standards_have_description",
+        "severity": "warning",
+        "table": "coding_standards",
+        "columns": ["description"],
+    },
+    {
+        "kind": "referenced",
+        "name": "coding_standards_used",
+        "severity": "error",
+        "table": "coding_standards",
+        "column": "coding_standard",
+        "referenced_by": STANDARD_COLUMNS,
+    },
+    *(
+        cast(
+            ColumnCountRule,
+            {
+                "kind": "column_count",
+                "name": f"{table_name}_column_count",
+                "severity": "error",
+                "table": table_name,
+                "columns": columns,
+                "allow_empty": allow_empty,
+            },
+        )
+        for table_name, (columns, allow_empty) in COLUMN_COUNTS.items()
+    ),
+    *(
+        cast(
+            HeadersRule,
+            {
+                "kind": "headers",
+                "name": f"{table_name}_headers",
+                "severity": "error",
+                "table": table_name,
+            },
+        )
+        for table_name in TABLE_MODEL_MAP
+    ),
+]
+
+
+def rule_tables(rule: Rule) -> set[str]:
+    """The parsed tables a rule needs"""
+    if rule["kind"] in ("column_count", "headers"):
+        return set()
+    tables = {rule["table"]}
+    if rule["kind"] == "reference":
+        tables.add(cast(ReferenceRule, rule)["references"])
+    elif rule["kind"] == "referenced":
+        tables.update(table for table, _ in cast(ReferencedRule, rule)["referenced_by"])
+    elif rule["kind"] == "mapped_rows_match":
+        tables.add("code_map")
+    return tables
+
+
+def load_tables(table_names) -> Catalog:
+    """Parse each table once for all of the rules"""
+    return {table_name: load_table(table_name) for table_name in table_names}
+
+
+def _examples(df: pd.DataFrame) -> list[dict[str, Any]]:
+    df = df.head(MAX_EXAMPLES)
+    return cast(
+        list[dict[str, Any]],
+        df.astype(object).where(df.notna(), None).to_dict("records"),
+    )
+
+
+def _failures(df: pd.DataFrame) -> tuple[int, list[dict[str, Any]]]:
+    return len(df), _examples(df)
+
+
+def check_reference(rule: ReferenceRule, tables: Catalog):
+    df = tables[rule["table"]][rule["columns"]].dropna()
+    reference = tables[rule["references"]][rule["reference_columns"]].dropna()
+
+    if rule["known_only"]:
+        known = reference[rule["reference_columns"][0]]
+        df = df[df[rule["columns"][0]].isin(known)]
+
+    # Anti join: rows with no match in the reference table
+    found = pd.MultiIndex.from_frame(df).isin(pd.MultiIndex.from_frame(reference))
+    return _failures(df[~found])
+
+
+def check_allowed_values(rule: AllowedValuesRule, tables: Catalog):
+    df = tables[rule["table"]]
+    if rule["when_set"] is not None:
+        df = df[df[rule["when_set"]].notna()]
+    return _failures(df[~df[rule["column"]].isin(rule["values"])])
+
+
+def check_not_null(rule: NotNullRule, tables: Catalog):
+    df = tables[rule["table"]]
+    return _failures(df[df[rule["columns"]].isna().any(axis=1)])
+
+
+def check_referenced(rule: ReferencedRule, tables: Catalog):
+    used = pd.concat(
+        [tables[table][column].dropna() for table, column in rule["referenced_by"]]
+    ).unique()
+    df = tables[rule["table"]]
+    return _failures(df[~df[rule["column"]].isin(used)])
+
+
+def check_mapped_rows_match(rule: MappedRowsMatchRule, tables: Catalog):
+    df = tables[rule["table"]][[rule["key"], *rule["columns"]]]
+    code_map = tables["code_map"]
+    mapping = code_map[code_map.source_coding_standard == rule["mapping_standard"]]
+    mapping = mapping[["source_code", "destination_code"]].drop_duplicates()
+
+    joined = mapping.merge(
+        df, left_on="source_code", right_on=rule["key"], how="inner"
+    ).merge(
+        df,
+        left_on="destination_code",
+        right_on=rule["key"],
+        how="inner",
+        suffixes=("", "_main"),
+    )
+
+    left = joined[rule["columns"]]
+    right = joined[[f"{column}_main" for column in rule["columns"]]]
+    right.columns = left.columns
+    # Missing on both sides counts as matching
+    differs = (left.ne(right) & ~(left.isna() & right.isna())).any(axis=1)
+    return _failures(joined[differs].drop(columns=[rule["key"], f"{rule['key']}_main"]))
+
+
+def _table_files(table_name: str) -> list[Path]:
+    return sorted((TABLES_DIR / table_name).glob("*.csv"))
+
+
+def check_column_count(rule: ColumnCountRule, tables: Catalog):
+    failures = []
+    for filepath in _table_files(rule["table"]):
+        with open(filepath, "r", newline="", encoding="utf-8") as f:
+            for line_number, row in enumerate(csv.reader(f), 1):
+                fields = row if rule["allow_empty"] else [v for v in row if v.strip()]
+                if len(fields) < rule["columns"]:
+                    failures.append(
+                        {"file": str(filepath), "line": line_number, "row": row}
+                    )
+    return len(failures), failures[:MAX_EXAMPLES]
+
+
+def check_headers(rule: HeadersRule, tables: Catalog):
+    model = TABLE_MODEL_MAP[rule["table"]]["sqla_model"]
+    failures = []
+    for filepath in _table_files(rule["table"]):
+        with open(filepath, "r", newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        for column in header:
+            # rr_data_definition's TYPE column is the code_type attribute
+            if column != "TYPE" and not hasattr(model, column.lower()):
+                failures.append({"file": str(filepath), "column": column})
+    return len(failures), failures[:MAX_EXAMPLES]
+
+
+CHECKS: dict[str, Callable[[Any, Catalog], tuple[int, list[dict[str, Any]]]]] = {
+    "reference": check_reference,
+    "allowed_values": check_allowed_values,
+    "not_null": check_not_null,
+    "referenced": check_referenced,
+    "mapped_rows_match": check_mapped_rows_match,
+    "column_count": check_column_count,
+    "headers": check_headers,
+}
+
+
+def run_rule(rule: Rule, tables: Catalog) -> RuleResult:
+    failures, examples = CHECKS[rule["kind"]](rule, tables)
+    return {
+        "rule": rule["name"],
+        "kind": rule["kind"],
+        "table": rule["table"],
+        "severity": rule["severity"],
+        "passed": failures == 0,
+        "failures": failures,
+        "examples": examples,
+    }
+
+
+def validate(
+    rules: list[Rule] | None = None, tables: Catalog | None = None
+) -> list[RuleResult]:
+    """Run the rules (all of them by default) against the tables, parsing
+    any table not passed in.
+    """
+    rules = RULES if rules is None else rules
+    tables = dict(tables or {})
+
+    needed = set().union(*(rule_tables(rule) for rule in rules)) - set(tables)
+    tables.update(load_tables(sorted(needed)))
+
+    return [run_rule(rule, tables) for rule in rules]
+
+
+def failed(results: list[RuleResult], severity: Severity = "error") -> list[RuleResult]:
+    return [r for r in results if not r["passed"] and r["severity"] == severity]
+
+
+def format_result(result: RuleResult) -> str:
+    status = "ok" if result["passed"] else result["severity"].upper()
+    lines = [f"{status:<7} {result['rule']} ({result['failures']} failures)"]
+    for example in result["examples"] if not result["passed"] else []:
+        lines.append(f"        {example}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validate the csv tables")
+    parser.add_argument(
+        "--rule",
+        action="append",
+        help="Only run the named rule, can be given more than once",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as json")
+    args = parser.parse_args(argv)
+
+    rules = RULES
+    if args.rule:
+        names = {rule["name"] for rule in RULES}
+        unknown = set(args.rule) - names
+        if unknown:
+            parser.error(f"Unknown rules: {', '.join(sorted(unknown))}")
+        rules = [rule for rule in RULES if rule["name"] in args.rule]
+
+    start = time.perf_counter()
+    if args.json:
+        # Keep stdout for the json, progress from loading goes to stderr
+        with redirect_stdout(sys.stderr):
+            results = validate(rules)
+    else:
+        results = validate(rules)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+    else:
+        for result in results:
+            print(format_result(result))
+        print(
+            f"{len(results)} rules, {len(failed(results))} errors and "
+            f"{len(failed(results, 'warning'))} warnings in {elapsed:.2f}s"
+        )
+
+    return 1 if failed(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
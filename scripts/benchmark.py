@@ -0,0 +1,11 @@
+"""
+Times each stage of loading the tables into sqlite at several scales and
+writes the results as JSON, see registry_codes.benchmark.
+"""
+
+import sys
+
+from registry_codes.benchmark import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Builds the postgres extract schema and the SQLite database in one run,
+parsing each table once, see registry_codes.build
+"""
+
+from registry_codes.build import main
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
-from registry_codes.utils import create_table, load_data
-from registry_codes.schema import TABLE_MODEL_MAP, LARGE_TABLES
-from sqlalchemy import create_engine
-import argparse
+"""
+Builds the SQLite database, see registry_codes.build
+"""
 
+import argparse
+from pathlib import Path
 
-def create_db(output_db):
-    engine = create_engine(f"sqlite:///{output_db}")
-    return engine
+from registry_codes.build import (
+    add_load_arguments,
+    add_sqlite_arguments,
+    run_sqlite_build,
+)
+from registry_codes.instrumentation import (
+    add_report_arguments,
+    configure_logging,
+    write_reports,
+)
 
 
 def main():
@@ -14,21 +22,16 @@ def main():
         description="Build SQLite database from ukrdc-sqla models and CSV data"
     )
     parser.add_argument("output_db", help="Output SQLite database file path")
-    parser.add_argument("--large-tables", action="store_true", help="Load large tables")
+    add_load_arguments(parser)
+    add_sqlite_arguments(parser)
+    add_report_arguments(parser)
     args = parser.parse_args()
 
-    # Create SQLite engine
-    engine = create_db(args.output_db)
-
-    # Load list of folders
-    tables: list[str] = list(TABLE_MODEL_MAP.keys())
+    configure_logging(args.log_level)
 
-    if not args.large_tables:
-        tables = [table for table in tables if table not in LARGE_TABLES]
+    run_sqlite_build(args)
 
-    for table in tables:
-        create_table(table, engine)
-        load_data(table, engine)
+    write_reports(args, Path(args.output_db).with_name("build_sqlite.report.json"))
 
 
 if __name__ == "__main__":
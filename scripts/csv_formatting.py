@@ -1,73 +1,12 @@
 # fix_csv_whitespace.py
+"""
+Removes stray whitespace from the csv files under tables/, see
+registry_codes.csv_format. Pass --check to only report it.
+"""
 
-import os
-
-
-ROOT_DIRS = [
-    "../tables/code_map",
-    "../tables/code_list",
-    "../tables/code_exclusion",
-]
-
-
-def find_csv_files(root_dirs):
-    for root_dir in root_dirs:
-        for root, _, files in os.walk(root_dir):
-            for file in files:
-                if file.lower().endswith(".csv"):
-                    yield os.path.join(root, file)
-
-
-def clean_line(line):
-    # replace non-breaking spaces with normal spaces (or remove entirely)
-    line = line.replace("\u00a0", " ")
-
-    # remove leading whitespace
-    line = line.lstrip(" \t")
-
-    result = []
-    in_quotes = False
-    i = 0
-
-    while i < len(line):
-        char = line[i]
-
-        if char == '"':
-            in_quotes = not in_quotes
-            result.append(char)
-
-        elif char == "," and not in_quotes:
-            result.append(char)
-            i += 1
-
-            while i < len(line) and line[i] in (" ", "\t"):
-                i += 1
-
-            continue
-
-        else:
-            result.append(char)
-
-        i += 1
-
-    return "".join(result)
-
-
-def clean_file(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    cleaned = [clean_line(line) for line in lines]
-
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.writelines(cleaned)
-
-
-def main():
-    for filepath in find_csv_files(ROOT_DIRS):
-        print(f"Cleaning {filepath}")
-        clean_file(filepath)
+import sys
 
+from registry_codes.csv_format import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
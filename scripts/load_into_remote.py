@@ -1,7 +1,7 @@
 """
 Small utility script to load data into a table in an ad-hoc way by specifying a table and a
-db-url. Care should be taken in using this script as it failing can lead to all
-the data in a table being dropped.
+db-url. Only rows which differ from the csv files are inserted, updated or
+deleted, and all of the changes are applied in a single transaction.
 """
 
 import os
@@ -9,8 +9,10 @@ import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+from registry_codes.instrumentation import configure_logging
 from registry_codes.utils import load_data
 
+configure_logging()
 load_dotenv()
 URL = os.getenv("URL")
 TABLE_NAME = "code_list"
@@ -21,7 +23,7 @@ if not URL:
 engine = create_engine(URL)
 
 try:
-    inserted_rows = load_data(TABLE_NAME, engine)
-    print(f"Inserted {inserted_rows} rows into {TABLE_NAME}")
+    changed_rows = load_data(TABLE_NAME, engine, sync=True)
+    print(f"Inserted or updated {changed_rows} rows in {TABLE_NAME}")
 except Exception as e:
     print(f"Error loading data into {TABLE_NAME}: {e}")
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.schema import TABLE_MODEL_MAP
+
+
+@pytest.fixture(autouse=True)
+def restore_model_types():
+    """Put back column types tests change on the shared models, to stop that
+    leaking into other tests.
+    """
+    saved = [
+        (column, column.type)
+        for table_info in TABLE_MODEL_MAP.values()
+        for column in table_info["sqla_model"].__table__.columns  # type: ignore[attr-defined]
+    ]
+    yield
+    for column, column_type in saved:
+        column.type = column_type
+
+
+@pytest.fixture(scope="session")
+def postgres_url(tmp_path_factory):
+    """TEST_DATABASE_URL if set, otherwise a postgres server started for the
+    test session with pgserver, so the postgres tests always run.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+
+    import pgserver  # type: ignore[import-untyped]
+
+    server = pgserver.get_server(
+        tmp_path_factory.mktemp("pgdata"), cleanup_mode="delete"
+    )
+    yield server.get_uri().replace("postgresql://", "postgresql+psycopg://", 1)
+    server.cleanup()
+
+
+@pytest.fixture
+def postgres_engine(postgres_url):
+    """Engine for a throwaway postgres database. The registry tables are
+    dropped before and after each test so this must never point at anything
+    that matters.
+    """
+    engine = create_engine(postgres_url)
+
+    def drop_tables():
+        for table_info in reversed(TABLE_MODEL_MAP.values()):
+            table_info["sqla_model"].__table__.drop(engine, checkfirst=True)  # type: ignore[attr-defined]
+
+    drop_tables()
+    yield engine
+    drop_tables()
+    engine.dispose()
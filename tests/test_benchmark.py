@@ -0,0 +1,102 @@
+"""
+Synthetic tables should scale the real ones without their keys colliding,
+and a run should report every stage and flag slowdowns against a baseline.
+"""
+
+import json
+
+import pandas as pd
+
+from registry_codes.benchmark import (
+    compare,
+    main,
+    run_benchmarks,
+    write_synthetic_table,
+)
+from registry_codes.catalog import load_table
+from registry_codes.utils import clean_data
+
+
+def test_synthetic_table_scales_cleaned_rows(tmp_path, monkeypatch):
+    assert write_synthetic_table("code_list", 3, tmp_path) == 3 * len(
+        load_table("code_list")
+    )
+    cleaned = len(load_table("code_list", clean=True))
+
+    monkeypatch.chdir(tmp_path.parent)
+    tmp_path.rename(tmp_path.parent / "tables")
+    scaled = clean_data("code_list", load_table("code_list"))
+
+    assert len(scaled) == 3 * cleaned
+    assert scaled["code"].str.endswith("~2").sum() == cleaned
+
+
+def test_run_reports_each_stage(tmp_path):
+    report = run_benchmarks(["coding_standards"], scales=[1, 2], workdir=tmp_path)
+
+    results = pd.DataFrame(report["results"])
+    assert list(results["stage"].unique()) == ["read", "clean", "coerce", "insert"]
+    inserted = results[results["stage"] == "insert"].set_index("scale")["rows"]
+    assert inserted[2] == 2 * inserted[1]
+    assert (results["peak_memory_bytes"] > 0).any()
+
+    # Temporary files are cleaned up afterwards
+    assert list(tmp_path.iterdir()) == []
+
+
+def result(stage, seconds):
+    return {
+        "table": "code_list",
+        "scale": 10,
+        "stage": stage,
+        "rows": 1000,
+        "seconds": seconds,
+        "rows_per_second": 1000 / seconds,
+        "peak_memory_bytes": None,
+    }
+
+
+def test_compare_flags_slower_stages():
+    baseline = {"results": [result("read", 1.0), result("insert", 1.0)]}
+    report = {
+        "results": [
+            result("read", 1.1),
+            result("insert", 1.5),
+            # Not in the baseline
+            result("clean", 5.0),
+        ]
+    }
+
+    (regression,) = compare(baseline, report, threshold=0.2)  # type: ignore[arg-type]
+    assert regression["stage"] == "insert"
+    assert regression["ratio"] == 1.5
+
+
+def test_cli_writes_json_and_compares(tmp_path):
+    output = tmp_path / "results.json"
+    args = ["--table", "coding_standards", "--scales", "1", "--no-memory"]
+    assert main([*args, "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert len(report["results"]) == 4
+    assert all(r["peak_memory_bytes"] is None for r in report["results"])
+
+    # Against an impossibly fast baseline everything measurable regresses
+    for r in report["results"]:
+        r["seconds"] = 1e-6
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    assert (
+        main(
+            [
+                *args,
+                "--output",
+                str(output),
+                "--compare",
+                str(baseline),
+                "--min-seconds",
+                "0",
+            ]
+        )
+        == 1
+    )
@@ -0,0 +1,142 @@
+"""
+Tables read through the catalog should only be parsed again when their files
+change, in the same process or through the disk cache.
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from registry_codes import catalog
+from registry_codes.catalog import TableCatalog
+from registry_codes.utils import clean_data, load_data_to_df
+
+_TABLES = Path(__file__).parent.resolve() / ".." / "tables"
+
+
+@pytest.fixture
+def tables_dir(tmp_path, monkeypatch):
+    """Copy of coding_standards which can be modified freely"""
+    shutil.copytree(
+        _TABLES / "coding_standards", tmp_path / "tables" / "coding_standards"
+    )
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "tables" / "coding_standards"
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Tables parsed from the csv files"""
+    parsed = []
+
+    def counting_load(table_name, **kwargs):
+        parsed.append(table_name)
+        return load_data_to_df(table_name, **kwargs)
+
+    monkeypatch.setattr(catalog, "load_data_to_df", counting_load)
+    return parsed
+
+
+def rewrite(table_dir, description):
+    """Change the first description, same length so only the content differs"""
+    csv_file = table_dir / "coding_standards.csv"
+    stat = csv_file.stat()
+    df = pd.read_csv(csv_file, dtype=str)
+    assert len(description) == len(str(df.loc[0, "description"]))
+    df.loc[0, "description"] = description
+    df.to_csv(csv_file, index=False)
+    return csv_file, stat
+
+
+@pytest.mark.parametrize("typed", [False, True])
+def test_same_as_parsing(typed):
+    tables = TableCatalog()
+    expected = load_data_to_df("code_list", typed=typed)
+
+    pd.testing.assert_frame_equal(tables.get("code_list", typed=typed), expected)
+    pd.testing.assert_frame_equal(
+        tables.get("code_list", typed=typed, clean=True),
+        clean_data("code_list", expected),
+    )
+
+
+def test_parsed_once_and_copies_returned(tables_dir, parses):
+    tables = TableCatalog()
+
+    first = tables.get("coding_standards")
+    first.loc[0, "description"] = "changed"
+    second = tables.get("coding_standards")
+
+    assert parses == ["coding_standards"]
+    assert second.loc[0, "description"] != "changed"
+
+
+def test_parsed_once_across_threads(tables_dir, parses):
+    tables = TableCatalog()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: tables.get("coding_standards"), range(4)))
+
+    assert parses == ["coding_standards"]
+    assert all(result.equals(results[0]) for result in results)
+
+
+def test_changed_files_parsed_again(tables_dir, parses):
+    tables = TableCatalog()
+    tables.get("coding_standards")
+
+    rewrite(tables_dir, "x" * len(tables.get("coding_standards").description[0]))
+    assert tables.get("coding_standards").description[0].startswith("x")
+    assert parses == ["coding_standards"] * 2
+
+
+def test_hash_invalidation(tables_dir, parses):
+    by_mtime = TableCatalog()
+    by_hash = TableCatalog(invalidation="hash")
+    original = by_mtime.get("coding_standards").description[0]
+    by_hash.get("coding_standards")
+
+    # Same size and modification time, only the contents tell them apart
+    csv_file, stat = rewrite(tables_dir, "x" * len(original))
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert by_mtime.get("coding_standards").description[0] == original
+    assert by_hash.get("coding_standards").description[0].startswith("x")
+
+
+@pytest.mark.parametrize("cache_format", ["pickle", "parquet"])
+def test_shared_on_disk(tables_dir, tmp_path, parses, cache_format):
+    cache_dir = tmp_path / "cache"
+
+    expected = TableCatalog(cache_dir, cache_format=cache_format).get(
+        "coding_standards", typed=True, clean=True
+    )
+    # A new catalog, as another process would have
+    cached = TableCatalog(cache_dir, cache_format=cache_format).get(
+        "coding_standards", typed=True, clean=True
+    )
+
+    assert parses == ["coding_standards"]
+    pd.testing.assert_frame_equal(cached, expected)
+
+    rewrite(tables_dir, "x" * len(expected.description[0]))
+    TableCatalog(cache_dir, cache_format=cache_format).get(
+        "coding_standards", typed=True, clean=True
+    )
+
+    assert parses == ["coding_standards"] * 2
+    # The entry for the old files is replaced
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_unreadable_cache_parsed_again(tables_dir, tmp_path, parses):
+    cache_dir = tmp_path / "cache"
+    TableCatalog(cache_dir).get("coding_standards")
+    (cache_file,) = cache_dir.iterdir()
+    cache_file.write_bytes(b"not a pickle")
+
+    TableCatalog(cache_dir).get("coding_standards")
+    assert parses == ["coding_standards"] * 2
@@ -0,0 +1,184 @@
+"""
+The code_map closure should resolve chains of maps in one lookup.
+"""
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from registry_codes.catalog import load_table
+from registry_codes.closure import (
+    CLOSURE_TABLE,
+    build_code_map_closure,
+    closure_is_stale,
+    closure_table,
+    code_map_closure,
+    code_map_graph,
+    find_cycles,
+)
+from registry_codes.utils import create_table, load_data
+
+
+def code_map(*maps):
+    return pd.DataFrame(
+        [(*source.split(":"), *destination.split(":")) for source, destination in maps],
+        columns=[
+            "source_coding_standard",
+            "source_code",
+            "destination_coding_standard",
+            "destination_code",
+        ],
+    )
+
+
+def test_chain_resolved():
+    closure = code_map_closure(
+        code_map(("PV_RAW:mg", "PV:magnesium"), ("PV:magnesium", "LOINC:2601-3"))
+    )
+    pairs = closure["pairs"]
+
+    chained = pairs[pairs.source_coding_standard == "PV_RAW"].set_index(
+        "destination_coding_standard"
+    )
+    assert chained.loc["PV", "path_length"] == 1
+    assert chained.loc["LOINC", "destination_code"] == "2601-3"
+    assert chained.loc["LOINC", "path_length"] == 2
+    assert chained.loc["LOINC", "via"] == "PV"
+    assert not pairs.one_to_many.any()
+    assert not pairs.many_to_one.any()
+    assert closure["cycles"] == []
+
+
+def test_round_trips_excluded():
+    closure = code_map_closure(
+        code_map(
+            ("EDTA:10", "EDTA2:1377"),
+            ("EDTA2:1377", "EDTA:10"),
+            ("EDTA2:1377", "SNOMED:1"),
+            ("SNOMED:1", "EDTA2:1377"),
+        )
+    )
+    pairs = closure["pairs"]
+
+    assert not (pairs.source_coding_standard == pairs.destination_coding_standard).any()
+    edta = pairs[pairs.source_coding_standard == "EDTA"]
+    assert sorted(edta.destination_coding_standard) == ["EDTA2", "SNOMED"]
+    assert closure["cycles"] == [[("EDTA", "10"), ("EDTA2", "1377"), ("SNOMED", "1")]]
+
+
+def test_conflicts_flagged():
+    pairs = code_map_closure(
+        code_map(
+            ("A:1", "B:1"),
+            ("A:1", "B:2"),
+            ("B:1", "C:1"),
+            ("B:2", "C:2"),
+            ("A:2", "B:3"),
+        )
+    )["pairs"]
+
+    conflicted = pairs[pairs.one_to_many]
+    assert set(conflicted.source_code) == {"1"}
+    assert set(conflicted.source_coding_standard) == {"A"}
+    assert len(conflicted) == 4
+    assert not pairs.many_to_one.any()
+
+
+def test_many_to_one_flagged():
+    pairs = code_map_closure(
+        code_map(("A:1", "B:1"), ("A:2", "B:1"), ("A:3", "B:2"), ("B:1", "C:1"))
+    )["pairs"]
+
+    conflicted = pairs[pairs.many_to_one]
+    assert sorted(conflicted.source_code) == ["1", "1", "2", "2"]
+    assert set(conflicted.destination_code) == {"1"}
+    assert not pairs.one_to_many.any()
+
+
+def test_diamond_reaches_through_either_side():
+    # M:1 is reached through B first, which rules out going on to B:2, but
+    # the path through C can
+    pairs = code_map_closure(
+        code_map(
+            ("A:1", "B:1"),
+            ("A:1", "C:1"),
+            ("B:1", "M:1"),
+            ("C:1", "M:1"),
+            ("M:1", "B:2"),
+        )
+    )["pairs"]
+    reached = pairs[pairs.source_coding_standard == "A"].set_index(
+        ["destination_coding_standard", "destination_code"]
+    )
+
+    assert reached.loc[("B", "2"), "path_length"] == 3
+    assert reached.loc[("B", "2"), "via"] == "C > M"
+    # Codes reached both ways keep the shortest path found first
+    assert reached.loc[("M", "1"), "via"] == "B"
+
+
+def test_find_cycles_long_chain():
+    # Long enough to break a recursive implementation
+    maps = [(f"S{i}:x", f"S{i + 1}:x") for i in range(5000)]
+    graph = code_map_graph(code_map(*maps, ("S5000:x", "S0:x")))
+
+    cycles = find_cycles(graph)
+
+    assert len(cycles) == 1
+    assert len(cycles[0]) == 5001
+
+
+def test_every_map_in_closure():
+    df = load_table("code_map")
+    pairs = code_map_closure(df)["pairs"]
+
+    direct = pairs[pairs.path_length == 1]
+    key = [
+        "source_coding_standard",
+        "source_code",
+        "destination_coding_standard",
+        "destination_code",
+    ]
+    assert len(direct) == len(df.dropna(subset=key).drop_duplicates(subset=key))
+    assert not pairs.duplicated(subset=key).any()
+
+
+def assert_closure_built(engine):
+    for table_name in ["coding_standards", "code_map"]:
+        create_table(table_name, engine)
+        load_data(table_name, engine)
+
+    assert closure_is_stale(engine, [])
+    count = build_code_map_closure(engine)
+    assert not closure_is_stale(engine, [])
+    assert closure_is_stale(engine, ["code_map"])
+
+    result = pd.read_sql_query(
+        "SELECT destination_code, path_length, via FROM code_map_closure "
+        "WHERE source_coding_standard = 'PV_RAW' AND source_code = 'mg' "
+        "AND destination_coding_standard = 'LOINC'",
+        engine,
+    )
+    assert result.to_dict("records") == [
+        {"destination_code": "2601-3", "path_length": 2, "via": "PV"}
+    ]
+    total = pd.read_sql_query("SELECT COUNT(*) AS n FROM code_map_closure", engine)
+    assert total.n[0] == count
+
+
+def test_closure_with_old_columns_stale(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'closure'}.sqlite")
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE {CLOSURE_TABLE} (conflict BOOLEAN)"))
+
+    assert closure_is_stale(engine, [])
+
+
+def test_closure_table_sqlite(tmp_path):
+    assert_closure_built(create_engine(f"sqlite:///{tmp_path / 'closure'}.sqlite"))
+
+
+def test_closure_table_postgres(postgres_engine):
+    try:
+        assert_closure_built(postgres_engine)
+    finally:
+        closure_table().drop(postgres_engine, checkfirst=True)
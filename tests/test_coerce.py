@@ -0,0 +1,68 @@
+"""
+Parity checks between the per-row coerce_sqla_types and the column-wise
+coerce_dataframe used when loading tables.
+"""
+
+import pandas as pd
+import pytest
+
+from registry_codes.catalog import load_table
+from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.utils import (
+    clean_data,
+    coerce_dataframe,
+    coerce_sqla_types,
+)
+from ukrdc_sqla.ukrdc import Facility, RRDataDefinition
+
+LOADABLE_TABLES = [table for table in TABLE_MODEL_MAP if len(load_table(table)) > 0]
+
+
+def assert_parity(df, sqla_model):
+    expected = [
+        coerce_sqla_types(row.to_dict(), sqla_model) for _, row in df.iterrows()
+    ]
+    actual = coerce_dataframe(df, sqla_model).to_dict("records")
+
+    assert len(actual) == len(expected)
+    for row_num, (actual_row, expected_row) in enumerate(zip(actual, expected)):
+        assert actual_row == expected_row, f"Row {row_num} differs"
+        for key, value in expected_row.items():
+            assert type(actual_row[key]) is type(value), (
+                f"Row {row_num} column {key}: {type(actual_row[key])} != {type(value)}"
+            )
+
+
+@pytest.mark.parametrize("table_name", LOADABLE_TABLES)
+def test_coerce_dataframe_matches_rows(table_name):
+    df = clean_data(table_name, load_table(table_name), fill_creation_date=True)
+    assert_parity(df, TABLE_MODEL_MAP[table_name]["sqla_model"])
+
+
+def test_coerce_dataframe_edge_cases():
+    df = pd.DataFrame(
+        {
+            "facilitycode": ["A", "B", "C", ""],
+            "facilitycodestd": ["RR1+", None, "RR1+", "RR1+"],
+            "pkbout": ["True", "False", None, ""],
+            "pkbmsgexclusions": ['["ADT_A28"]', None, '["ADT_A28"]', ""],
+            "startdate": ["2020-01-01", "01/02/2021", None, "2020-01-01"],
+            "creation_date": [pd.Timestamp("2024-05-01 10:00")] * 3 + [pd.NaT],
+        },
+        dtype=object,
+    )
+    assert_parity(df, Facility)
+
+    df = pd.DataFrame(
+        {
+            "upload_key": ["A1", "A2", "A3", "A4"],
+            "load_min": ["1.5", "NULL", "", None],
+        },
+        dtype=object,
+    )
+    assert_parity(df, RRDataDefinition)
+
+
+def test_coerce_dataframe_unknown_column():
+    with pytest.raises(KeyError):
+        coerce_dataframe(pd.DataFrame({"not_a_column": ["x"]}), Facility)
@@ -0,0 +1,82 @@
+"""
+Whitespace should be removed from the csv files outside of quoted fields,
+and files only rewritten when that changes something.
+"""
+
+import pytest
+
+from registry_codes.csv_format import format_files, main, normalise_lines
+
+NBSP = "\u00a0"
+
+
+@pytest.mark.parametrize(
+    "line, expected, problems",
+    [
+        ("a,b\n", "a,b\n", []),
+        (" \ta, b,\tc\n", "a,b,c\n", ["leading whitespace", "whitespace after comma"]),
+        (
+            f"a,{NBSP}b{NBSP}c\n",
+            "a,b c\n",
+            ["non-breaking space", "whitespace after comma"],
+        ),
+        ('a,"x, y", b\r\n', 'a,"x, y",b\r\n', ["whitespace after comma"]),
+        (f'"{NBSP}x",y\n', f'"{NBSP}x",y\n', []),
+        ('"say ""hi"", ok", b\n', '"say ""hi"", ok",b\n', ["whitespace after comma"]),
+    ],
+)
+def test_normalise_line(line, expected, problems):
+    assert list(normalise_lines([line])) == [(expected, problems)]
+
+
+def test_quotes_carried_across_lines():
+    lines = ['a,"first\n', '  second, still quoted"\n', "  b, c\n"]
+
+    assert [line for line, _ in normalise_lines(lines)] == [
+        'a,"first\n',
+        '  second, still quoted"\n',
+        "b,c\n",
+    ]
+
+
+@pytest.fixture
+def tables_dir(tmp_path):
+    (tmp_path / "clean").mkdir()
+    (tmp_path / "clean" / "ok.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (tmp_path / "messy").mkdir()
+    (tmp_path / "messy" / "bad.csv").write_bytes(b"a, b\r\n 1,2\r\n")
+    (tmp_path / "messy" / "notes.txt").write_text(" not, csv\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_check_reports_without_writing(tables_dir, workers, capsys):
+    before = (tables_dir / "messy" / "bad.csv").read_bytes()
+
+    results = format_files([tables_dir], check=True, workers=workers)
+
+    assert [result["changed"] for result in results] == [False, True]
+    assert [issue["line"] for issue in results[1]["issues"]] == [1, 2]
+    assert (tables_dir / "messy" / "bad.csv").read_bytes() == before
+
+    assert main(["--check", str(tables_dir)]) == 1
+    assert f"{tables_dir / 'messy' / 'bad.csv'}:2: leading whitespace" in (
+        capsys.readouterr().out
+    )
+
+
+def test_only_changed_files_rewritten(tables_dir):
+    clean = tables_dir / "clean" / "ok.csv"
+    mtime = clean.stat().st_mtime_ns
+
+    assert main([str(tables_dir), "--workers", "1"]) == 0
+
+    assert (tables_dir / "messy" / "bad.csv").read_bytes() == b"a,b\r\n1,2\r\n"
+    assert clean.stat().st_mtime_ns == mtime
+    assert (tables_dir / "messy" / "notes.txt").read_text() == " not, csv\n"
+    # No temporary files left behind
+    assert sorted(p.name for p in (tables_dir / "messy").iterdir()) == [
+        "bad.csv",
+        "notes.txt",
+    ]
+    assert main(["--check", str(tables_dir)]) == 0
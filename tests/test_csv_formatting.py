@@ -6,11 +6,7 @@ import warnings
 import pandas as pd
 import pytest
 
-ROOT_DIRS = [
-    "../tables/code_map",
-    "../tables/code_list",
-    "../tables/code_exclusion",
-]
+from registry_codes.csv_format import TABLES_DIR, format_files
 
 
 def find_csv_files(root_dirs):
@@ -25,47 +21,20 @@ def find_csv_files(root_dirs):
     return csv_files
 
 
-def has_leading_whitespace(line):
-    return line.startswith((" ", "\t", "\u00a0"))
-
-
-def find_comma_whitespace_issues(line):
-    in_quotes = False
-
-    for i, char in enumerate(line):
-        if char == '"':
-            in_quotes = not in_quotes
-        elif char == "," and not in_quotes:
-            if i + 1 < len(line) and line[i + 1] in (" ", "\t", "\u00a0"):
-                return True
-
-    return False
-
-
-def check_file(filepath):
-    issues = []
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        for lineno, line in enumerate(f, start=1):
-            if has_leading_whitespace(line):
-                issues.append(f"{filepath}:{lineno} -> leading whitespace")
-
-            if find_comma_whitespace_issues(line):
-                issues.append(f"{filepath}:{lineno} -> whitespace after comma")
-
-    return issues
-
-
 def test_csv_whitespace():
-    csv_files = find_csv_files(ROOT_DIRS)
-
-    all_issues = []
+    results = format_files([TABLES_DIR], check=True, workers=1)
 
-    for file in csv_files:
-        all_issues.extend(check_file(file))
+    all_issues = [
+        f"{issue['file']}:{issue['line']} -> {', '.join(issue['problems'])}"
+        for result in results
+        for issue in result["issues"]
+    ]
 
     if all_issues:
-        pytest.fail("Whitespace issues found:\n" + "\n".join(all_issues))
+        pytest.fail(
+            "Whitespace issues found, fix with python -m registry_codes.csv_format:\n"
+            + "\n".join(all_issues)
+        )
 
 
 def check_column_count_mismatch(filepath):
@@ -85,7 +54,8 @@ def check_column_count_mismatch(filepath):
 
 
 def test_csv_column_count():
-    csv_files = find_csv_files(ROOT_DIRS)
+    csv_files = find_csv_files([TABLES_DIR])
+    assert csv_files, f"No csv files found under {TABLES_DIR}"
     all_issues = []
 
     for file in csv_files:
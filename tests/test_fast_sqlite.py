@@ -0,0 +1,131 @@
+"""
+Fast and in-memory sqlite builds should produce the same tables and only
+ever replace the output once complete.
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from registry_codes.fast_sqlite import fast_sqlite_build, memory_sqlite_build
+from registry_codes.utils import create_indexes, create_table, load_data
+from tests.test_insert import read_table
+
+TABLES = ["coding_standards", "code_list"]
+
+
+def build(engine, indexes=True):
+    for table_name in TABLES:
+        create_table(table_name, engine, indexes=indexes)
+        load_data(table_name, engine)
+        if not indexes:
+            create_indexes(table_name, engine)
+
+
+def test_fast_build_matches_normal(tmp_path):
+    normal = create_engine(f"sqlite:///{tmp_path / 'normal.sqlite'}")
+    build(normal)
+
+    output = tmp_path / "fast.sqlite"
+    with fast_sqlite_build(output) as engine:
+        build(engine, indexes=False)
+        # Nothing is visible at the output path until the build finishes
+        assert not output.exists()
+
+    fast = create_engine(f"sqlite:///{output}")
+    assert not (tmp_path / "fast.sqlite.building").exists()
+    for table_name in TABLES:
+        pd.testing.assert_frame_equal(
+            read_table(fast, table_name), read_table(normal, table_name)
+        )
+
+    with fast.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() != "off"
+        assert (
+            conn.exec_driver_sql("SELECT COUNT(*) FROM sqlite_stat1").scalar_one() > 0
+        )
+
+
+def test_failed_build_keeps_output(tmp_path):
+    output = tmp_path / "fast.sqlite"
+    with fast_sqlite_build(output) as engine:
+        build(engine, indexes=False)
+    before = output.read_bytes()
+
+    with pytest.raises(RuntimeError):
+        with fast_sqlite_build(output) as engine:
+            create_table("code_map", engine)
+            load_data("code_map", engine)
+            raise RuntimeError("build failed")
+
+    assert output.read_bytes() == before
+    assert not (tmp_path / "fast.sqlite.building").exists()
+    assert not inspect(create_engine(f"sqlite:///{output}")).has_table("code_map")
+
+
+def test_existing_tables_carried_over(tmp_path):
+    output = tmp_path / "fast.sqlite"
+    with fast_sqlite_build(output) as engine:
+        build(engine, indexes=False)
+
+    with fast_sqlite_build(output) as engine:
+        assert inspect(engine).has_table("code_list")
+
+
+def schema(path):
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT * FROM sqlite_master ORDER BY name").fetchall()
+    connection.close()
+    return rows
+
+
+def dump(path):
+    connection = sqlite3.connect(path)
+    lines = list(connection.iterdump())
+    connection.close()
+    return lines
+
+
+def test_memory_build_matches_normal(tmp_path):
+    normal = tmp_path / "normal.sqlite"
+    build(create_engine(f"sqlite:///{normal}"))
+
+    output = tmp_path / "memory.sqlite"
+    with memory_sqlite_build(output) as engine:
+        build(engine)
+        assert not output.exists()
+
+    assert not (tmp_path / "memory.sqlite.building").exists()
+    memory = create_engine(f"sqlite:///{output}")
+    for table_name in TABLES:
+        pd.testing.assert_frame_equal(
+            read_table(memory, table_name),
+            read_table(create_engine(f"sqlite:///{normal}"), table_name),
+        )
+    assert schema(output) == schema(normal)
+
+
+def test_failed_memory_build_writes_nothing(tmp_path):
+    output = tmp_path / "memory.sqlite"
+    with pytest.raises(RuntimeError):
+        with memory_sqlite_build(output) as engine:
+            build(engine)
+            raise RuntimeError("build failed")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_build_starts_from_output(tmp_path):
+    output = tmp_path / "memory.sqlite"
+    with memory_sqlite_build(output) as engine:
+        build(engine)
+    before = dump(output)
+
+    with memory_sqlite_build(output) as engine:
+        assert inspect(engine).has_table("code_list")
+        create_table("code_map", engine)
+
+    after = dump(output)
+    assert set(before) < set(after)
@@ -0,0 +1,69 @@
+"""
+Built databases should index unique_columns and the configured access paths.
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from registry_codes.schema import ACCESS_PATH_INDEXES, TABLE_MODEL_MAP, index_specs
+from registry_codes.utils import create_indexes, create_table, load_data
+
+TABLES = ["coding_standards", "code_exclusion", "code_map"]
+
+
+@pytest.mark.parametrize("table_name", list(TABLE_MODEL_MAP))
+def test_specs_skip_primary_key(table_name):
+    table = TABLE_MODEL_MAP[table_name]["sqla_model"].__table__
+    primary_key = [column.name for column in table.primary_key]
+
+    for spec in index_specs(table_name):
+        assert set(spec["columns"]) != set(primary_key)
+        assert spec["columns"] != primary_key[: len(spec["columns"])]
+        assert set(spec["columns"]) <= {column.name for column in table.columns}
+
+
+def test_unique_columns_and_access_paths_indexed():
+    assert index_specs("code_exclusion") == [
+        {
+            "name": "uq_code_exclusion_code_coding_standard",
+            "columns": ["code", "coding_standard"],
+            "unique": True,
+        }
+    ]
+    assert [spec["columns"] for spec in index_specs("code_map")] == ACCESS_PATH_INDEXES[
+        "code_map"
+    ]
+
+
+def assert_indexes_built(engine, indexes):
+    for table_name in TABLES:
+        create_table(table_name, engine, indexes=indexes)
+        load_data(table_name, engine)
+        if not indexes:
+            create_indexes(table_name, engine)
+
+    inspector = inspect(engine)
+    for table_name in TABLES:
+        built = {
+            index["name"]: (index["column_names"], bool(index["unique"]))
+            for index in inspector.get_indexes(table_name)
+        }
+        for spec in index_specs(table_name):
+            assert built[spec["name"]] == (spec["columns"], spec["unique"])
+
+
+@pytest.mark.parametrize("indexes", [True, False])
+def test_indexes_built_sqlite(tmp_path, indexes):
+    engine = create_engine(f"sqlite:///{tmp_path / 'indexes'}.sqlite")
+    assert_indexes_built(engine, indexes)
+
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM code_map "
+            "WHERE destination_coding_standard = 'LOINC' AND destination_code = 'x'"
+        ).all()
+    assert "ix_code_map_destination_coding_standard_destination_code" in str(plan)
+
+
+def test_indexes_built_after_load_postgres(postgres_engine):
+    assert_indexes_built(postgres_engine, indexes=False)
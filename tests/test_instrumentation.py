@@ -0,0 +1,100 @@
+"""
+Spans recorded while loading tables, and the reports written from them.
+"""
+
+import json
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.catalog import default_catalog
+from registry_codes.instrumentation import (
+    INSTRUMENTATION,
+    Instrumentation,
+    StageTimer,
+    prometheus_text,
+)
+from registry_codes.utils import create_table, load_data
+
+
+def test_span_records_rows_and_logs(caplog):
+    instrumentation = Instrumentation()
+    with caplog.at_level(logging.INFO, logger="registry_codes.instrumentation"):
+        with instrumentation.span("code_list", "read") as span:
+            span.rows = 10
+
+    (record,) = instrumentation.spans
+    assert record["table"] == "code_list"
+    assert record["rows"] == 10
+    assert record["seconds"] >= 0
+    assert "code_list read: 10 rows" in caplog.text
+
+
+def test_failed_span_not_recorded():
+    instrumentation = Instrumentation()
+    with pytest.raises(RuntimeError):
+        with instrumentation.span("code_list", "insert"):
+            raise RuntimeError("insert failed")
+    assert instrumentation.spans == []
+
+
+def test_stage_timer_sums_over_chunks():
+    instrumentation = Instrumentation()
+    timer = StageTimer("code_list", instrumentation)
+    for _ in range(3):
+        with timer.time("coerce", 5):
+            pass
+        with timer.time("insert", 5):
+            pass
+    timer.record()
+
+    assert [(s["stage"], s["rows"]) for s in instrumentation.spans] == [
+        ("coerce", 15),
+        ("insert", 15),
+    ]
+
+
+def test_reports(tmp_path):
+    instrumentation = Instrumentation()
+    for table, rows in (("code_list", 2), ("code_map", 3), ("code_map", 4)):
+        instrumentation.record(table, "insert", 0.5, rows)
+    instrumentation.record('odd"table', "read", 0.25, 1)
+    (tmp_path / "codes.sqlite").write_bytes(b"x" * 100)
+    instrumentation.record_output(tmp_path / "codes.sqlite")
+
+    report = instrumentation.write_json(tmp_path / "out" / "report.json")
+    assert json.loads((tmp_path / "out" / "report.json").read_text()) == report
+    assert report["stages"] == [
+        {"stage": "read", "seconds": 0.25, "rows": 1},
+        {"stage": "insert", "seconds": 1.5, "rows": 9},
+    ]
+
+    text = prometheus_text(report)
+    # Repeated spans become one series
+    assert (
+        'registry_codes_build_stage_rows{table="code_map",stage="insert"} 7\n' in text
+    )
+    assert 'table="odd\\"table"' in text
+    assert "registry_codes_build_output_bytes{path=" in text
+    assert report["outputs"] == [{"path": str(tmp_path / "codes.sqlite"), "bytes": 100}]
+    assert text.count("# TYPE registry_codes_build_stage_seconds gauge") == 1
+
+
+def test_load_records_each_stage(tmp_path):
+    # Make sure the table is parsed rather than handed out from memory
+    default_catalog().clear()
+    INSTRUMENTATION.clear()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+    create_table("code_list", engine)
+    rows = load_data("code_list", engine, bulk=True)
+
+    spans = {
+        span["stage"]: span
+        for span in INSTRUMENTATION.spans
+        if span["table"] == "code_list"
+    }
+    assert list(spans) == ["read", "clean", "delete", "coerce", "insert", "commit"]
+    assert spans["insert"]["rows"] == rows
+    assert spans["read"]["rows"] > rows
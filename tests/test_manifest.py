@@ -0,0 +1,81 @@
+"""
+Tables should only be rebuilt when their csv files or models change.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import String, create_engine
+
+from registry_codes.manifest import (
+    hash_table_inputs,
+    record_manifest,
+    schema_fingerprint,
+    tables_to_build,
+)
+from registry_codes.schema import TABLE_MODEL_MAP
+
+_TABLES = Path(__file__).parent.resolve() / ".." / "tables"
+TABLES = ["coding_standards", "code_list", "facility_new"]
+
+
+@pytest.fixture
+def tables_dir(tmp_path, monkeypatch):
+    """Copy of the tables directory which can be modified freely"""
+    for table_name in TABLES:
+        shutil.copytree(_TABLES / table_name, tmp_path / "tables" / table_name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "tables"
+
+
+def record_all(engine):
+    for table_name, entry in tables_to_build(TABLES, engine).items():
+        record_manifest(engine, table_name, entry)
+
+
+def test_everything_built_without_manifest(tables_dir, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'manifest'}.sqlite")
+    assert list(tables_to_build(TABLES, engine)) == TABLES
+
+
+def test_unchanged_tables_skipped(tables_dir, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'manifest'}.sqlite")
+    record_all(engine)
+
+    assert tables_to_build(TABLES, engine) == {}
+    assert list(tables_to_build(TABLES, engine, force=True)) == TABLES
+
+
+def test_changed_table_and_dependents_rebuilt(tables_dir, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'manifest'}.sqlite")
+    record_all(engine)
+
+    with open(tables_dir / "code_list" / "ukrdc.csv", "a", encoding="utf-8") as f:
+        f.write("UKRDC,NEW_CODE,New code,,,,\n")
+
+    assert list(tables_to_build(TABLES, engine)) == ["code_list", "facility_new"]
+
+
+def test_hash_ignores_file_order(tables_dir):
+    before = hash_table_inputs("code_list")
+
+    # Recreating the files changes directory order on most filesystems
+    for filepath in sorted((tables_dir / "code_list").glob("*.csv"), reverse=True):
+        content = filepath.read_bytes()
+        filepath.unlink()
+        filepath.write_bytes(content)
+
+    assert hash_table_inputs("code_list") == before
+
+
+def test_schema_change_detected():
+    column = TABLE_MODEL_MAP["code_list"]["sqla_model"].__table__.c.description
+    before = schema_fingerprint("code_list")
+    dependent_before = schema_fingerprint("facility_new")
+
+    column.type = String(512)
+
+    # restore_model_types in conftest puts the original type back afterwards
+    assert schema_fingerprint("code_list") != before
+    assert schema_fingerprint("facility_new") != dependent_before
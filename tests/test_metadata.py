@@ -0,0 +1,115 @@
+"""
+Every target gets its own copy of the model tables, so building one never
+changes the shared models or what another target builds.
+"""
+
+import argparse
+
+import pandas as pd
+import pytest
+from sqlalchemy import Integer, Table, create_engine, text
+from sqlalchemy.dialects.postgresql import BIT
+
+from registry_codes.build import build_postgres, build_sqlite
+from registry_codes.catalog import default_catalog
+from registry_codes.instrumentation import INSTRUMENTATION
+from registry_codes.metadata import target_model, target_table
+from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.utils import create_table, load_data
+from tests.test_insert import TABLES
+
+
+def model_state():
+    state = {}
+    for table_name, table_info in TABLE_MODEL_MAP.items():
+        table: Table = table_info["sqla_model"].__table__  # type: ignore[assignment]
+        state[table_name] = (
+            table.schema,
+            [repr(column.type) for column in table.columns],
+            sorted(str(index.name) for index in table.indexes),
+        )
+    return state
+
+
+def test_building_leaves_models_alone(tmp_path):
+    before = model_state()
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+    for table_name in TABLES:
+        create_table(table_name, engine)
+        load_data(table_name, engine)
+
+    assert model_state() == before
+
+
+def test_tables_for_each_target():
+    sqlite = create_engine("sqlite://")
+    postgres = create_engine("postgresql+psycopg://")
+
+    assert isinstance(target_table("modality_codes", sqlite).c.acute.type, Integer)
+    assert isinstance(target_table("modality_codes", postgres).c.acute.type, BIT)
+
+    extract = target_table("code_list", postgres, "extract")
+    assert extract.schema == "extract"
+    (foreign_key,) = extract.foreign_keys
+    assert foreign_key.column.table is target_table(
+        "coding_standards", postgres, "extract"
+    )
+    assert target_table("code_list", postgres) is not extract
+
+    gp_type = target_table("ukrdc_ods_gp_codes", postgres, "extract").c.type.type
+    assert gp_type.schema == "extract"  # type: ignore[attr-defined]
+
+
+def test_target_model_keeps_attribute_names():
+    engine = create_engine("sqlite://")
+    model = TABLE_MODEL_MAP["rr_data_definition"]["sqla_model"]
+    target = target_model("rr_data_definition", engine)
+
+    assert list(target.__mapper__.columns.keys()) == list(  # type: ignore[attr-defined]
+        model.__mapper__.columns.keys()
+    )
+    assert target.__table__ is target_table("rr_data_definition", engine)  # type: ignore[attr-defined]
+
+
+@pytest.fixture
+def extract_engine(postgres_engine):
+    def drop_extract():
+        with postgres_engine.begin() as conn:
+            conn.execute(text('DROP SCHEMA IF EXISTS "extract" CASCADE'))
+            conn.execute(text('ALTER DATABASE "postgres" RESET search_path'))
+
+    drop_extract()
+    yield postgres_engine
+    drop_extract()
+
+
+def test_both_targets_in_one_process(tmp_path, extract_engine):
+    default_catalog().clear()
+    INSTRUMENTATION.clear()
+    args = argparse.Namespace(
+        bulk=True,
+        chunksize=1000,
+        copy=True,
+        csv_engine="c",
+        force=False,
+        workers=1,
+        large_tables=False,
+        sync=False,
+        fast=False,
+    )
+
+    build_postgres(extract_engine, args)
+    sqlite = create_engine(f"sqlite:///{tmp_path / 'codes.sqlite'}")
+    build_sqlite(sqlite, args)
+
+    for table_name in TABLES:
+        built = pd.read_sql_query(
+            f'SELECT * FROM "extract"."{table_name}"', extract_engine
+        )
+        assert len(built) == len(
+            pd.read_sql_query(f"SELECT * FROM {table_name}", sqlite)
+        )
+
+    # The sqlite build was handed the tables postgres parsed
+    reads = [span["table"] for span in INSTRUMENTATION.spans if span["stage"] == "read"]
+    assert sorted(reads) == sorted(TABLES)
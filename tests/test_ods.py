@@ -0,0 +1,278 @@
+"""
+The ODS extracts should be processed a chunk at a time into the same file as
+reading them whole, with each field kept in its own column.
+"""
+
+import random
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.manifest import (
+    hash_table_inputs,
+    manifest_table,
+    record_manifest,
+    tables_to_build,
+)
+from registry_codes.ods import (
+    EXTRACTS,
+    ODS_TABLE,
+    OUTPUT_COLUMNS,
+    OUTPUT_FILE,
+    ods_delta,
+    process_ods,
+    read_delta,
+    refresh_from_delta,
+)
+from registry_codes.utils import create_table, drop_table, load_data
+from tests.test_insert import read_table
+
+EXTRACT_WIDTH = 27
+
+
+def synthetic_extract(prefix, rows, seed):
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        record = [f"col{j}-{i}" for j in range(EXTRACT_WIDTH)]
+        record[0] = f"{prefix}{i:06d}"
+        record[1] = f"{prefix} SURGERY {i} " + "X" * rng.randint(0, 60)
+        record[4] = f"{i} HIGH STREET, " + "Y" * rng.randint(0, 40)
+        record[9] = rng.choice([f"AB{i % 10} 1CD", "", "NA"])
+        record[17] = rng.choice(["01234 567890", "", "012345678901234"])
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def expected_output(ods_dir):
+    """Reading the extracts whole, the way the script used to"""
+    frames = []
+    for code_type, filename in EXTRACTS.items():
+        df = pd.read_csv(
+            ods_dir / filename, header=None, dtype=str, keep_default_na=False
+        )
+        df = df.iloc[:, [0, 1, 4, 9, 17]]
+        df.columns = OUTPUT_COLUMNS[:-1]
+        df = df.assign(type=code_type)
+        df["name"] = df["name"].str[:50]
+        df["address1"] = df["address1"].str[:35]
+        df["phone"] = df["phone"].str[:12]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def ods_dir(tmp_path):
+    ods_dir = tmp_path / "tables" / "ukrdc_ods_gp_codes"
+    ods_dir.mkdir(parents=True)
+    synthetic_extract("G", 250, seed=1).to_csv(
+        ods_dir / EXTRACTS["GP"], header=False, index=False
+    )
+    synthetic_extract("P", 120, seed=2).to_csv(
+        ods_dir / EXTRACTS["PRACTICE"], header=False, index=False
+    )
+    return ods_dir
+
+
+@pytest.mark.parametrize("chunksize", [7, 100_000])
+def test_chunked_matches_whole(ods_dir, chunksize):
+    expected = expected_output(ods_dir)
+
+    assert process_ods(ods_dir, chunksize=chunksize) == 370
+
+    output = pd.read_csv(ods_dir / OUTPUT_FILE, dtype=str, keep_default_na=False)
+    pd.testing.assert_frame_equal(output, expected)
+    assert not any((ods_dir / filename).exists() for filename in EXTRACTS.values())
+
+
+def test_fields_not_shifted(ods_dir):
+    process_ods(ods_dir, remove_extracts=False)
+
+    output = pd.read_csv(ods_dir / OUTPUT_FILE, dtype=str, keep_default_na=False)
+    first = output.iloc[0]
+    assert first["name"].startswith("G SURGERY 0")
+    assert first["address1"].startswith("0 HIGH STREET")
+    assert output["postcode"].isin(["", "NA"] + [f"AB{i} 1CD" for i in range(10)]).all()
+    assert (ods_dir / EXTRACTS["GP"]).exists()
+
+
+def test_failed_run_keeps_output(ods_dir):
+    (ods_dir / OUTPUT_FILE).write_text("previous\n", encoding="utf-8")
+    (ods_dir / EXTRACTS["PRACTICE"]).unlink()
+
+    with pytest.raises(FileNotFoundError):
+        process_ods(ods_dir)
+
+    assert (ods_dir / OUTPUT_FILE).read_text(encoding="utf-8") == "previous\n"
+    assert sorted(path.name for path in ods_dir.iterdir()) == sorted(
+        [EXTRACTS["GP"], OUTPUT_FILE]
+    )
+
+
+def test_output_loads(ods_dir, tmp_path, monkeypatch):
+    process_ods(ods_dir)
+    monkeypatch.chdir(tmp_path)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ods.sqlite'}")
+    create_table("ukrdc_ods_gp_codes", engine)
+    assert load_data("ukrdc_ods_gp_codes", engine) == 370
+
+
+def write_extracts(ods_dir, gp, practice):
+    gp.to_csv(ods_dir / EXTRACTS["GP"], header=False, index=False)
+    practice.to_csv(ods_dir / EXTRACTS["PRACTICE"], header=False, index=False)
+
+
+def next_week(extract):
+    """Two practices closed, one renamed, one with a new phone number and one
+    opened
+    """
+    extract = extract.drop(index=[3, 4]).copy()
+    extract.loc[5, 1] = "RENAMED SURGERY"
+    extract.loc[6, 17] = "NULL"
+    opened = extract.loc[[7]].copy()
+    opened[0] = "G999999"
+    return pd.concat([extract, opened], ignore_index=True)
+
+
+def test_delta_between_snapshots():
+    columns = ["code", "name", "address1", "postcode", "phone", "type"]
+    previous = pd.DataFrame(
+        [["A", "a", "", "", "", "GP"], ["B", "b", "", "", "", "GP"]], columns=columns
+    )
+    current = pd.DataFrame(
+        [["B", "b2", "", "", "", "GP"], ["C", "c", "", "", "", "GP"]], columns=columns
+    )
+
+    delta = ods_delta(previous, current)
+
+    assert delta[["code", "name", "change"]].values.tolist() == [
+        ["A", "a", "closed"],
+        ["B", "b2", "changed"],
+        ["C", "c", "added"],
+    ]
+    assert ods_delta(current, current).empty
+
+
+def test_delta_written_against_snapshot(ods_dir, monkeypatch):
+    monkeypatch.chdir(ods_dir.parents[1])
+    gp = synthetic_extract("G", 50, seed=1)
+    practice = synthetic_extract("P", 20, seed=2)
+    write_extracts(ods_dir, gp, practice)
+
+    process_ods(ods_dir)
+    # The first output has nothing to compare against
+    assert read_delta(ods_dir) is None
+    first_hash = hash_table_inputs(ODS_TABLE)
+
+    write_extracts(ods_dir, next_week(gp), practice)
+    process_ods(ods_dir)
+
+    found = read_delta(ods_dir)
+    assert found is not None
+    info, delta = found
+    assert (info["added"], info["changed"], info["closed"]) == (1, 2, 2)
+    assert info["base_hash"] == first_hash
+    assert info["target_hash"] == hash_table_inputs(ODS_TABLE)
+    assert set(delta.loc[delta.change == "changed", "code"]) == {"G000005", "G000006"}
+    # Parsed the way a load would parse it
+    assert delta.loc[delta.code == "G000006", "phone"].isna().all()
+
+
+@pytest.fixture
+def loaded(ods_dir, tmp_path, monkeypatch):
+    """A database loaded from the first week's extracts"""
+    monkeypatch.chdir(tmp_path)
+    gp = synthetic_extract("G", 50, seed=1)
+    write_extracts(ods_dir, gp, synthetic_extract("P", 20, seed=2))
+    process_ods(ods_dir)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ods.sqlite'}")
+    build_ods(engine)
+    return engine, gp
+
+
+def build_ods(engine):
+    for table_name, entry in tables_to_build([ODS_TABLE], engine).items():
+        if not refresh_from_delta(engine, entry):
+            drop_table(table_name, engine)
+            create_table(table_name, engine)
+            load_data(table_name, engine)
+            record_manifest(engine, table_name, entry)
+
+
+def dates(engine, code):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT creation_date, update_date FROM ukrdc_ods_gp_codes WHERE code = ?",
+            (code,),
+        ).one()
+
+
+def test_delta_applied_matches_reload(loaded, ods_dir, tmp_path):
+    engine, gp = loaded
+    write_extracts(ods_dir, next_week(gp), synthetic_extract("P", 20, seed=2))
+    process_ods(ods_dir)
+
+    before = dates(engine, "G000005")
+    entry = tables_to_build([ODS_TABLE], engine)[ODS_TABLE]
+    assert refresh_from_delta(engine, entry)
+    assert tables_to_build([ODS_TABLE], engine) == {}
+
+    reloaded = create_engine(f"sqlite:///{tmp_path / 'reloaded.sqlite'}")
+    build_ods(reloaded)
+
+    columns = OUTPUT_COLUMNS
+    pd.testing.assert_frame_equal(
+        read_table(engine, ODS_TABLE)[columns].sort_values("code", ignore_index=True),
+        read_table(reloaded, ODS_TABLE)[columns].sort_values("code", ignore_index=True),
+    )
+    # Changed rows keep their creation date but get a new update date
+    after = dates(engine, "G000005")
+    assert after[0] == before[0]
+    assert after[1] > before[1]
+
+
+def test_delta_skipped_when_database_behind(loaded, ods_dir):
+    engine, gp = loaded
+    practice = synthetic_extract("P", 20, seed=2)
+
+    # Two new extracts without building in between, the delta is only from
+    # the second
+    write_extracts(ods_dir, next_week(gp), practice)
+    process_ods(ods_dir)
+    write_extracts(ods_dir, next_week(next_week(gp)), practice)
+    process_ods(ods_dir)
+
+    entry = tables_to_build([ODS_TABLE], engine)[ODS_TABLE]
+    assert not refresh_from_delta(engine, entry)
+
+
+def test_delta_applied_postgres(postgres_engine, ods_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gp = synthetic_extract("G", 50, seed=1)
+    practice = synthetic_extract("P", 20, seed=2)
+    write_extracts(ods_dir, gp, practice)
+    process_ods(ods_dir)
+
+    try:
+        build_ods(postgres_engine)
+        write_extracts(ods_dir, next_week(gp), practice)
+        process_ods(ods_dir)
+
+        entry = tables_to_build([ODS_TABLE], postgres_engine)[ODS_TABLE]
+        assert refresh_from_delta(postgres_engine, entry)
+
+        reloaded = create_engine(f"sqlite:///{tmp_path / 'reloaded.sqlite'}")
+        build_ods(reloaded)
+        pd.testing.assert_frame_equal(
+            read_table(postgres_engine, ODS_TABLE)[OUTPUT_COLUMNS]
+            .sort_values("code", ignore_index=True)
+            .astype(object),
+            read_table(reloaded, ODS_TABLE)[OUTPUT_COLUMNS]
+            .sort_values("code", ignore_index=True)
+            .astype(object),
+        )
+    finally:
+        manifest_table().drop(postgres_engine, checkfirst=True)
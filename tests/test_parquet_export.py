@@ -0,0 +1,149 @@
+"""
+Parquet files should hold the same rows as the catalog hands the databases,
+typed from the models, and a build should write every target at once.
+"""
+
+import argparse
+
+import pandas as pd
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+import pytest
+from sqlalchemy import text
+
+from registry_codes.build import build_targets
+from registry_codes.catalog import default_catalog, load_table
+from registry_codes.instrumentation import INSTRUMENTATION
+from registry_codes.parquet_export import export_parquet, export_table
+from registry_codes.schema import TABLE_MODEL_MAP
+from tests.test_insert import TABLES
+
+
+def test_types_from_model(tmp_path):
+    path = export_table("facility_new", tmp_path)
+    schema = pq.read_schema(path)
+
+    assert schema.field("pkbout").type == pa.bool_()
+    assert schema.field("pkbmsgexclusions").type == pa.list_(pa.string())
+    assert schema.field("startdate").type == pa.timestamp("us")
+    assert schema.field("firstdataquarter").type == pa.int64()
+    assert schema.field("facilitycode").type == pa.string()
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def _values(series: pd.Series) -> list:
+    return [None if pd.isna(value) else value for value in series]
+
+
+@pytest.mark.parametrize("table_name", ["code_list", "code_map", "rr_codes"])
+def test_matches_catalog(tmp_path, table_name):
+    path = export_table(table_name, tmp_path)
+    df = load_table(table_name, typed=True, clean=True)
+    written = pq.read_table(path, memory_map=True).to_pandas()
+
+    assert len(written) == len(df)
+    # Written under the column names in the databases
+    columns = TABLE_MODEL_MAP[table_name]["sqla_model"].__mapper__.columns
+    for key in df.columns:
+        assert _values(written[columns[key].name]) == _values(df[key])
+
+
+def test_streamed_keeps_first_across_chunks(tmp_path, monkeypatch):
+    table_dir = tmp_path / "tables" / "ukrdc_ods_gp_codes"
+    table_dir.mkdir(parents=True)
+    pd.DataFrame(
+        {
+            "code": ["G1", "G2", None, "G1", "G3", "G2"],
+            "name": ["first", "first", "no code", "second", "first", "second"],
+            "type": "GP",
+        }
+    ).to_csv(table_dir / "gp.csv", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    path = export_table("ukrdc_ods_gp_codes", tmp_path / "out", read_chunksize=2)
+    written = pq.read_table(path).to_pandas()
+
+    assert written["code"].tolist() == ["G1", "G2", "G3"]
+    assert written["name"].tolist() == ["first"] * 3
+
+
+def test_streamed_without_files(tmp_path, monkeypatch):
+    (tmp_path / "tables" / "ukrdc_ods_gp_codes").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+
+    path = export_table("ukrdc_ods_gp_codes", tmp_path)
+    written = pq.read_table(path)
+
+    assert written.num_rows == 0
+    assert "code" in written.column_names
+
+
+def test_failed_write_leaves_old_file(tmp_path, monkeypatch):
+    path = export_table("coding_standards", tmp_path)
+    before = path.read_bytes()
+
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pq, "write_table", broken)
+    with pytest.raises(OSError):
+        export_table("coding_standards", tmp_path)
+
+    assert path.read_bytes() == before
+    assert [p.name for p in tmp_path.iterdir()] == ["coding_standards.parquet"]
+
+
+def test_export_every_table(tmp_path):
+    paths = export_parquet(tmp_path / "parquet", tables=TABLES, workers=3)
+
+    assert sorted(path.stem for path in paths) == sorted(TABLES)
+    for path in paths:
+        pq.read_table(path, memory_map=True)
+
+
+@pytest.fixture
+def extract_engine(postgres_engine):
+    def drop_extract():
+        with postgres_engine.begin() as conn:
+            conn.execute(text('DROP SCHEMA IF EXISTS "extract" CASCADE'))
+            conn.execute(text('ALTER DATABASE "postgres" RESET search_path'))
+
+    drop_extract()
+    yield postgres_engine
+    drop_extract()
+
+
+def test_all_targets_at_once(tmp_path, extract_engine):
+    default_catalog().clear()
+    INSTRUMENTATION.clear()
+    args = argparse.Namespace(
+        output_db=str(tmp_path / "codes.sqlite"),
+        parquet=str(tmp_path / "parquet"),
+        bulk=True,
+        chunksize=1000,
+        copy=True,
+        csv_engine="c",
+        force=False,
+        workers=2,
+        large_tables=False,
+        sync=False,
+        fast=False,
+        memory=True,
+        staging=False,
+    )
+
+    build_targets(extract_engine, args)
+
+    for table_name in TABLES:
+        rows = pq.read_table(tmp_path / "parquet" / f"{table_name}.parquet").num_rows
+        with extract_engine.connect() as conn:
+            assert (
+                conn.execute(
+                    text(f'SELECT COUNT(*) FROM "extract"."{table_name}"')
+                ).scalar_one()
+                == rows
+            )
+
+    # However the targets raced, each table was parsed once
+    reads = [span["table"] for span in INSTRUMENTATION.spans if span["stage"] == "read"]
+    assert sorted(reads) == sorted(TABLES)
@@ -0,0 +1,55 @@
+"""
+Csv files for a table are read in parallel but must always be combined in
+filename order.
+"""
+
+import pandas as pd
+import pytest
+
+from registry_codes.utils import clean_data, load_data_to_df
+
+
+@pytest.fixture
+def tables_dir(tmp_path, monkeypatch):
+    table_dir = tmp_path / "tables" / "coding_standards"
+    table_dir.mkdir(parents=True)
+
+    # Written out of order so directory order (usually creation order) differs
+    # from filename order
+    for name in ["c.csv", "a.csv", "b.csv"]:
+        (table_dir / name).write_text(
+            f"coding_standard,description\nSHARED,From {name}\n{name},Only\n",
+            encoding="utf-8",
+        )
+
+    monkeypatch.chdir(tmp_path)
+    return table_dir
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_files_combined_in_name_order(tables_dir, workers):
+    df = load_data_to_df("coding_standards", workers=workers)
+
+    assert df["coding_standard"].tolist() == [
+        "SHARED",
+        "a.csv",
+        "SHARED",
+        "b.csv",
+        "SHARED",
+        "c.csv",
+    ]
+
+
+def test_duplicates_keep_first_file(tables_dir):
+    df = clean_data("coding_standards", load_data_to_df("coding_standards"))
+
+    shared = df[df["coding_standard"] == "SHARED"]
+    assert shared["description"].tolist() == ["From a.csv"]
+
+
+def test_parallel_read_matches_serial():
+    for table_name in ["code_list", "code_map"]:
+        pd.testing.assert_frame_equal(
+            load_data_to_df(table_name, typed=True, workers=8),
+            load_data_to_df(table_name, typed=True, workers=1),
+        )
@@ -0,0 +1,86 @@
+"""
+CodeRegistry lookups should agree with the tables they are loaded from.
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.catalog import load_table
+from registry_codes.registry import CodeRegistry
+from registry_codes.utils import create_table, load_data
+
+TABLES = ["coding_standards", "code_list", "code_exclusion"]
+CODE_LIST = load_table("code_list", clean=True)
+CODE_EXCLUSION = load_table("code_exclusion")
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return CodeRegistry.from_csv()
+
+
+def test_every_code_described(registry):
+    for row in CODE_LIST.itertuples():
+        assert registry.exists(row.coding_standard, row.code)
+        expected = None if isinstance(row.description, float) else row.description
+        assert registry.describe(row.coding_standard, row.code) == expected
+
+
+def test_unknown_codes(registry):
+    assert not registry.exists("PV", "NOT_A_CODE")
+    assert registry.describe("PV", "NOT_A_CODE") is None
+    assert registry.codes("NOT_A_STANDARD") == ()
+
+
+def test_exclusions(registry):
+    for row in CODE_EXCLUSION.itertuples():
+        assert registry.is_excluded(row.system, row.coding_standard, row.code)
+        assert not registry.is_excluded("OTHER", row.coding_standard, row.code)
+
+
+def test_codes_per_standard(registry):
+    pv_codes = CODE_LIST[CODE_LIST.coding_standard == "PV"]["code"]
+    assert registry.codes("PV") == tuple(sorted(pv_codes))
+    assert set(registry.coding_standards()) >= set(CODE_LIST.coding_standard)
+
+
+def test_batch_lookups_match_single(registry):
+    standards = np.array(list(CODE_LIST.coding_standard) + ["PV", None], dtype=object)
+    codes = np.array(list(CODE_LIST.code) + ["NOT_A_CODE", "X"], dtype=object)
+
+    descriptions = registry.describe_many(standards, codes)
+    exists = registry.exists_many(standards, codes)
+
+    assert list(descriptions) == [
+        registry.describe(standard, code) for standard, code in zip(standards, codes)
+    ]
+    assert exists.tolist() == [True] * len(CODE_LIST) + [False, False]
+
+
+def test_batch_broadcasts_single_values(registry):
+    row = CODE_EXCLUSION.iloc[0]
+    excluded = registry.is_excluded_many(
+        row.system, row.coding_standard, [row.code, "NOT_A_CODE"]
+    )
+    assert excluded.tolist() == [True, False]
+
+
+def test_sqlite_matches_csv(registry, tmp_path):
+    path = tmp_path / "registry.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    for table_name in TABLES:
+        create_table(table_name, engine)
+        load_data(table_name, engine)
+    engine.dispose()
+
+    from_sqlite = CodeRegistry.from_sqlite(path)
+
+    assert from_sqlite.coding_standards() == registry.coding_standards()
+    for standard in registry.coding_standards():
+        assert from_sqlite.codes(standard) == registry.codes(standard)
+    codes = CODE_LIST.code.to_numpy()
+    standards = CODE_LIST.coding_standard.to_numpy()
+    assert list(from_sqlite.describe_many(standards, codes)) == list(
+        registry.describe_many(standards, codes)
+    )
@@ -0,0 +1,107 @@
+"""
+Parallel table loading must respect the declared dependencies.
+"""
+
+import threading
+
+import pytest
+
+from registry_codes.scheduler import check_for_cycles, run_in_dependency_order
+from registry_codes.schema import TABLE_MODEL_MAP
+
+
+def table_info(dependencies):
+    return {
+        "sqla_model": None,
+        "excluded_columns": [],
+        "unique_columns": [],
+        "dependencies": dependencies,
+    }
+
+
+def test_dependencies_cover_foreign_keys():
+    """Every foreign key between registry tables needs declaring, otherwise
+    tables can be loaded before the ones they refer to.
+    """
+    table_names = {
+        info["sqla_model"].__tablename__: name for name, info in TABLE_MODEL_MAP.items()
+    }
+
+    for table_name, table_info in TABLE_MODEL_MAP.items():
+        table = table_info["sqla_model"].__table__
+        for foreign_key in table.foreign_keys:
+            referenced = table_names.get(foreign_key.column.table.name)
+            if referenced and referenced != table_name:
+                assert referenced in table_info["dependencies"], (
+                    f"{table_name} refers to {referenced} but doesn't depend on it"
+                )
+
+
+def test_table_map_has_no_cycles():
+    check_for_cycles(
+        {name: set(info["dependencies"]) for name, info in TABLE_MODEL_MAP.items()}
+    )
+
+
+def test_dependents_wait_for_dependencies():
+    events = []
+    lock = threading.Lock()
+
+    def load_table(table):
+        with lock:
+            events.append(("start", table))
+        with lock:
+            events.append(("end", table))
+
+    tables = list(TABLE_MODEL_MAP)
+    run_in_dependency_order(tables, load_table, workers=4)
+
+    for table in tables:
+        start = events.index(("start", table))
+        for dependency in TABLE_MODEL_MAP[table]["dependencies"]:
+            assert events.index(("end", dependency)) < start
+
+
+def test_independent_tables_run_together():
+    # Both tables have to be running at once for the barrier to release
+    barrier = threading.Barrier(2, timeout=5)
+    tables_dict = {"a": table_info([]), "b": table_info([])}
+
+    run_in_dependency_order(["a", "b"], lambda _: barrier.wait(), 2, tables_dict)
+
+
+def test_dependencies_outside_run_ignored():
+    loaded: list[str] = []
+    run_in_dependency_order(["facility_new"], loaded.append)
+    assert loaded == ["facility_new"]
+
+
+def test_cycle_names_tables():
+    tables_dict = {
+        "a": table_info(["c"]),
+        "b": table_info(["a"]),
+        "c": table_info(["b"]),
+        "d": table_info([]),
+    }
+
+    with pytest.raises(ValueError, match="a -> c -> b -> a"):
+        run_in_dependency_order(list(tables_dict), print, 2, tables_dict)
+
+
+def test_failure_stops_dependents():
+    loaded: list[str] = []
+    tables_dict = {
+        "a": table_info([]),
+        "b": table_info(["a"]),
+        "c": table_info([]),
+    }
+
+    def load_table(table):
+        if table == "a":
+            raise RuntimeError("failed to load a")
+        loaded.append(table)
+
+    with pytest.raises(RuntimeError, match="failed to load a"):
+        run_in_dependency_order(list(tables_dict), load_table, 2, tables_dict)
+
+    assert loaded == ["c"]
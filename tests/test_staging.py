@@ -0,0 +1,118 @@
+"""
+Rebuilding postgres in a staging schema and swapping it in for extract.
+"""
+
+import pytest
+from sqlalchemy import inspect, text
+
+from registry_codes.catalog import load_table
+from registry_codes.staging import (
+    LIVE_SCHEMA,
+    PREVIOUS_SCHEMA,
+    STAGING_SCHEMA,
+    check_row_counts,
+    create_schema,
+    expected_row_count,
+    rollback,
+    swap_schemas,
+)
+from registry_codes.utils import create_table, load_data
+from tests.test_insert import TABLES
+
+SCHEMAS = [LIVE_SCHEMA, STAGING_SCHEMA, PREVIOUS_SCHEMA]
+
+
+@pytest.mark.parametrize("table_name", TABLES)
+def test_expected_row_count_matches_load(table_name):
+    expected = len(load_table(table_name, typed=True, clean=True))
+    assert expected_row_count(table_name, read_chunksize=97) == expected
+
+
+@pytest.fixture
+def staging_engine(postgres_engine):
+    def drop_schemas():
+        with postgres_engine.begin() as conn:
+            for schema in SCHEMAS:
+                conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+            conn.execute(text("DROP TYPE IF EXISTS gp_type"))
+
+    drop_schemas()
+    yield postgres_engine
+    drop_schemas()
+
+
+def build_staging_table(engine, table_name):
+    create_schema(engine, STAGING_SCHEMA)
+    create_table(table_name, engine, schema=STAGING_SCHEMA)
+    load_data(table_name, engine, bulk=True, schema=STAGING_SCHEMA)
+
+
+def marker(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f'SELECT "build" FROM "{LIVE_SCHEMA}"."marker"')
+        ).scalar_one()
+
+
+def mark_staging(engine, build):
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE TABLE "{STAGING_SCHEMA}"."marker" ("build" text)'))
+        conn.execute(
+            text(f'INSERT INTO "{STAGING_SCHEMA}"."marker" VALUES (:build)'),
+            {"build": build},
+        )
+
+
+def test_swap_keeps_previous_and_rolls_back(staging_engine):
+    build_staging_table(staging_engine, "coding_standards")
+    mark_staging(staging_engine, "first")
+    swap_schemas(staging_engine)
+
+    build_staging_table(staging_engine, "coding_standards")
+    mark_staging(staging_engine, "second")
+    swap_schemas(staging_engine)
+
+    schemas = inspect(staging_engine).get_schema_names()
+    assert LIVE_SCHEMA in schemas and PREVIOUS_SCHEMA in schemas
+    assert STAGING_SCHEMA not in schemas
+    assert marker(staging_engine) == "second"
+
+    rollback(staging_engine)
+    assert marker(staging_engine) == "first"
+    # Nothing left to roll back to
+    with pytest.raises(RuntimeError):
+        rollback(staging_engine)
+
+
+def test_enum_created_in_staging(staging_engine):
+    build_staging_table(staging_engine, "ukrdc_ods_gp_codes")
+    with staging_engine.connect() as conn:
+        schemas = conn.execute(
+            text(
+                "SELECT n.nspname FROM pg_type t "
+                "JOIN pg_namespace n ON n.oid = t.typnamespace "
+                "WHERE t.typname = 'gp_type'"
+            )
+        ).scalars()
+        assert list(schemas) == [STAGING_SCHEMA]
+
+
+def test_row_count_mismatch_found(staging_engine):
+    build_staging_table(staging_engine, "coding_standards")
+    (check,) = check_row_counts(staging_engine, ["coding_standards"], STAGING_SCHEMA)
+    assert check["loaded"] == check["expected"]
+
+    with staging_engine.begin() as conn:
+        conn.execute(
+            text(
+                f'DELETE FROM "{STAGING_SCHEMA}"."coding_standards" WHERE ctid IN '
+                f'(SELECT ctid FROM "{STAGING_SCHEMA}"."coding_standards" LIMIT 5)'
+            )
+        )
+    (check,) = check_row_counts(staging_engine, ["coding_standards"], STAGING_SCHEMA)
+    assert check["loaded"] == check["expected"] - 5
+
+
+def test_swap_needs_staging(staging_engine):
+    with pytest.raises(RuntimeError):
+        swap_schemas(staging_engine)
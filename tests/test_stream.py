@@ -0,0 +1,106 @@
+"""
+Streamed loads should write exactly what loading the whole table does,
+however the rows fall across chunks.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.utils import (
+    KeyHashSet,
+    create_table,
+    load_data,
+    stream_data_to_table,
+)
+from tests.test_insert import TABLES, read_table
+
+
+def test_key_hash_set_keeps_first_of_each_key():
+    seen = KeyHashSet()
+    first = pd.DataFrame({"a": ["x", "y", "x"], "b": ["1", "1", "1"]})
+    second = pd.DataFrame({"a": ["y", "z", "x", "z"], "b": ["1", "1", "2", "1"]})
+
+    assert seen.add_new(first).tolist() == [True, True, False]
+    assert seen.add_new(second).tolist() == [False, True, True, False]
+    assert len(seen) == 4
+
+
+@pytest.mark.parametrize("table_name", TABLES)
+def test_stream_matches_whole_load(tmp_path, table_name):
+    whole = create_engine(f"sqlite:///{tmp_path / 'whole.sqlite'}")
+    create_table(table_name, whole)
+    rows = load_data(table_name, whole, bulk=True)
+
+    streamed = create_engine(f"sqlite:///{tmp_path / 'streamed.sqlite'}")
+    create_table(table_name, streamed)
+    # Small enough that duplicates are split across chunks and files
+    assert stream_data_to_table(table_name, streamed, read_chunksize=97) == rows
+
+    pd.testing.assert_frame_equal(
+        read_table(streamed, table_name), read_table(whole, table_name)
+    )
+
+
+def test_stream_keeps_first_across_chunks(tmp_path, monkeypatch):
+    table_dir = tmp_path / "tables" / "ukrdc_ods_gp_codes"
+    table_dir.mkdir(parents=True)
+    pd.DataFrame(
+        {
+            "code": ["G1", "G2", None, "G1", "G3", "G2"],
+            "name": ["first", "first", "no code", "second", "first", "second"],
+            "type": "GP",
+        }
+    ).to_csv(table_dir / "gp.csv", index=False)
+    monkeypatch.chdir(tmp_path)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ods.sqlite'}")
+    create_table("ukrdc_ods_gp_codes", engine)
+    assert load_data("ukrdc_ods_gp_codes", engine, stream=True) == 3
+    # Reloading replaces what's there
+    assert stream_data_to_table("ukrdc_ods_gp_codes", engine, read_chunksize=2) == 3
+
+    names = read_table(engine, "ukrdc_ods_gp_codes")["name"]
+    assert names.tolist() == ["first"] * 3
+
+
+def test_stream_warns_on_hash_collision(tmp_path, monkeypatch, caplog):
+    table_dir = tmp_path / "tables" / "ukrdc_ods_gp_codes"
+    table_dir.mkdir(parents=True)
+    pd.DataFrame({"code": ["G1", "G2", "G3"], "name": "x", "type": "GP"}).to_csv(
+        table_dir / "gp.csv", index=False
+    )
+    monkeypatch.chdir(tmp_path)
+
+    # Every key hashes the same, so only the first row is kept
+    def colliding(keys, index=False):
+        return pd.Series(np.zeros(len(keys), dtype=np.uint64))
+
+    monkeypatch.setattr(pd.util, "hash_pandas_object", colliding)
+    engine = create_engine(f"sqlite:///{tmp_path / 'ods.sqlite'}")
+    create_table("ukrdc_ods_gp_codes", engine)
+    with caplog.at_level(logging.WARNING):
+        assert stream_data_to_table("ukrdc_ods_gp_codes", engine, read_chunksize=2) == 1
+
+    assert "2 rows with distinct keys" in caplog.text
+
+
+def test_stream_cant_sync(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+    with pytest.raises(ValueError):
+        load_data("code_list", engine, stream=True, sync=True)
+
+
+def test_stream_copy_postgres(postgres_engine):
+    for table_name in TABLES:
+        create_table(table_name, postgres_engine)
+        load_data(table_name, postgres_engine)
+        whole = read_table(postgres_engine, table_name)
+
+        stream_data_to_table(
+            table_name, postgres_engine, copy=True, chunksize=250, read_chunksize=97
+        )
+        pd.testing.assert_frame_equal(read_table(postgres_engine, table_name), whole)
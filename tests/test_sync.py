@@ -0,0 +1,92 @@
+"""
+Differential loading should only touch rows which have actually changed.
+"""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from registry_codes.catalog import load_table
+from registry_codes.schema import TABLE_MODEL_MAP
+from registry_codes.utils import (
+    clean_data,
+    create_table,
+    load_data,
+    sync_data_to_table,
+)
+from tests.test_insert import TABLES, read_table
+
+
+def cleaned(table_name):
+    return clean_data(table_name, load_table(table_name), fill_creation_date=True)
+
+
+def assert_no_changes(engine):
+    for table_name in TABLES:
+        create_table(table_name, engine)
+        load_data(table_name, engine)
+
+        summary = sync_data_to_table(table_name, cleaned(table_name), engine)
+
+        assert summary["inserted"] == 0
+        assert summary["updated"] == 0
+        assert summary["deleted"] == 0
+        assert summary["unchanged"] == len(read_table(engine, table_name))
+
+
+def test_sync_unchanged_tables_sqlite(tmp_path):
+    assert_no_changes(create_engine(f"sqlite:///{tmp_path / 'sync'}.sqlite"))
+
+
+def test_sync_unchanged_tables_postgres(postgres_engine):
+    assert_no_changes(postgres_engine)
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync'}.sqlite")
+    for table_name in ("coding_standards", "code_exclusion"):
+        create_table(table_name, engine)
+        load_data(table_name, engine)
+    return engine
+
+
+def test_sync_applies_differences(sqlite_engine):
+    df = cleaned("coding_standards").reset_index(drop=True)
+    df.loc[0, "description"] = "Changed description"
+    df = pd.concat(
+        [
+            df.drop(index=1),
+            pd.DataFrame({"coding_standard": ["NEW_STANDARD"], "description": ["New"]}),
+        ],
+        ignore_index=True,
+    )
+
+    summary = sync_data_to_table("coding_standards", df, sqlite_engine)
+
+    assert summary == {
+        "inserted": 1,
+        "updated": 1,
+        "deleted": 1,
+        "unchanged": len(df) - 2,
+    }
+    result = read_table(sqlite_engine, "coding_standards")
+    expected = df.sort_values(list(df.columns)).reset_index(drop=True)
+    expected = expected.astype(object).where(expected.notna(), None)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_sync_primary_key_change(sqlite_engine):
+    # code_exclusion is keyed on code and coding_standard but system is also
+    # part of the primary key
+    assert "system" not in TABLE_MODEL_MAP["code_exclusion"]["unique_columns"]
+
+    df = cleaned("code_exclusion").reset_index(drop=True)
+    df.loc[0, "system"] = "OTHER"
+
+    summary = sync_data_to_table("code_exclusion", df, sqlite_engine)
+
+    assert summary["updated"] == 1
+    result = read_table(sqlite_engine, "code_exclusion")
+    assert len(result) == len(df)
+    assert ((result.code == df.loc[0, "code"]) & (result.system == "OTHER")).sum() == 1
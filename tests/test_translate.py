@@ -0,0 +1,95 @@
+"""
+Column-wise translation between coding standards should agree with code_map.
+"""
+
+import pandas as pd
+import pytest
+
+from registry_codes.translate import CodeMapTranslator, translate
+from registry_codes.catalog import load_table
+
+CODE_MAP = pd.DataFrame(
+    [
+        ("PV_RAW", "mg", "PV", "magnesium"),
+        ("PV", "magnesium", "LOINC", "2601-3"),
+        ("UNIT", "Ug/L", "PV", "ng/mL"),
+        ("UNIT", "Ug/L", "PV", "microg/L"),
+        ("UNIT", "mmol/L", "PV", "mmol/L"),
+    ],
+    columns=[
+        "source_coding_standard",
+        "source_code",
+        "destination_coding_standard",
+        "destination_code",
+    ],
+)
+
+
+@pytest.fixture
+def translator():
+    return CodeMapTranslator(CODE_MAP)
+
+
+def test_nulls_kept_and_unmapped_reported(translator):
+    values = pd.Series(["mg", None, "unknown", "mg", "unknown"], index=list("abcde"))
+
+    result = translator.translate(values, "PV_RAW", "PV")
+
+    assert result["values"].tolist() == ["magnesium", None, None, "magnesium", None]
+    assert result["values"].index.tolist() == list("abcde")
+    assert result["unmapped"].to_dict() == {"unknown": 2}
+
+
+def test_chains_need_longer_paths(translator):
+    values = pd.Series(["mg"])
+
+    assert translator.translate(values, "PV_RAW", "LOINC")["values"].tolist() == [None]
+    result = translator.translate(values, "PV_RAW", "LOINC", max_path_length=2)
+    assert result["values"].tolist() == ["2601-3"]
+
+
+def test_one_to_many_policies(translator):
+    values = pd.Series(["Ug/L", "mmol/L", None])
+
+    with pytest.raises(ValueError, match="Ug/L"):
+        translator.translate(values, "UNIT", "PV")
+
+    first = translator.translate(values, "UNIT", "PV", multiple="first")
+    assert first["values"].tolist() == ["microg/L", "mmol/L", None]
+
+    every = translator.translate(values, "UNIT", "PV", multiple="all")
+    assert every["values"].tolist() == ["microg/L", "ng/mL", "mmol/L", None]
+    assert every["values"].index.tolist() == [0, 0, 1, 2]
+
+
+def test_one_to_many_only_raises_when_used(translator):
+    result = translator.translate(pd.Series(["mmol/L"]), "UNIT", "PV")
+    assert result["values"].tolist() == ["mmol/L"]
+
+
+def test_frame_translated_per_column(translator):
+    df = pd.DataFrame({"a": ["mg", "x"], "b": [None, "mg"]})
+
+    result = translator.translate(df, "PV_RAW", "PV")
+
+    assert result["values"].to_dict("list") == {
+        "a": ["magnesium", None],
+        "b": [None, "magnesium"],
+    }
+    assert result["unmapped"].to_dict() == {("a", "x"): 1}
+
+    with pytest.raises(ValueError, match="series"):
+        translator.translate(df, "PV_RAW", "PV", multiple="all")
+
+
+def test_matches_code_map_csvs():
+    code_map = load_table("code_map")
+    maps = code_map[
+        (code_map.source_coding_standard == "PV_RAW_ETHNICITY")
+        & (code_map.destination_coding_standard == "NHS_DATA_DICTIONARY")
+    ]
+
+    result = translate(maps.source_code, "PV_RAW_ETHNICITY", "NHS_DATA_DICTIONARY")
+
+    assert list(result["values"]) == maps.destination_code.tolist()
+    assert len(result["unmapped"]) == 0
@@ -0,0 +1,168 @@
+"""
+The validation rules run against small tables here, and against the real
+tables in the thin wrappers kept in test_places, test_facilities,
+test_coding_standards and test_tables_completeness.
+"""
+
+import json
+from functools import cache
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from registry_codes.validate import RULES, format_result, main, run_rule, validate
+
+
+@cache
+def results():
+    # Every table is parsed once for the whole session
+    return {result["rule"]: result for result in validate()}
+
+
+def assert_rule(name):
+    result = results()[name]
+    assert result["passed"], format_result(result)
+
+
+@pytest.mark.parametrize(
+    "name", [rule["name"] for rule in RULES if rule["severity"] == "error"]
+)
+def test_error_rules_pass(name):
+    assert_rule(name)
+
+
+def test_rule_names_unique():
+    names = [rule["name"] for rule in RULES]
+    assert len(names) == len(set(names))
+
+
+def test_reference_only_known_standards():
+    tables = {
+        "code_map": pd.DataFrame(
+            {
+                "source_coding_standard": ["PV", "PV", "RAW", None],
+                "source_code": ["a", "b", "c", "d"],
+            }
+        ),
+        "code_list": pd.DataFrame({"coding_standard": ["PV"], "code": ["a"]}),
+    }
+    rule = {
+        "kind": "reference",
+        "name": "test",
+        "severity": "error",
+        "table": "code_map",
+        "columns": ["source_coding_standard", "source_code"],
+        "references": "code_list",
+        "reference_columns": ["coding_standard", "code"],
+        "known_only": False,
+    }
+
+    result = run_rule(rule, tables)  # type: ignore[arg-type]
+    assert result["failures"] == 2
+    assert result["examples"] == [
+        {"source_coding_standard": "PV", "source_code": "b"},
+        {"source_coding_standard": "RAW", "source_code": "c"},
+    ]
+
+    result = run_rule({**rule, "known_only": True}, tables)  # type: ignore[arg-type]
+    assert result["examples"] == [{"source_coding_standard": "PV", "source_code": "b"}]
+
+
+def test_allowed_values_when_set():
+    tables = {
+        "facility_new": pd.DataFrame(
+            {
+                "facilitytype": ["Adult Renal Centre", "Hospital", "Hospital"],
+                "firstdataquarter": ["1", None, "2"],
+            }
+        )
+    }
+    rule = {
+        "kind": "allowed_values",
+        "name": "test",
+        "severity": "error",
+        "table": "facility_new",
+        "column": "facilitytype",
+        "values": ["Adult Renal Centre"],
+        "when_set": "firstdataquarter",
+    }
+
+    result = run_rule(rule, tables)  # type: ignore[arg-type]
+    assert not result["passed"]
+    assert result["examples"] == [{"facilitytype": "Hospital", "firstdataquarter": "2"}]
+
+
+def test_referenced():
+    tables = {
+        "coding_standards": pd.DataFrame({"coding_standard": ["PV", "UNUSED"]}),
+        "code_list": pd.DataFrame({"coding_standard": ["PV", None]}),
+    }
+    rule = {
+        "kind": "referenced",
+        "name": "test",
+        "severity": "error",
+        "table": "coding_standards",
+        "column": "coding_standard",
+        "referenced_by": [("code_list", "coding_standard")],
+    }
+
+    result = run_rule(rule, tables)  # type: ignore[arg-type]
+    assert result["examples"] == [{"coding_standard": "UNUSED"}]
+
+
+def test_mapped_rows_match_treats_missing_as_equal():
+    tables = {
+        "facility_new": pd.DataFrame(
+            {
+                "facilitycode": ["MAIN", "SAME", "DIFF"],
+                "startdate": ["2020", "2020", "2021"],
+                "enddate": [None, None, None],
+            }
+        ),
+        "code_map": pd.DataFrame(
+            {
+                "source_coding_standard": ["CHILD", "CHILD", "OTHER"],
+                "source_code": ["SAME", "DIFF", "DIFF"],
+                "destination_code": ["MAIN", "MAIN", "SAME"],
+            }
+        ),
+    }
+    rule = {
+        "kind": "mapped_rows_match",
+        "name": "test",
+        "severity": "error",
+        "table": "facility_new",
+        "key": "facilitycode",
+        "mapping_standard": "CHILD",
+        "columns": ["startdate", "enddate"],
+    }
+
+    result = run_rule(rule, tables)  # type: ignore[arg-type]
+    assert result["failures"] == 1
+    assert result["examples"][0]["source_code"] == "DIFF"
+
+
+def test_cli_exit_code_and_json(capsys):
+    assert main(["--json", "--rule", "facility_in_code_list"]) == 0
+    (result,) = json.loads(capsys.readouterr().out)
+    assert result["rule"] == "facility_in_code_list"
+    assert result["passed"]
+
+
+def test_cli_fails_on_errors(monkeypatch):
+    rule: dict[str, Any] = {
+        "kind": "allowed_values",
+        "name": "always_fails",
+        "severity": "error",
+        "table": "coding_standards",
+        "column": "coding_standard",
+        "values": [],
+        "when_set": None,
+    }
+    monkeypatch.setattr("registry_codes.validate.RULES", [rule])
+
+    assert main([]) == 1
+    assert main(["--rule", "always_fails"]) == 1
+    monkeypatch.setitem(rule, "severity", "warning")
+    assert main([]) == 0